@@ -2,20 +2,47 @@ import jwt
 from fastapi import HTTPException,Security
 from fastapi.security import HTTPBearer
 from passlib.context import CryptContext    
-from datetime import timedelta,datetime,timezone
+from datetime import timedelta,datetime
 from config import JWT_SECRET_KEY,JWT_ACCESS_TOKEN_EXPIRE,JWT_REFRESH_TOKEN_EXPIRE,JWT_ALGO,JWT_REFRESH_SECRET
+from config import HASH_WORKERS,HASH_QUEUE_LIMIT,HASH_EXECUTOR,TOKEN_CACHE_SIZE
 from typing import Optional
+from cache import LRUCache
+from pools import BoundedPool
+from models import Principal
+import hashlib
+
+pwd_context = CryptContext(schemes=["bcrypt"],deprecated = "auto")
+
+# Module-level so they can be pickled into a process pool.
+def hashPwd(password : str) -> str:
+    return pwd_context.hash(password)
+
+def checkPwd(plainPwd : str,hashedPwd : str) -> bool:
+    return pwd_context.verify(plainPwd,hashedPwd)
+
+class HashPool(BoundedPool):
+    """Runs bcrypt off the event loop on a bounded worker pool."""
+    def __init__(self,workers : int = HASH_WORKERS,queueLimit : int = HASH_QUEUE_LIMIT,kind : str = HASH_EXECUTOR):
+        super().__init__(workers,queueLimit,kind,name="bcrypt")
 
 class AuthHandler():
     security = HTTPBearer()
-    pwd_context = CryptContext(schemes=["bcrypt"],deprecated = "auto")
+    pwd_context = pwd_context
+    hashPool = HashPool()
+    tokenCache = LRUCache(TOKEN_CACHE_SIZE)
     secret = JWT_SECRET_KEY
     
     def getPwdHash(self,password : str) -> str :
-        return self.pwd_context.hash(password)
+        return hashPwd(password)
     
     def verifyPwd(self,plainPwd : str,hashedPwd) -> bool:
-        return self.pwd_context.verify(plainPwd,hashedPwd) 
+        return checkPwd(plainPwd,hashedPwd)
+
+    async def getPwdHashAsync(self,password : str) -> str:
+        return await self.hashPool.run(hashPwd,password)
+
+    async def verifyPwdAsync(self,plainPwd : str,hashedPwd) -> bool:
+        return await self.hashPool.run(checkPwd,plainPwd,hashedPwd)
     
     def createAccessToken(self,data : dict,expiresDelta : Optional[timedelta] = None) -> str:
         toEncode = data.copy()
@@ -32,18 +59,28 @@ class AuthHandler():
     def decodeToken(self, token: str, is_refresh: bool = False):
         secret = JWT_REFRESH_SECRET if is_refresh else JWT_SECRET_KEY
         try:
-            payload = jwt.decode(token, secret, algorithms=[JWT_ALGO])
-
-            exp = payload.get("exp")
-            if exp is not None:
-                current_time = datetime.now(tz=timezone.utc).timestamp()
-                print(current_time)
-                if current_time > exp:
-                    raise HTTPException(status_code=401, detail="Token has expired")
-            
-            return payload
+            # jwt.decode already rejects an expired "exp" claim.
+            return jwt.decode(token, secret, algorithms=[JWT_ALGO])
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=401, detail="Token has expired")
         except jwt.DecodeError:
             raise HTTPException(status_code=401, detail="Token is invalid")
-  
\ No newline at end of file
+
+    def getPrincipal(self, token: str) -> Principal:
+        """Return the caller behind an access token, verifying it at most once.
+
+        Verified tokens are cached by digest until their own ``exp``, so repeat
+        requests skip signature verification entirely.
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        principal = self.tokenCache.get(key)
+        if principal is not None:
+            return principal
+        payload = self.decodeToken(token)
+        try:
+            email, username = payload["sub"].rsplit("+", 1)
+        except (KeyError, AttributeError, ValueError):
+            raise HTTPException(status_code=401, detail="Invalid token")
+        principal = Principal(email=email, username=username)
+        self.tokenCache.set(key, principal, expiresAt=payload.get("exp"))
+        return principal
@@ -0,0 +1,886 @@
+"""Micro-benchmarks for the backend hot paths.
+
+Run one with ``python benchmarks.py <name> [options]``; every benchmark
+prints a JSON report. They use the local stand-ins, so no Supabase or
+Together credentials are needed, except ``reviews`` which measures real
+model usage and needs TOGETHER_API_KEY.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import time
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+for var, placeholder in {
+    "SUPABASE_URL": "http://localhost:54321",
+    "SUPABASE_API_KEY": "bench.bench.bench",
+    "TOGETHER_API_KEY": "bench",
+    "JWT_SECRET_KEY": "bench-secret",
+    "JWT_ALGO": "HS256",
+    "JWT_ACCESS_TOKEN_EXPIRE": "30",
+    "JWT_REFRESH_TOKEN_EXPIRE": "7",
+    "JWT_REFRESH_SECRET": "bench-refresh-secret",
+}.items():
+    os.environ.setdefault(var, placeholder)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def summarize(samples: List[float]) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples, default=0) * 1000, 2),
+    }
+
+
+async def measureLoopLag(stop: asyncio.Event, tick: float = 0.01) -> List[float]:
+    """Stand-in for an LLM stream: how late does a 10ms tick fire?"""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append(time.perf_counter() - start - tick)
+    return lags
+
+
+async def benchDbPool(args) -> dict:
+    from repository import Repository
+    from standins import InMemorySupabase
+
+    client = InMemorySupabase(latency=args.latency)
+    client.table("Interview").insert({
+        "id": 1, "creator": "bench",
+        "questions": {"data": [{"question": "q", "answer": None}]},
+    }).execute()
+
+    async def blockingAnswer(arrived: float):
+        client.table("Interview").select("creator", "questions").eq("id", 1).execute()
+        client.table("Interview").update({"reviews": None}).eq("id", 1).execute()
+        return time.perf_counter() - arrived
+
+    repo = Repository(client, maxWorkers=args.workers)
+
+    async def pooledAnswer(arrived: float):
+        await repo.getInterview(1, "creator", "questions")
+        await repo.updateInterview(1, {"reviews": None})
+        return time.perf_counter() - arrived
+
+    async def run(answer):
+        stop = asyncio.Event()
+        lagTask = asyncio.create_task(measureLoopLag(stop))
+        await asyncio.sleep(0)
+        latencies = []
+        for _ in range(args.rounds):
+            arrived = time.perf_counter()
+            latencies += await asyncio.gather(*(answer(arrived) for _ in range(args.concurrency)))
+        stop.set()
+        return {"answers": summarize(latencies), "loop_lag": summarize(await lagTask)}
+
+    report = {"before": await run(blockingAnswer), "after": await run(pooledAnswer)}
+    repo.close()
+    return report
+
+
+async def benchHashing(args) -> dict:
+    from auth import HashPool, checkPwd, hashPwd
+
+    hashed = hashPwd("bench-password")
+    cores = os.cpu_count() or 1
+
+    async def run(login) -> dict:
+        stop = asyncio.Event()
+        lagTask = asyncio.create_task(measureLoopLag(stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        return {
+            "logins_per_sec": round(args.concurrency / elapsed, 2),
+            "logins_per_sec_per_core": round(args.concurrency / elapsed / cores, 2),
+            "loop_lag": summarize(await lagTask),
+        }
+
+    async def inline():
+        checkPwd("bench-password", hashed)
+
+    report = {"cores": cores, "inline": await run(inline)}
+    for kind in ("thread", "process"):
+        pool = HashPool(workers=args.workers, queueLimit=args.concurrency, kind=kind)
+        await pool.run(checkPwd, "bench-password", hashed)
+        report[kind] = await run(lambda: pool.run(checkPwd, "bench-password", hashed))
+        pool.close()
+    return report
+
+
+async def benchAuth(args) -> dict:
+    from auth import AuthHandler
+
+    auth = AuthHandler()
+    token = auth.createAccessToken({"sub": "bench@example.com+bench"})
+    iterations = args.rounds * 10000
+
+    def perCall(fn) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        return (time.perf_counter() - start) / iterations
+
+    def decodeEveryTime():
+        payload = auth.decodeToken(token)
+        payload["sub"].split("+")
+
+    auth.getPrincipal(token)
+    uncached = perCall(decodeEveryTime)
+    cached = perCall(lambda: auth.getPrincipal(token))
+    return {
+        "iterations": iterations,
+        "decode_per_request_us": round(uncached * 1e6, 2),
+        "cached_principal_per_request_us": round(cached * 1e6, 2),
+        "speedup": round(uncached / cached, 1),
+    }
+
+
+def _ratelimitWorker(path: str, capacity: int, duration: float, results) -> None:
+    from ratelimit import RateLimiter, SqliteBucketStore
+
+    async def run():
+        limiter = RateLimiter(capacity, 1, store=SqliteBucketStore(path))
+        granted = 0
+        deadline = time.monotonic() + duration
+        while True:
+            await limiter.acquire()
+            if time.monotonic() > deadline:
+                break
+            granted += 1
+        results.put(granted)
+
+    asyncio.run(run())
+
+
+async def benchRateLimit(args) -> dict:
+    import multiprocessing
+    import tempfile
+    from ratelimit import MemoryBucketStore, RateLimiter, SqliteBucketStore
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, store in (("memory", MemoryBucketStore()), ("sqlite", SqliteBucketStore(f"{tmp}/overhead.db"))):
+            limiter = RateLimiter(10 ** 9, 1, store=store)
+            iterations = args.rounds * 2000
+            start = time.perf_counter()
+            for _ in range(iterations):
+                await limiter.acquire()
+            report[f"{name}_acquire_us"] = round((time.perf_counter() - start) / iterations * 1e6, 2)
+
+        capacity, duration = 10, 3.0
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=_ratelimitWorker, args=(f"{tmp}/shared.db", capacity, duration, results))
+            for _ in range(args.workers)
+        ]
+        for p in procs:
+            p.start()
+        grants = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+    report["shared_bucket"] = {
+        "workers": args.workers,
+        "granted": sum(grants),
+        "budget": int(capacity + capacity * duration),
+    }
+    return report
+
+
+SAMPLE_INTERVIEW = [
+    ("How do you optimize API performance in FastAPI?",
+     "Use async endpoints for I/O, pool database connections, cache hot reads and paginate large responses."),
+    ("Explain Python concurrency", "GIL"),
+    ("How would you design a rate limiter shared by several workers?",
+     "A token bucket kept in Redis and updated atomically with a Lua script."),
+    ("What is dependency injection?", None),
+    ("How do you test code that calls an external API?",
+     "Mock the client at the boundary and keep a few contract tests against a sandbox."),
+]
+
+
+async def benchReviews(args) -> dict:
+    from langchain_core.callbacks import get_usage_metadata_callback
+    from models import InterviewData, interviewQuestions
+    import together
+
+    interview = InterviewData(data=[interviewQuestions(question=q, answer=a) for q, a in SAMPLE_INTERVIEW])
+    acquired = []
+    acquire = together.rateLimiter.acquire
+
+    async def countingAcquire(endpoint=None):
+        acquired.append(together.rateLimiter.cost(endpoint))
+        await acquire(endpoint)
+
+    together.rateLimiter.acquire = countingAcquire
+    report = {"questions": len(interview.data)}
+    for mode, engine in (("per_question", together.createReviewsPerQuestion), ("batched", together.createReviewsBatched)):
+        acquired.clear()
+        with get_usage_metadata_callback() as usage:
+            start = time.perf_counter()
+            results = await engine(interview)
+            elapsed = time.perf_counter() - start
+        totals = {key: sum(u.get(key, 0) for u in usage.usage_metadata.values())
+                  for key in ("input_tokens", "output_tokens", "total_tokens")}
+        report[mode] = {
+            "wall_s": round(elapsed, 2),
+            **totals,
+            "model_calls": len(acquired),
+            "rate_limit_tokens": sum(acquired),
+            "failed": sum(r.review is None for r in results),
+        }
+    together.rateLimiter.acquire = acquire
+    return report
+
+
+async def benchAnswers(args) -> dict:
+    """Demonstrate the lost-update race by firing every answer of an interview at once.
+
+    This is not a test of migrations/002: the stand-in runs answer_question
+    in Python under one global lock, so its row can only show the round
+    trips. Atomicity of the SQL function needs a real Postgres to check.
+    """
+    from repository import Repository
+    from standins import InMemorySupabase
+
+    questions = [f"Question {i}" for i in range(args.concurrency)]
+    client = InMemorySupabase(latency=args.latency)
+    repo = Repository(client, maxWorkers=args.workers)
+
+    def newInterview() -> int:
+        row = client.table("Interview").insert({
+            "creator": "bench",
+            "questions": {"data": [{"question": q, "answer": None} for q in questions]},
+        }).execute().data[0]
+        return row["id"]
+
+    async def readModifyWrite(id: int, idx: int):
+        interview = await repo.getInterview(id, "questions")
+        data = interview["questions"]
+        data["data"][idx]["answer"] = f"answer {idx}"
+        await repo.updateInterview(id, {"questions": data})
+
+    async def atomic(id: int, idx: int):
+        result = await repo.answerQuestion(id, "bench", idx, questions[idx], f"answer {idx}")
+        assert result["status"] == "ok", result
+
+    report = {"answers": len(questions)}
+    for name, submit in (("read_modify_write", readModifyWrite), ("atomic_rpc", atomic)):
+        id = newInterview()
+        client.calls = 0
+        await asyncio.gather(*(submit(id, idx) for idx in range(len(questions))))
+        stored = (await repo.getInterview(id, "questions"))["questions"]["data"]
+        report[name] = {
+            "lost_answers": sum(q["answer"] is None for q in stored),
+            "db_round_trips": client.calls - 1,
+        }
+    repo.close()
+    return report
+
+
+async def benchListing(args) -> dict:
+    import httpx
+    import main
+    from repository import repo
+    from standins import InMemorySupabase
+
+    token = main.auth.createAccessToken({"sub": "bench@example.com+bench"})
+    headers = {"Authorization": f"Bearer {token}"}
+    qa = [{"question": "Describe a system you designed. " * 3, "answer": "An answer of moderate length. " * 10}] * 5
+    report = {}
+    for rows in (10, 100, 500):
+        repo.client = InMemorySupabase(latency=args.latency)
+        repo.client.table("Interview").insert([{
+            "creator": "bench", "job_name": f"Role {i}",
+            "user_data": "Resume line with skills and experience. " * 100,
+            "job_description": "Job description requirement. " * 60,
+            "questions": {"data": qa},
+            "reviews": [{"question": q["question"], "answer": q["answer"], "review": "Review text. " * 80} for q in qa],
+        } for i in range(rows)]).execute()
+
+        start = time.perf_counter()
+        legacy = json.dumps({"username": "bench", "interviews": await repo.listInterviews("bench")}).encode()
+        legacyTime = time.perf_counter() - start
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            start = time.perf_counter()
+            page = await client.get("/interviews/bench", headers=headers)
+            pageTime = time.perf_counter() - start
+            revalidated = await client.get("/interviews/bench", headers={**headers, "If-None-Match": page.headers["etag"]})
+        report[f"{rows}_rows"] = {
+            "select_all": {"bytes": len(legacy), "ms": round(legacyTime * 1000, 2)},
+            "summary_page": {"bytes": len(page.content), "rows": len(page.json()["interviews"]),
+                             "ms": round(pageTime * 1000, 2)},
+            "revalidate_status": revalidated.status_code,
+        }
+    return report
+
+
+def sampleResume(seed: int) -> str:
+    skills = ["Python", "FastAPI", "PostgreSQL", "React", "Kubernetes", "Go", "Terraform", "Kafka"]
+    pick = [skills[(seed + i) % len(skills)] for i in range(4)]
+    page = "\n".join([
+        "CURRICULUM VITAE",
+        f"Candidate {seed}   |   candidate{seed}@example.com",
+        "",
+        "SUMMARY",
+        f"Backend engineer with {seed % 9 + 2} years building {pick[0]} and {pick[1]} services.",
+        "",
+        "EXPERIENCE",
+        *[f"-  Built {skill} components serving   production traffic for team {seed}." for skill in pick],
+        "",
+        "HOBBIES",
+        "Hiking, photography, chess, cooking and travelling with friends and family.",
+        "",
+        "References available upon request",
+    ])
+    # PDF extraction tends to repeat headers on every page.
+    return "\n\n".join(f"{page}\nPage {n} of 3" for n in range(1, 4))
+
+
+def samplePdf(text: str, linesPerPage: int = 48) -> bytes:
+    """A minimal valid PDF with ``text`` set in Helvetica, one line per text row."""
+    lines = text.split("\n")
+    pages = [lines[i:i + linesPerPage] for i in range(0, len(lines), linesPerPage)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page]
+        stream = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET"
+        objects.append(f"<< /Length {len(stream.encode('latin-1', 'replace'))} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for n, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n{obj}\nendobj\n".encode("latin-1", "replace")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+SAMPLE_JD = "\n".join([
+    "About the role",
+    "We are hiring a backend engineer to build Python and FastAPI services on PostgreSQL.",
+    "Requirements",
+    "- 3+ years with Python, FastAPI and PostgreSQL",
+    "- Experience with Kubernetes and Kafka",
+    "Benefits",
+    "Free snacks, gym membership and flexible hours.",
+    "We are an equal opportunity employer and value diversity.",
+] * 4)
+
+
+async def benchPrep(args) -> dict:
+    from textprep import prepareInputs, fitToBudget
+
+    import pathlib
+
+    if args.corpus:
+        resumes = [p.read_text(errors="ignore") for p in sorted(pathlib.Path(args.corpus).glob("*.txt"))]
+    else:
+        # Each sample repeats its page three times, so most of the savings
+        # here are de-duplication; use --corpus for realistic figures.
+        resumes = [sampleResume(i) for i in range(50)]
+    jd = pathlib.Path(args.jd).read_text() if args.jd else SAMPLE_JD
+
+    before = after = 0
+    start = time.perf_counter()
+    for resume in resumes:
+        prepared = prepareInputs(resume, jd, resumeBudget=args.budget, jdBudget=args.budget)
+        before += prepared.tokensBefore
+        after += prepared.tokensAfter
+    elapsed = time.perf_counter() - start
+
+    # PDF extraction can yield a document with no line breaks at all.
+    oneLine = " ".join(f"Built {skill} services for team {i}." for i in range(200) for skill in ("Python", "Go"))
+    for budget in (args.budget, 5, 1):
+        if not fitToBudget(oneLine, budget, SAMPLE_JD):
+            raise SystemExit(f"fitToBudget emptied a one-line document at budget {budget}")
+    return {
+        "documents": len(resumes),
+        "corpus": args.corpus or "synthetic",
+        "budget": args.budget,
+        "tokens_before": before,
+        "tokens_after": after,
+        "saved_pct": round(100 * (before - after) / before, 1) if before else 0.0,
+        "ms_per_document": round(elapsed / max(len(resumes), 1) * 1000, 3),
+    }
+
+
+async def benchMetrics(args) -> dict:
+    """Cost of recording metrics, failing if it exceeds the overhead budget."""
+    import httpx
+    from fastapi import FastAPI
+    from metrics import Histogram, Counter, Registry, MetricsMiddleware
+
+    n = 200_000
+    histogram = Histogram("bench_seconds", "bench", ("route",))
+    counter = Counter("bench_total", "bench", ("route",))
+    start = time.perf_counter()
+    for i in range(n):
+        histogram.observe(i * 1e-6, "/a")
+    observeNs = (time.perf_counter() - start) / n * 1e9
+    start = time.perf_counter()
+    for i in range(n):
+        counter.inc("/a")
+    incNs = (time.perf_counter() - start) / n * 1e9
+
+    registry = Registry()
+    render = Histogram("bench_render_seconds", "bench", ("route", "status"))
+    for i in range(50):
+        render.observe(0.01, f"/route/{i}", 200)
+    registry.register(render)
+    start = time.perf_counter()
+    body = registry.render()
+    renderMs = (time.perf_counter() - start) * 1000
+
+    async def perRequest(client) -> float:
+        start = time.perf_counter()
+        for _ in range(200):
+            await client.get("/ping")
+        return (time.perf_counter() - start) / 200
+
+    def buildApp(instrumented: bool) -> FastAPI:
+        app = FastAPI()
+        app.get("/ping")(lambda: {"ok": True})
+        if instrumented:
+            app.add_middleware(MetricsMiddleware)
+        return app
+
+    # Interleave short batches and compare medians, so drift in machine
+    # load hits both apps alike instead of skewing whichever ran second.
+    samples = {False: [], True: []}
+    async with contextlib.AsyncExitStack() as stack:
+        clients = {}
+        for instrumented in (False, True):
+            transport = httpx.ASGITransport(app=buildApp(instrumented))
+            clients[instrumented] = await stack.enter_async_context(
+                httpx.AsyncClient(transport=transport, base_url="http://bench"))
+            for _ in range(50):
+                await clients[instrumented].get("/ping")
+        for batch in range(max(args.rounds, 5) * 2):
+            order = (False, True) if batch % 2 else (True, False)
+            for instrumented in order:
+                samples[instrumented].append(await perRequest(clients[instrumented]))
+    plain, instrumented = percentile(samples[False], 50), percentile(samples[True], 50)
+    overheadUs = (instrumented - plain) * 1e6
+    report = {
+        "observe_ns": round(observeNs, 1),
+        "counter_inc_ns": round(incNs, 1),
+        "render_ms_50_series": round(renderMs, 3),
+        "render_bytes": len(body),
+        "request_us_plain": round(plain * 1e6, 1),
+        "request_us_instrumented": round(instrumented * 1e6, 1),
+        "middleware_overhead_us": round(overheadUs, 1),
+        "budget_us": args.overhead_budget,
+    }
+    if observeNs / 1000 > args.overhead_budget or overheadUs > args.overhead_budget * 10:
+        raise SystemExit(f"metrics overhead over budget: {report}")
+    return report
+
+
+STARTUP_PROBE = """
+import asyncio, json, resource, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter() - start
+import httpx
+from repository import repo
+from standins import InMemorySupabase
+
+async def probe():
+    repo.client = InMemorySupabase(latency=float(sys.argv[1]))
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+            await client.get("/healthz")
+            first = time.perf_counter() - start
+            ready = None
+            while time.perf_counter() - start < float(sys.argv[2]):
+                if (await client.get("/readyz")).status_code == 200:
+                    ready = time.perf_counter() - start
+                    break
+                await asyncio.sleep(0.05)
+    print(json.dumps({"import_s": imported, "first_request_s": first, "ready_s": ready,
+                      "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+asyncio.run(probe())
+"""
+
+
+async def benchStartup(args) -> dict:
+    """Import-to-first-request and import-to-ready time, and memory, of a fresh worker.
+
+    The database is the in-memory stand-in; readiness also needs the Together
+    API to answer, so ``ready_s`` is null without network access.
+    """
+    import subprocess
+    import sys
+
+    runs = []
+    for _ in range(args.rounds):
+        out = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE, str(args.latency), str(args.timeout)],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    def median(key):
+        values = sorted(r[key] for r in runs if r[key] is not None)
+        return round(values[len(values) // 2], 3) if values else None
+
+    return {key: median(key) for key in ("import_s", "first_request_s", "ready_s", "max_rss_mb")}
+
+
+async def benchStreaming(args) -> dict:
+    """Socket writes per feedback response, and tokens generated for clients that left."""
+    from repository import repo
+    from standins import InMemorySupabase
+    from streams import FeedbackStreams, FeedbackResponse
+
+    repo.client = InMemorySupabase(latency=0.001)
+    tokens, rate = 200, 400.0
+    produced = {"count": 0}
+
+    async def source():
+        for i in range(tokens):
+            await asyncio.sleep(1 / rate)
+            produced["count"] += 1
+            yield f"tok{i} "
+
+    async def drive(streams: FeedbackStreams, sse: bool, leaveAfter: Optional[int] = None) -> int:
+        stream = streams.start("bench", 0, source())
+        response = FeedbackResponse(streams.subscribe(stream), sse=sse)
+        writes = 0
+
+        async def send(message):
+            nonlocal writes
+            if message["type"] == "http.response.body" and message.get("body"):
+                writes += 1
+                if leaveAfter is not None and writes > leaveAfter:
+                    raise OSError("client went away")
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        try:
+            await response(scope, receive, send)
+        except Exception:
+            pass
+        await asyncio.gather(stream.task, return_exceptions=True)
+        return writes
+
+    report = {"tokens_per_response": tokens}
+    for name, streams in (("per_token", FeedbackStreams(coalesceChars=0, coalesceInterval=0)),
+                          ("coalesced", FeedbackStreams())):
+        report[name] = {"plain_writes": await drive(streams, sse=False), "sse_writes": await drive(streams, sse=True)}
+
+    for name, grace in (("abandoned_no_cancel", float("inf")), ("abandoned_cancel", 0.1)):
+        produced["count"] = 0
+        start = time.perf_counter()
+        await drive(FeedbackStreams(abandonGrace=grace), sse=True, leaveAfter=3)
+        report[name] = {"tokens_generated": produced["count"],
+                        "upstream_busy_ms": round((time.perf_counter() - start) * 1000, 1)}
+    repo.close()
+    return report
+
+
+async def benchHedging(args) -> dict:
+    """Latency of idempotent calls against a model with a 3% slow tail, with and without hedging."""
+    from router import ModelRouter
+    from standins import FakeChatModel
+
+    async def allow() -> bool:
+        return True
+
+    report = {}
+    for name, hedge in (("plain", None), ("hedged", allow)):
+        router = ModelRouter({"review": ["fake"]}, lambda model: FakeChatModel(
+            model, latency=0.05, tokensPerSecond=1000, outputTokens=1, slowRate=0.03, slowLatency=2.0, seed=1
+        ))
+        samples = []
+        for i in range(args.rounds * 60 + 30):
+            start = time.perf_counter()
+            await router.invoke("review", "prompt", hedge=hedge)
+            if i >= 30:  # p95 needs HEDGE_MIN_SAMPLES first
+                samples.append(time.perf_counter() - start)
+        report[name] = dict(summarize(samples), upstream_calls=router.model("fake").calls)
+    return report
+
+
+async def benchQuestions(args) -> dict:
+    """Time until the first question is usable: streamed and parsed vs one structured call."""
+    os.environ.setdefault("QUESTION_CACHE_PATH", "")
+    import together
+    from standins import FakeChatModel
+
+    together.router.factory = lambda name: FakeChatModel(name, latency=0.5, tokensPerSecond=40, outputTokens=40)
+    together.router.models.clear()
+    together.router.runnables.clear()
+    jd = "Backend engineer. Requirements: Python, FastAPI, PostgreSQL, Kubernetes."
+    first, whole, structured = [], [], []
+    for i in range(args.rounds):
+        start = time.perf_counter()
+        async for _ in together.streamQuestions(sampleResume(2 * i), jd):
+            if len(first) == i:
+                first.append(time.perf_counter() - start)
+        whole.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await together.createQuestions(sampleResume(2 * i + 1), jd)
+        structured.append(time.perf_counter() - start)
+    return {"streamed_first_question": summarize(first), "streamed_all_questions": summarize(whole),
+            "structured_all_questions": summarize(structured),
+            "structured_runnables_built": len(together.router.runnables)}
+
+
+async def benchBulk(args) -> dict:
+    """N sequential createInterview calls against one createInterviews call for the same JD."""
+    os.environ.setdefault("QUESTION_CACHE_PATH", "")
+    os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000")
+    from loadtest import Recorder, call, install
+    from jobs import questionJobs
+    from repository import repo
+    from textprep import cleanJobDescription
+
+    app = install(argparse.Namespace(db_latency=args.latency, llm_latency=0.5, token_rate=80.0,
+                                     output_tokens=40, error_rate=0.0))
+    recorder = Recorder()
+    jd = "Backend engineer. Requirements: Python, FastAPI, PostgreSQL, Kubernetes.\n" * 20
+    report = {"resumes": args.concurrency}
+    async with app.router.lifespan_context(app):
+        await call(app, recorder, "signup", "POST", "/signup",
+                   json_body={"username": "bulk", "email": "bulk@example.com", "password": "bulk-password"})
+        _, _, body = await call(app, recorder, "login", "POST", "/login",
+                                form={"username": "bulk@example.com", "password": "bulk-password"})
+        auth = {"Authorization": f"Bearer {json.loads(body)['access_token']}"}
+
+        for name, offset in (("sequential", 0), ("bulk", args.concurrency)):
+            resumes = [sampleResume(offset + i) for i in range(args.concurrency)]
+            cleanJobDescription.cache_clear()
+            calls = repo.client.calls
+            start = time.perf_counter()
+            if name == "sequential":
+                for resume in resumes:
+                    await call(app, recorder, name, "POST", "/createInterview/bulk", headers=auth,
+                               json_body={"user_data": resume, "job_description": jd, "job_name": "Backend"})
+                while questionJobs.tasks:
+                    await asyncio.sleep(0.01)
+                created = args.concurrency
+            else:
+                _, _, body = await call(app, recorder, name, "POST", "/createInterviews/bulk", headers=auth,
+                                        json_body={"resumes": resumes, "job_description": jd, "job_name": "Backend"})
+                created = json.loads(body.decode().splitlines()[-1])["created"]
+            report[name] = {"wall_s": round(time.perf_counter() - start, 3), "created": created,
+                            "db_calls": repo.client.calls - calls,
+                            "jd_preprocessed": cleanJobDescription.cache_info().misses}
+    return report
+
+
+async def benchDedupe(args) -> dict:
+    """Hit rate, wrong reuses and lookup cost of the near-duplicate answer index on a synthetic pool."""
+    import random
+    from similarity import AnswerIndex
+
+    rng = random.Random(7)
+    questions = [f"Question {q}: how would you scale service {q} under load?" for q in range(10)]
+    stock = ["", "I don't know", "Not sure, sorry.",
+             "I would add caching with Redis, put the service behind a load balancer and scale it horizontally.",
+             "Profile first, then fix the slowest queries with indexes and add connection pooling to the database."]
+
+    def variant(text: str) -> str:
+        words = text.split()
+        if words and rng.random() < 0.5:
+            words[-1] = words[-1].rstrip(".") + rng.choice(["", ".", "!"])
+        return " ".join(words).upper() if rng.random() < 0.2 else " ".join(words)
+
+    index = AnswerIndex(maxEntries=args.workers * 1000)
+    wrong, lookupTimes = 0, []
+    for i in range(args.rounds * 1000):
+        question = rng.choice(questions)
+        if rng.random() < 0.6:
+            source = rng.randrange(len(stock))
+            answer = variant(stock[source])
+        else:
+            source = None
+            answer = " ".join(rng.choice(("latency", "shard", "queue", "replica", "cache", "thread", "async", "batch"))
+                              + str(rng.randrange(50)) for _ in range(20))
+        start = time.perf_counter()
+        reused = index.lookup("feedback", question, answer)
+        lookupTimes.append(time.perf_counter() - start)
+        if reused is None:
+            index.add("feedback", question, answer, (question, source))
+        elif reused != (question, source) or source is None:
+            wrong += 1
+    stats = index.stats()
+    return {"pairs": args.rounds * 1000, "near_duplicate_share": 0.6, **stats["feedback"], "wrong_reuses": wrong,
+            "entries": stats["entries"], "lookup": summarize(lookupTimes)}
+
+
+async def benchSession(args) -> dict:
+    """Per-answer latency and DB operations per interview: REST calls against one WebSocket session."""
+    os.environ.setdefault("QUESTION_CACHE_PATH", "")
+    os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000")
+    from loadtest import Recorder, call, install, restFlow, sessionFlow
+    from jobs import questionJobs, reviewJobs
+    from similarity import answerIndex
+
+    flowArgs = argparse.Namespace(db_latency=args.latency, llm_latency=0.3, token_rate=80.0, output_tokens=60,
+                                  error_rate=0.0, think_time=0.0)
+    app = install(flowArgs)
+    db = app.state.db
+    answerIndex.maxEntries = 0  # every answer is identical here; do not let feedback be reused
+    recorder = Recorder()
+    report = {"interviews": args.concurrency, "db_latency_ms": args.latency * 1000}
+    async with app.router.lifespan_context(app):
+        await call(app, recorder, "signup", "POST", "/signup",
+                   json_body={"username": "session", "email": "session@example.com", "password": "session-password"})
+        _, _, body = await call(app, recorder, "login", "POST", "/login",
+                                form={"username": "session@example.com", "password": "session-password"})
+        token = json.loads(body)["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+        ids = {}
+        for transport in ("rest", "websocket"):
+            ids[transport] = []
+            for i in range(args.concurrency):
+                _, _, body = await call(app, recorder, "create", "POST", "/createInterview/session", headers=auth,
+                                        json_body={"user_data": sampleResume(len(ids) * 1000 + i),
+                                                   "job_description": "Backend engineer.", "job_name": "Backend"})
+                ids[transport].append(json.loads(body)["interview_id"])
+        while questionJobs.tasks:
+            await asyncio.sleep(0.01)
+
+        for transport, flow in (("rest", restFlow), ("websocket", sessionFlow)):
+            await reviewJobs.queue.join()  # the previous run's reviews would compete for model slots
+            recorder = Recorder()
+            before = dict(db.operations)
+            credential = auth if transport == "rest" else token
+            start = time.perf_counter()
+            outcomes = await asyncio.gather(*(flow(app, recorder, "session", id, credential, flowArgs)
+                                              for id in ids[transport]))
+            elapsed = time.perf_counter() - start
+            operations = {op: round((n - before.get(op, 0)) / len(outcomes), 2)
+                          for op, n in sorted(db.operations.items()) if n != before.get(op, 0)}
+            report[transport] = {
+                "completed": sum(outcomes), "wall_s": round(elapsed, 3), "per_answer": summarize(recorder.latency["turn"]),
+                "first_feedback": summarize(recorder.ttfb),
+                "db_operations_per_interview": operations,
+                "interview_reads_per_interview": round(sum(v for op, v in operations.items()
+                                                           if op.startswith(("Interview.select", "rpc.answer"))), 2),
+            }
+    return report
+
+
+async def benchResumes(args) -> dict:
+    """Upload throughput of generated PDF resumes, extracting in the process pool vs on the event loop."""
+    from loadtest import Recorder, call, install
+    import main
+
+    app = install(argparse.Namespace(db_latency=args.latency, llm_latency=0.3, token_rate=80.0,
+                                     output_tokens=60, error_rate=0.0))
+    main.extractionPool.workers = args.workers
+    count = args.rounds * 10
+    pdfs = [samplePdf(sampleResume(i) * 8) for i in range(2 * count)]
+    recorder = Recorder()
+    report = {"files": count, "avg_kib": round(sum(map(len, pdfs)) / len(pdfs) / 1024, 1),
+              "workers": args.workers, "concurrency": args.concurrency}
+    async with app.router.lifespan_context(app):
+        await call(app, recorder, "signup", "POST", "/signup",
+                   json_body={"username": "upload", "email": "upload@example.com", "password": "upload-password"})
+        _, _, body = await call(app, recorder, "login", "POST", "/login",
+                                form={"username": "upload@example.com", "password": "upload-password"})
+        headers = {"Authorization": f"Bearer {json.loads(body)['access_token']}", "Content-Type": "application/pdf"}
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def upload(label: str, pdf: bytes):
+            async with semaphore:
+                status, _, _ = await call(app, recorder, label, "POST", "/resumes/upload",
+                                          headers=dict(headers, **{"Content-Length": str(len(pdf))}), content=pdf)
+                return status
+
+        await upload("warmup", samplePdf(sampleResume(-1)))  # start the pool's processes
+        run = main.extractionPool.run
+
+        async def inline(fn, *fnArgs):
+            return fn(*fnArgs)
+
+        for name, batch, runner in (("process_pool", pdfs[:count], run), ("event_loop", pdfs[count:], inline),
+                                    ("duplicates", pdfs[:count], run)):
+            main.extractionPool.run = runner
+            stop = asyncio.Event()
+            lag = asyncio.create_task(measureLoopLag(stop))
+            start = time.perf_counter()
+            statuses = await asyncio.gather(*(upload(name, pdf) for pdf in batch))
+            elapsed = time.perf_counter() - start
+            stop.set()
+            report[name] = {"ok": statuses.count(200), "wall_s": round(elapsed, 3),
+                            "files_per_s": round(len(batch) / elapsed, 1),
+                            "mib_per_s": round(sum(map(len, batch)) / elapsed / 2 ** 20, 2),
+                            "latency": summarize(recorder.latency[name]), "loop_lag": summarize(await lag)}
+        main.extractionPool.run = run
+    return report
+
+
+BENCHMARKS = {
+    "dbpool": benchDbPool,
+    "hashing": benchHashing,
+    "auth": benchAuth,
+    "ratelimit": benchRateLimit,
+    "reviews": benchReviews,
+    "answers": benchAnswers,
+    "listing": benchListing,
+    "prep": benchPrep,
+    "metrics": benchMetrics,
+    "startup": benchStartup,
+    "streaming": benchStreaming,
+    "hedging": benchHedging,
+    "questions": benchQuestions,
+    "bulk": benchBulk,
+    "dedupe": benchDedupe,
+    "session": benchSession,
+    "resumes": benchResumes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated round-trip seconds")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--corpus", help="directory of .txt resumes for the prep benchmark")
+    parser.add_argument("--jd", help="job description file for the prep benchmark")
+    parser.add_argument("--budget", type=int, default=1000, help="token budget for the prep benchmark")
+    parser.add_argument("--overhead-budget", type=float, default=5.0,
+                        help="microseconds allowed per metric observation (10x per request)")
+    parser.add_argument("--timeout", type=float, default=15.0, help="seconds to wait for readiness in startup")
+    args = parser.parse_args()
+    report = asyncio.run(BENCHMARKS[args.benchmark](args))
+    print(json.dumps({"benchmark": args.benchmark, **report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+class LRUCache:
+    """Bounded in-process LRU map whose entries may carry an absolute expiry.
+
+    Not thread-safe: it is only touched from the event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expiresAt, value = entry
+        if expiresAt is not None and expiresAt <= time.time():
+            del self.data[key]
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, expiresAt: Optional[float] = None) -> None:
+        if expiresAt is None and self.ttl is not None:
+            expiresAt = time.time() + self.ttl
+        self.data[key] = (expiresAt, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self.data.clear()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class SqliteCache:
+    """Persistent JSON cache in a SQLite file, shared by workers on a host.
+
+    Entries expire after ``ttl`` seconds; once more than ``maxEntries`` are
+    stored the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str, ttl: float, maxEntries: int):
+        self.path = path
+        self.ttl = ttl
+        self.maxEntries = maxEntries
+        self.local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Any:
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + self.ttl, now),
+        )
+        conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.maxEntries,),
+        )
+
+
+class TieredCache:
+    """In-memory LRU in front of an optional persistent tier, with hit/miss counters."""
+
+    def __init__(self, memory: LRUCache, persistent: Optional[SqliteCache] = None):
+        self.memory = memory
+        self.persistent = persistent
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Any:
+        value = self.memory.get(key)
+        if value is None and self.persistent is not None:
+            value = await asyncio.to_thread(self.persistent.get, key)
+            if value is not None:
+                self.memory.set(key, value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            await asyncio.to_thread(self.persistent.set, key, value)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
@@ -1,7 +1,5 @@
 from dotenv import load_dotenv
 import os
-import logging
-from supabase import create_client
 
 load_dotenv()
 
@@ -37,7 +35,149 @@ except ValueError:
 JWT_REFRESH_SECRET = os.getenv("JWT_REFRESH_SECRET")
 
 try:
-    DB = create_client(supabase_url=SUPABASE_URL, supabase_key=SUPABASE_API_KEY)
-except Exception as e:
-    logging.error(f"Failed to initialize Supabase client: {e}")
-    raise
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "16"))
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+    HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "64"))
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+    QUESTION_CACHE_SIZE = int(os.getenv("QUESTION_CACHE_SIZE", "1024"))
+    QUESTION_CACHE_TTL = int(os.getenv("QUESTION_CACHE_TTL", str(7 * 24 * 3600)))
+    QUESTION_CACHE_MAX_ENTRIES = int(os.getenv("QUESTION_CACHE_MAX_ENTRIES", "50000"))
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "2048"))
+    RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(30 * 24 * 3600)))
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "20000"))
+    REVIEW_WORKERS = int(os.getenv("REVIEW_WORKERS", "4"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+    LLM_RETRY_AFTER = int(os.getenv("LLM_RETRY_AFTER", "2"))
+    PROMPT_RESUME_TOKEN_BUDGET = int(os.getenv("PROMPT_RESUME_TOKEN_BUDGET", "1500"))
+    PROMPT_JD_TOKEN_BUDGET = int(os.getenv("PROMPT_JD_TOKEN_BUDGET", "1000"))
+    ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "50"))
+except ValueError:
+    raise ValueError("Numeric tuning variables (DB_POOL_SIZE, HASH_*, TOKEN_CACHE_SIZE, RATE_LIMIT_PER_MINUTE, QUESTION_CACHE_*, RESULT_CACHE_*, REVIEW_WORKERS, LLM_*, PROMPT_*_TOKEN_BUDGET, ROUTER_WINDOW) must be integers")
+
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")
+if HASH_EXECUTOR not in ("thread", "process"):
+    raise ValueError("HASH_EXECUTOR must be 'thread' or 'process'")
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+if RATE_LIMIT_BACKEND not in ("memory", "sqlite", "redis"):
+    raise ValueError("RATE_LIMIT_BACKEND must be 'memory', 'sqlite' or 'redis'")
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "/tmp/tili-ratelimit.sqlite3")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+try:
+    FEEDBACK_FLUSH_CHARS = int(os.getenv("FEEDBACK_FLUSH_CHARS", "200"))
+    FEEDBACK_FLUSH_INTERVAL = float(os.getenv("FEEDBACK_FLUSH_INTERVAL", "1.0"))
+    FEEDBACK_STALE_AFTER = float(os.getenv("FEEDBACK_STALE_AFTER", "30"))
+    FEEDBACK_COALESCE_CHARS = int(os.getenv("FEEDBACK_COALESCE_CHARS", "64"))
+    FEEDBACK_COALESCE_INTERVAL = float(os.getenv("FEEDBACK_COALESCE_INTERVAL", "0.05"))
+    FEEDBACK_HEARTBEAT = float(os.getenv("FEEDBACK_HEARTBEAT", "15"))
+    FEEDBACK_ABANDON_GRACE = float(os.getenv("FEEDBACK_ABANDON_GRACE", "10"))
+    SLOW_CONSUMER_TIMEOUT = float(os.getenv("SLOW_CONSUMER_TIMEOUT", "30"))
+except ValueError:
+    raise ValueError("FEEDBACK_* settings and SLOW_CONSUMER_TIMEOUT must be numbers")
+
+try:
+    ROUTER_MAX_TTFT = float(os.getenv("ROUTER_MAX_TTFT", "3.0"))
+    ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.2"))
+    ROUTER_HORIZON = float(os.getenv("ROUTER_HORIZON", "120"))
+    FIRST_TOKEN_TIMEOUT = float(os.getenv("FIRST_TOKEN_TIMEOUT", "8.0"))
+except ValueError:
+    raise ValueError("ROUTER_MAX_TTFT, ROUTER_MAX_ERROR_RATE, ROUTER_HORIZON and FIRST_TOKEN_TIMEOUT must be numbers")
+
+# Seconds each kind of request may spend on model calls, end to end.
+try:
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+    DEADLINE_QUESTIONS = float(os.getenv("DEADLINE_QUESTIONS", "90"))
+    DEADLINE_FEEDBACK = float(os.getenv("DEADLINE_FEEDBACK", "60"))
+    DEADLINE_REVIEWS = float(os.getenv("DEADLINE_REVIEWS", "180"))
+    # How long a worker's claim on an interview's reviews holds off the others.
+    REVIEW_LEASE = float(os.getenv("REVIEW_LEASE", str(DEADLINE_REVIEWS * 2)))
+    BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "5"))
+    BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))
+    REVIEW_RETRY_AFTER = float(os.getenv("REVIEW_RETRY_AFTER", str(BREAKER_COOLDOWN)))
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    QUESTION_WAIT = float(os.getenv("QUESTION_WAIT", "15"))
+    DEADLINE_BULK = float(os.getenv("DEADLINE_BULK", "600"))
+except ValueError:
+    raise ValueError("LLM_TIMEOUT, DEADLINE_*, REVIEW_LEASE, REVIEW_RETRY_AFTER, BREAKER_*, HEDGE_MIN_SAMPLES and QUESTION_WAIT must be numbers")
+
+# Near-duplicate answers reuse stored feedback/reviews; ANSWER_INDEX_MAX_ENTRIES=0 disables it.
+try:
+    ANSWER_INDEX_THRESHOLD = float(os.getenv("ANSWER_INDEX_THRESHOLD", "0.9"))
+    ANSWER_INDEX_MAX_ENTRIES = int(os.getenv("ANSWER_INDEX_MAX_ENTRIES", "50000"))
+    ANSWER_INDEX_TTL = float(os.getenv("ANSWER_INDEX_TTL", str(7 * 24 * 3600)))
+    ANSWER_INDEX_PERMUTATIONS = int(os.getenv("ANSWER_INDEX_PERMUTATIONS", "64"))
+    ANSWER_INDEX_BANDS = int(os.getenv("ANSWER_INDEX_BANDS", "16"))
+except ValueError:
+    raise ValueError("ANSWER_INDEX_* settings must be numbers")
+
+try:
+    WS_AUTH_TIMEOUT = float(os.getenv("WS_AUTH_TIMEOUT", "10"))
+    WS_FLUSH_ANSWERS = int(os.getenv("WS_FLUSH_ANSWERS", "3"))
+    WS_FLUSH_INTERVAL = float(os.getenv("WS_FLUSH_INTERVAL", "10"))
+except ValueError:
+    raise ValueError("WS_AUTH_TIMEOUT, WS_FLUSH_ANSWERS and WS_FLUSH_INTERVAL must be numbers")
+
+try:
+    RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+    RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", str(os.cpu_count() or 1)))
+    RESUME_QUEUE_LIMIT = int(os.getenv("RESUME_QUEUE_LIMIT", "32"))
+except ValueError:
+    raise ValueError("RESUME_MAX_BYTES, RESUME_WORKERS and RESUME_QUEUE_LIMIT must be integers")
+# Uploads are spooled here only while their text is extracted.
+RESUME_UPLOAD_DIR = os.getenv("RESUME_UPLOAD_DIR", "") or None
+
+try:
+    BULK_MAX_RESUMES = int(os.getenv("BULK_MAX_RESUMES", "200"))
+    BULK_INSERT_BATCH = int(os.getenv("BULK_INSERT_BATCH", "25"))
+    BULK_FLUSH_INTERVAL = float(os.getenv("BULK_FLUSH_INTERVAL", "1.0"))
+    # A quarter of the scheduler slots, so bulk work never holds the slots or
+    # the rate limiter's queue that live feedback needs.
+    BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", str(max(1, LLM_MAX_CONCURRENCY // 4))))
+except ValueError:
+    raise ValueError("BULK_MAX_RESUMES, BULK_INSERT_BATCH, BULK_FLUSH_INTERVAL and BULK_CONCURRENCY must be numbers")
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes")
+
+TOGETHER_API_BASE = os.getenv("TOGETHER_API_BASE", "https://api.together.xyz/v1")
+
+try:
+    DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "30"))
+    WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "10"))
+    WARMUP_RETRY_INTERVAL = float(os.getenv("WARMUP_RETRY_INTERVAL", "5"))
+except ValueError:
+    raise ValueError("DB_TIMEOUT, WARMUP_TIMEOUT and WARMUP_RETRY_INTERVAL must be numbers")
+
+# Model tier per task: primary first, then fallbacks, comma separated.
+LARGE_MODEL = "meta-llama/Llama-3.3-70B-Instruct-Turbo"
+SMALL_MODEL = "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo"
+MODEL_TIERS = {
+    task: [m.strip() for m in os.getenv(var, default).split(",") if m.strip()]
+    for task, var, default in (
+        ("questions", "MODEL_QUESTIONS", f"{LARGE_MODEL},{SMALL_MODEL}"),
+        ("feedback", "MODEL_FEEDBACK", f"{SMALL_MODEL},{LARGE_MODEL}"),
+        ("review", "MODEL_REVIEW", f"{LARGE_MODEL},{SMALL_MODEL}"),
+    )
+}
+if not all(MODEL_TIERS.values()):
+    raise ValueError("MODEL_QUESTIONS, MODEL_FEEDBACK and MODEL_REVIEW need at least one model each")
+
+REVIEW_MODE = os.getenv("REVIEW_MODE", "per_question")
+if REVIEW_MODE not in ("per_question", "batched"):
+    raise ValueError("REVIEW_MODE must be 'per_question' or 'batched'")
+
+# Set to an empty string to keep generated questions in memory only.
+QUESTION_CACHE_PATH = os.getenv("QUESTION_CACHE_PATH", "/tmp/tili-questions.sqlite3")
+# Off by default: a file shared by deployments on one host would serve one
+# database's reviews for another's interview ids.
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "")
+
+# e.g. "createQuestions=3,createResponse=1,createReviews=1"
+try:
+    RATE_LIMIT_WEIGHTS = {
+        name.strip(): float(weight)
+        for name, weight in (item.split("=") for item in os.getenv("RATE_LIMIT_WEIGHTS", "").split(",") if item.strip())
+    }
+except ValueError:
+    raise ValueError("RATE_LIMIT_WEIGHTS must look like 'createQuestions=3,createResponse=1'")
@@ -0,0 +1,46 @@
+"""Per-request deadlines carried in a context variable.
+
+A handler opens ``deadline(seconds)``; every model call below it, including
+background tasks created inside it, is bounded by the time that is left.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time; not retried, unlike TimeoutError."""
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Bound the enclosed work to ``seconds``, or less if an outer deadline is sooner."""
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def budget(limit: Optional[float] = None) -> Optional[float]:
+    """Timeout for the next call: ``limit`` capped by the deadline.
+
+    Raises DeadlineExceeded when no time is left.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    if left is None:
+        return limit
+    return left if limit is None else min(left, limit)
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import math
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from config import DEADLINE_QUESTIONS, REVIEW_WORKERS, DEADLINE_REVIEWS, REVIEW_LEASE, REVIEW_RETRY_AFTER, WARMUP_RETRY_INTERVAL
+from deadlines import deadline
+from models import InterviewData, interviewQuestions
+from repository import repo
+from together import createReviews, transient
+
+logger = logging.getLogger(__name__)
+
+class ReviewJobs:
+    """In-process queue that generates interview reviews in the background.
+
+    Each interview id is queued at most once at a time; GET /result only
+    enqueues and reports status, it never waits on the model. The queue
+    lives in memory, so ``start`` re-queues every fully answered interview
+    that still has no reviews, including any a previous process lost.
+    Every app worker has its own queue; a job only calls the model after
+    claiming the interview in the database, so each is reviewed once.
+    A job that fails on an outage or deadline saves nothing and is
+    retried after ``REVIEW_RETRY_AFTER`` seconds (or the breaker's cooldown).
+    """
+
+    def __init__(self, workers: int = REVIEW_WORKERS):
+        self.workers = workers
+        self.queue: Optional[asyncio.Queue] = None
+        self.status: Dict[str, str] = {}
+        self.tasks: List[asyncio.Task] = []
+        self.retries: Dict[str, asyncio.TimerHandle] = {}
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self.recover()))
+
+    async def stop(self):
+        for handle in self.retries.values():
+            handle.cancel()
+        self.retries = {}
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def recover(self):
+        """Queue reviews for interviews that were answered but never reviewed."""
+        while True:
+            try:
+                ids = await repo.listUnreviewedInterviews()
+                break
+            except Exception as e:
+                logger.warning(f"Could not list unreviewed interviews, retrying: {str(e)}")
+                await asyncio.sleep(WARMUP_RETRY_INTERVAL)
+        for id in ids:
+            self.enqueue(id)
+        if ids:
+            logger.info(f"Re-queued reviews for {len(ids)} interviews")
+
+    def enqueue(self, id: str) -> str:
+        """Queue review generation for ``id`` unless it is already pending or waiting to retry."""
+        id = str(id)
+        if self.status.get(id) in ("pending", "retrying"):
+            return self.status[id]
+        self.status[id] = "pending"
+        self.queue.put_nowait(id)
+        return "pending"
+
+    def retryAfter(self, id: str) -> int:
+        """Seconds until a job in ``retrying`` is queued again."""
+        handle = self.retries.get(str(id))
+        if handle is None:
+            return 0
+        return max(1, math.ceil(handle.when() - asyncio.get_running_loop().time()))
+
+    def _retry(self, id: str):
+        self.retries.pop(id, None)
+        self.status[id] = "pending"
+        self.queue.put_nowait(id)
+
+    async def _worker(self):
+        while True:
+            id = await self.queue.get()
+            try:
+                await self.process(id)
+                self.status.pop(id, None)
+            except Exception as e:
+                if transient(e):
+                    delay = getattr(e, "retryAfter", None) or REVIEW_RETRY_AFTER
+                    self.status[id] = "retrying"
+                    self.retries[id] = asyncio.get_running_loop().call_later(delay, self._retry, id)
+                    logger.warning(f"Review job for interview {id} will retry in {delay:.0f}s: {type(e).__name__}: {str(e)}")
+                else:
+                    self.status[id] = "failed"
+                    logger.error(f"Review job for interview {id} failed: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    async def process(self, id: str):
+        interview = await repo.getInterview(id, 'questions', 'reviews', 'generating')
+        if not interview or interview.get('reviews') is not None:
+            return
+        if interview.get('generating'):
+            # Re-queued by QuestionJobs once the last question is stored.
+            return
+        if not await repo.claimReview(id, REVIEW_LEASE):
+            return
+        questions_arr = (interview.get('questions') or {}).get('data', [])
+        input_data = InterviewData(data=[interviewQuestions(**q) for q in questions_arr])
+        try:
+            with deadline(DEADLINE_REVIEWS):
+                review_results = await createReviews(input_data)
+        except Exception:
+            await repo.releaseReview(id)
+            raise
+        await repo.saveReviews(id, [result.model_dump() for result in review_results])
+
+
+class QuestionJobs:
+    """Appends the rest of an interview's questions while the model writes them.
+
+    The interview row exists as soon as the first question does; each later
+    question is stored as it arrives, and the row stops ``generating`` when
+    the stream ends, however it ends. The final write is retried, and
+    ``start`` clears ``generating`` on rows whose generation cannot still
+    be running (older than DEADLINE_QUESTIONS), e.g. after a crash.
+    """
+
+    def __init__(self, finishAttempts: int = 3):
+        self.finishAttempts = finishAttempts
+        self.tasks: Set[asyncio.Task] = set()
+
+    def start(self):
+        self.tasks = set()
+        self._track(asyncio.create_task(self.recover()))
+
+    def _track(self, task: asyncio.Task) -> asyncio.Task:
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def recover(self):
+        """Finish interviews whose generation died with a previous process."""
+        while True:
+            try:
+                rows = await repo.finishStaleGenerating(DEADLINE_QUESTIONS)
+                break
+            except Exception as e:
+                logger.warning(f"Could not clear stale generating interviews, retrying: {str(e)}")
+                await asyncio.sleep(WARMUP_RETRY_INTERVAL)
+        for row in rows:
+            if row.get('reviews') is None and (row.get('answered_count') or 0) >= (row.get('question_count') or 0) > 0:
+                reviewJobs.enqueue(row['id'])
+        if rows:
+            logger.info(f"Finished {len(rows)} interviews left generating")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = set()
+
+    def append(self, id: str, questions: AsyncIterator[str]) -> asyncio.Task:
+        """Store the remaining ``questions`` of interview ``id`` in the background."""
+        return self._track(asyncio.create_task(self._append(str(id), questions)))
+
+    async def _finish(self, id: str) -> Optional[dict]:
+        """Mark generation done, retrying so the row is not left ``generating``."""
+        for attempt in range(self.finishAttempts):
+            try:
+                return await repo.appendQuestions(id, [], done=True)
+            except Exception as e:
+                logger.warning(f"Finishing question generation for interview {id} failed: {str(e)}")
+                if attempt + 1 < self.finishAttempts:
+                    await asyncio.sleep(2 ** attempt)
+        logger.error(f"Interview {id} is left generating until the next startup")
+        return None
+
+    async def _append(self, id: str, questions: AsyncIterator[str]):
+        count = 0
+        try:
+            async for question in questions:
+                await repo.appendQuestions(id, [question], done=False)
+                count += 1
+        except Exception as e:
+            logger.error(f"Question generation for interview {id} stopped after {count + 1} questions: {str(e)}")
+        finally:
+            result = await self._finish(id)
+            if (result or {}).get('remaining') == 0:
+                reviewJobs.enqueue(id)
+
+
+reviewJobs = ReviewJobs()
+questionJobs = QuestionJobs()
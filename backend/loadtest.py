@@ -0,0 +1,320 @@
+"""End-to-end load test of the FastAPI app against local stand-ins.
+
+Each virtual user runs the full flow: signup, login, createInterview, every
+answer with its streamed feedback (fetching the next question when it was
+still being generated), then polls for the result. With ``--transport
+websocket`` the questions and answers go over one interview session socket
+instead. Each answer's round trip, up to its feedback and the next
+question, is reported as ``turn``. Supabase is
+replaced by ``InMemorySupabase`` and every model by ``FakeChatModel``, so no
+credentials or network are needed. Requests are driven straight through the
+ASGI interface in-process (no uvicorn/TCP), which lets us time the first
+streamed body chunk.
+
+    python loadtest.py --users 50 --concurrency 10 --llm-latency 0.3 --output report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlencode
+
+import benchmarks  # noqa: F401  loads .env and sets placeholder credentials
+from benchmarks import summarize
+
+
+class Recorder:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.ttfb: List[float] = []
+        self.requests = 0
+
+
+async def call(app, recorder: Recorder, label: str, method: str, path: str, headers: Optional[dict] = None,
+               json_body=None, form: Optional[dict] = None, content: Optional[bytes] = None) -> Tuple[int, dict, bytes]:
+    """Run one request through ``app`` and record its latency under ``label``."""
+    headers = dict(headers or {})
+    body = content or b""
+    if json_body is not None:
+        body = json.dumps(json_body).encode()
+        headers["content-type"] = "application/json"
+    elif form is not None:
+        body = urlencode(form).encode()
+        headers["content-type"] = "application/x-www-form-urlencoded"
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "server": ("loadtest", 80), "client": ("127.0.0.1", 0),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    sent = False
+    status, respHeaders, chunks = 0, {}, []
+    start = time.perf_counter()
+    firstByte: Optional[float] = None
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status, respHeaders, firstByte
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            respHeaders = {k.decode().lower(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if firstByte is None:
+                firstByte = time.perf_counter() - start
+            chunks.append(message["body"])
+
+    await app(scope, receive, send)
+    recorder.requests += 1
+    recorder.latency[label].append(time.perf_counter() - start)
+    if status >= 400:
+        recorder.errors[label][status] += 1
+    if label == "answer" and firstByte is not None:
+        recorder.ttfb.append(firstByte)
+    return status, respHeaders, b"".join(chunks)
+
+
+class WebSocketClient:
+    """Minimal in-process ASGI WebSocket client speaking JSON messages."""
+
+    def __init__(self, app, path: str):
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        scope = {
+            "type": "websocket", "asgi": {"version": "3.0"}, "http_version": "1.1", "scheme": "ws",
+            "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+            "server": ("loadtest", 80), "client": ("127.0.0.1", 0), "headers": [], "subprotocols": [],
+        }
+        self.task = asyncio.create_task(app(scope, self.inbox.get, self.outbox.put))
+
+    async def connect(self):
+        await self.inbox.put({"type": "websocket.connect"})
+        message = await self.outbox.get()
+        if message["type"] != "websocket.accept":
+            raise RuntimeError(f"websocket rejected: {message}")
+
+    async def send(self, data: dict):
+        await self.inbox.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive(self) -> dict:
+        message = await self.outbox.get()
+        if message["type"] == "websocket.close":
+            raise RuntimeError(f"websocket closed: {message.get('code')} {message.get('reason')}")
+        return json.loads(message.get("text") or message["bytes"])
+
+    async def close(self):
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+
+async def sessionFlow(app, recorder: Recorder, username: str, id, token: str, args) -> bool:
+    """Answer every question over one WebSocket session."""
+    socket = WebSocketClient(app, f"/ws/interview/{username}/{id}")
+    await socket.connect()
+    try:
+        await socket.send({"type": "auth", "token": token})
+        message = await socket.receive()
+        while message["type"] != "done":
+            if message["type"] == "generating":
+                await asyncio.sleep(message.get("retry_after", 1))
+                await socket.send({"type": "next"})
+                message = await socket.receive()
+                continue
+            if message["type"] != "question":
+                return False
+            index = message["question_index"]
+            start = time.perf_counter()
+            await socket.send({"type": "answer", "answerData": f"My answer to question {index}. " * 8,
+                               "answerNum": index - 1, "question": message["question"]})
+            first = True
+            while True:
+                message = await socket.receive()
+                if message["type"] == "feedback" and first:
+                    recorder.ttfb.append(time.perf_counter() - start)
+                    first = False
+                elif message["type"] == "error":
+                    recorder.errors["answer"][message["status"]] += 1
+                    return False
+                elif message["type"] not in ("feedback", "feedback_end", "ping"):
+                    break
+            recorder.requests += 1
+            recorder.latency["turn"].append(time.perf_counter() - start)
+            await asyncio.sleep(args.think_time)
+        return True
+    finally:
+        await socket.close()
+
+
+async def userFlow(app, recorder: Recorder, n: int, args) -> bool:
+    username, email, password = f"load{n}", f"load{n}@example.com", "load-test-password"
+    status, _, _ = await call(app, recorder, "signup", "POST", "/signup",
+                              json_body={"username": username, "email": email, "password": password})
+    if status != 200:
+        return False
+    status, _, body = await call(app, recorder, "login", "POST", "/login",
+                                 form={"username": email, "password": password})
+    if status != 200:
+        return False
+    token = json.loads(body)['access_token']
+    auth = {"Authorization": f"Bearer {token}"}
+
+    interview = {
+        "user_data": f"Candidate {n}\nExperience\nBuilt Python services with FastAPI and PostgreSQL. " * 5,
+        "job_description": "Backend engineer. Requirements: Python, FastAPI, PostgreSQL, Kubernetes.",
+        "job_name": f"Backend engineer {n}",
+    }
+    status, _, body = await call(app, recorder, "createInterview", "POST", f"/createInterview/{username}",
+                                 headers=auth, json_body=interview)
+    if status != 200:
+        return False
+    id = json.loads(body)["interview_id"]
+
+    if args.transport == "websocket":
+        answered = await sessionFlow(app, recorder, username, id, token, args)
+    else:
+        answered = await restFlow(app, recorder, username, id, auth, args)
+    return answered and await awaitResult(app, recorder, username, id, auth, args)
+
+
+async def restFlow(app, recorder: Recorder, username: str, id, auth: dict, args) -> bool:
+    """Answer every question with one REST call each, as the web client does."""
+    async def fetchQuestion():
+        # Questions after the first are still being generated: 202 means retry.
+        while True:
+            status, headers, body = await call(app, recorder, "question", "GET",
+                                               f"/interviews/question/{username}/{id}", headers=auth)
+            if status != 202:
+                break
+            await asyncio.sleep(float(headers.get("retry-after", 1)))
+        if status != 200:
+            raise RuntimeError(f"question fetch failed with {status}")
+        current = json.loads(body)
+        return current.get("question"), current.get("question_index")
+
+    question, index = await fetchQuestion()
+    while question is not None:
+        answer = {"answerData": f"My answer to question {index}. " * 8, "answerNum": index - 1, "question": question}
+        start = time.perf_counter()
+        status, headers, _ = await call(app, recorder, "answer", "POST", f"/interviews/answer/{username}/{id}",
+                                        headers=auth, json_body=answer)
+        if status != 200:
+            return False
+        if headers.get("x-next-question-index", "done") == "done":
+            question = None
+        elif headers["x-next-question-index"] == "pending":
+            question, index = await fetchQuestion()
+        else:
+            question, index = unquote(headers["x-next-question"]), int(headers["x-next-question-index"])
+        recorder.latency["turn"].append(time.perf_counter() - start)
+        await asyncio.sleep(args.think_time)
+    return True
+
+
+async def awaitResult(app, recorder: Recorder, username: str, id, auth: dict, args) -> bool:
+    deadline = time.monotonic() + args.result_timeout
+    while time.monotonic() < deadline:
+        status, headers, _ = await call(app, recorder, "result", "GET", f"/result/{username}/{id}", headers=auth)
+        if status == 200:
+            return True
+        if status != 202:
+            return False
+        await asyncio.sleep(min(float(headers.get("retry-after", 1)), args.poll_interval))
+    return False
+
+
+def install(args):
+    """Point the app at the stand-ins and return it."""
+    import main
+    import together
+    from repository import repo
+    from standins import FakeChatModel, InMemorySupabase
+
+    repo.client = main.app.state.db = InMemorySupabase(latency=args.db_latency)
+    together.router.factory = lambda name: FakeChatModel(
+        name, latency=args.llm_latency, tokensPerSecond=args.token_rate, errorRate=args.error_rate,
+        outputTokens=args.output_tokens,
+    )
+    together.router.models.clear()
+    together.router.runnables.clear()
+    together.router.stats.clear()
+    return main.app
+
+
+async def run(args) -> dict:
+    app = install(args)
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    outcomes = []
+
+    async def limited(n: int):
+        async with semaphore:
+            try:
+                outcomes.append(await userFlow(app, recorder, n, args))
+            except Exception:
+                outcomes.append(False)
+
+    async with app.router.lifespan_context(app):
+        start = time.perf_counter()
+        await asyncio.gather(*(limited(n) for n in range(args.users)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "elapsed_s": round(elapsed, 3),
+        "flows_completed": sum(outcomes),
+        "flows_failed": len(outcomes) - sum(outcomes),
+        "flows_per_s": round(sum(outcomes) / elapsed, 3),
+        "requests_per_s": round(recorder.requests / elapsed, 3),
+        "endpoints": {label: summarize(samples) for label, samples in recorder.latency.items()},
+        "errors": {label: dict(codes) for label, codes in recorder.errors.items()},
+        "answer_stream_ttfb": summarize(recorder.ttfb),
+        "db_operations_per_flow": {op: round(n / max(1, len(outcomes)), 2)
+                                   for op, n in sorted(app.state.db.operations.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="number of full interview flows")
+    parser.add_argument("--concurrency", type=int, default=10, help="flows in flight at once")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake model time to first token (s)")
+    parser.add_argument("--token-rate", type=float, default=80.0, help="fake model tokens per second")
+    parser.add_argument("--output-tokens", type=int, default=60, help="tokens per fake completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of model calls that fail")
+    parser.add_argument("--db-latency", type=float, default=0.01, help="simulated Supabase round trip (s)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="pause between answers (s)")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="max wait between result polls (s)")
+    parser.add_argument("--result-timeout", type=float, default=60.0, help="give up on a result after (s)")
+    parser.add_argument("--rate-limit", type=int, default=100000,
+                        help="Together requests per minute; the real default would throttle the test")
+    parser.add_argument("--transport", choices=("rest", "websocket"), default="rest",
+                        help="answer over REST calls or one interview session socket")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    # Settings read at import time, so they must be in place before main is imported.
+    os.environ["RATE_LIMIT_PER_MINUTE"] = str(args.rate_limit)
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+    os.environ.setdefault("QUESTION_CACHE_PATH", "")
+    os.environ.setdefault("RESULT_CACHE_PATH", "")
+
+    report = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
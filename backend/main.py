@@ -1,18 +1,73 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from concurrent.futures import BrokenExecutor
+from typing import AsyncIterator, Optional
+import hashlib
+from urllib.parse import quote
+import json
 import logging
+import asyncio
+from config import WARMUP_TIMEOUT, WARMUP_RETRY_INTERVAL, DEADLINE_QUESTIONS, DEADLINE_FEEDBACK, QUESTION_WAIT
+from config import WS_AUTH_TIMEOUT
+from config import DEADLINE_BULK, BULK_MAX_RESUMES, BULK_INSERT_BATCH, BULK_FLUSH_INTERVAL, BULK_CONCURRENCY
+from config import SUPABASE_URL, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_PATH, RESULT_CACHE_MAX_ENTRIES
+from cache import LRUCache, SqliteCache, TieredCache
 from auth import AuthHandler
-from config import DB
-from models import UserInput, interviewFromData, Questions, Answer, InterviewData, interviewQuestions, ReviewResult
-from together import createQuestions, createResponse, createReviews
+from repository import repo
+from models import UserInput, Principal, interviewFromData, bulkInterviewData, Questions, Answer
+from together import createQuestions, cachedQuestions, streamQuestions, createResponse, router, startClients, stopClients, warmUp
+from jobs import reviewJobs, questionJobs
+from scheduler import scheduler, Priority
+from textprep import cleanJobDescription
+from similarity import answerIndex
+from sessions import InterviewSession
+from resumes import receiveUpload, extractText, extractionPool
+from streams import feedbackStreams, FeedbackResponse, wantsSse
+from metrics import registry, Gauge, MetricsMiddleware
+from deadlines import deadline, DeadlineExceeded
+from router import CircuitOpenError
+import math
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Readiness of each dependency: "pending", "ok" or the last warm-up error.
+readiness = {"database": "pending", "models": "pending"}
+
+async def warm_up(name: str, check):
+    """Retry ``check`` until it succeeds, recording the outcome for /readyz."""
+    while True:
+        try:
+            await asyncio.wait_for(check(), WARMUP_TIMEOUT)
+            readiness[name] = "ok"
+            return
+        except Exception as e:
+            readiness[name] = f"{type(e).__name__}: {str(e)}"
+            logger.warning(f"Warm-up of {name} failed, retrying: {readiness[name]}")
+        await asyncio.sleep(WARMUP_RETRY_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    repo.connect()
+    startClients()
+    reviewJobs.start()
+    questionJobs.start()
+    warmups = [asyncio.create_task(warm_up("database", repo.warmUp)),
+               asyncio.create_task(warm_up("models", warmUp))]
+    yield
+    for task in warmups:
+        task.cancel()
+    await questionJobs.stop()
+    await reviewJobs.stop()
+    await stopClients()
+    extractionPool.close()
+    repo.close()
+
+app = FastAPI(lifespan=lifespan)
 auth = AuthHandler()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
@@ -22,47 +77,121 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    expose_headers=['ETag', 'Retry-After', 'X-Next-Question', 'X-Next-Question-Index', 'X-Review-Status'],
 )
+app.add_middleware(MetricsMiddleware)
 
-def get_authenticated_user(token: str):
-    """Helper function to authenticate user and extract username."""
-    try:
-        payload = auth.decodeToken(token)
-        email, username = payload['sub'].split('+')
-        return email, username
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid token")
+registry.register(Gauge("tili_feedback_streams_in_flight", "Feedback streams still generating",
+                        lambda: len(feedbackStreams.live)))
+registry.register(Gauge("tili_llm_slots_active", "LLM scheduler slots in use", lambda: scheduler.active))
+registry.register(Gauge("tili_llm_queue_depth", "Requests waiting for an LLM slot", lambda: scheduler.queueDepth))
+registry.register(Gauge("tili_review_jobs_queued", "Review jobs waiting for a worker",
+                        lambda: reviewJobs.queue.qsize() if reviewJobs.queue else 0))
+
+async def current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """Dependency resolving the bearer token to the calling user."""
+    return auth.getPrincipal(token)
 
-def get_user_from_db(email: str):
+async def authorized_user(username: str, principal: Principal = Depends(current_user)) -> Principal:
+    """Dependency that additionally requires the caller to be ``username``."""
+    if principal.username != username:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return principal
+
+def etag_of(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_response(request: Request, content, cache_control: str = "private, no-cache",
+                  body: Optional[bytes] = None, etag: Optional[str] = None) -> Response:
+    """JSON response with a strong ETag; 304 when the client already has it.
+
+    Pass a pre-serialized ``body`` and its ``etag`` to skip re-encoding.
+    """
+    if body is None:
+        body = json.dumps(content, separators=(",", ":"), default=str).encode()
+    etag = etag or etag_of(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Finished reviews are write-once, so they are cached by database and
+# interview id with their owner and serialized body, and served without
+# touching the DB.
+resultCache = TieredCache(
+    LRUCache(RESULT_CACHE_SIZE),
+    SqliteCache(RESULT_CACHE_PATH, RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES) if RESULT_CACHE_PATH else None
+)
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+def result_key(id: str) -> str:
+    return f"{SUPABASE_URL}#{id}"
+
+async def get_owned_interview(id: str, principal: Principal, *columns: str) -> dict:
+    """Fetch an interview, requiring it to exist and belong to ``principal``."""
+    interview = await repo.getInterview(id, 'creator', *columns)
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    if interview.get('creator') != principal.username:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return interview
+
+def upstream_error(e: Exception) -> HTTPException:
+    """Map model-provider failures to 503 (breaker open) or 504 (deadline)."""
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retryAfter))})
+    return HTTPException(status_code=504, detail=str(e))
+
+async def get_user_from_db(email: str):
     """Fetch user details from database."""
-    user = DB.table("User").select("*").eq("Email", email).execute()
-    if not user.data:
+    user = await repo.getUserByEmail(email)
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    return user.data[0]
+    return user
 
 @app.get("/")
 async def main():
     return {"message": "TILI API"}
 
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """200 once the database and model connections are warm, 503 until then."""
+    ready = all(state == "ok" for state in readiness.values())
+    return JSONResponse(status_code=200 if ready else 503,
+                        content={"status": "ready" if ready else "starting", "checks": readiness})
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    return {"scheduler": scheduler.stats(), "router": router.snapshot(), "answer_index": answerIndex.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/signup")
 async def signup(user: UserInput):
     try:
-        hashed_password = auth.getPwdHash(user.password)
+        hashed_password = await auth.getPwdHashAsync(user.password)
         new_user = {"username": user.username, "Email": user.email, "hashed_pwd": hashed_password}
-        response = DB.table('User').insert(new_user).execute()
-        if hasattr(response, 'data'):
-            user_data = response.data[0]
+        user_data = await repo.createUser(new_user)
+        if user_data:
             return {"message": "User created successfully", "user_data": user_data}
         else:
             raise Exception("Unexpected response format from the database.")
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Signup error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/login")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user_data = get_user_from_db(form_data.username)
-    if not auth.verifyPwd(form_data.password, user_data["hashed_pwd"]):
+    user_data = await get_user_from_db(form_data.username)
+    if not await auth.verifyPwdAsync(form_data.password, user_data["hashed_pwd"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     access_token = auth.createAccessToken({"sub": f'{user_data["Email"]}+{user_data["username"]}'})
@@ -76,69 +205,218 @@ async def refresh_token(refresh_token: str):
     return {"access_token": new_access_token, "token_type": "bearer"}
 
 @app.get("/interviews/{username}")
-async def get_interviews(username: str, token: str = Depends(oauth2_scheme)):
-    _, auth_username = get_authenticated_user(token)
-    if auth_username != username:
-        raise HTTPException(status_code=403, detail="Access denied")
+async def get_interviews(
+    username: str,
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    principal: Principal = Depends(authorized_user)
+):
+    try:
+        before = int(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     try:
-        interviews = DB.table("Interview").select("*").eq("creator", username).execute()
-        if not interviews.data:
+        interviews = await repo.listInterviewSummaries(username, limit, before)
+        if not interviews and before is None:
             raise HTTPException(status_code=404, detail="No interviews found for this user.")
-        return {"username": username, "interviews": interviews.data}
+        next_cursor = str(interviews[-1]["id"]) if len(interviews) == limit else None
+        return etag_response(request, {"username": username, "interviews": interviews, "next_cursor": next_cursor})
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Error fetching interviews: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+@app.post("/resumes/{username}")
+async def uploadResume(request: Request, username: str, principal: Principal = Depends(authorized_user)):
+    """Store an uploaded resume's text for use in createInterview via ``resume_id``.
+
+    The body is the raw PDF or text file. Identical uploads by the same
+    user return the stored resume without extracting it again.
+    """
+    upload = await receiveUpload(request)
+    try:
+        existing = await repo.getResumeByHash(username, upload.digest)
+        if existing:
+            return {"resume_id": existing['id'], "duplicate": True, "pages": existing.get('pages'),
+                    "characters": existing.get('characters')}
+        extracted = await extractionPool.run(extractText, upload.path, upload.kind)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except BrokenExecutor:
+        # The file crashed its extraction worker; the pool restarts for the next upload.
+        raise HTTPException(status_code=422, detail="Could not read this file")
+    finally:
+        await upload.discard()
+    if not extracted['text']:
+        raise HTTPException(status_code=422, detail="No text found in the resume")
+    resume = await repo.saveResume({"creator": username, "content_hash": upload.digest, "text": extracted['text'],
+                                    "pages": extracted['pages'], "characters": len(extracted['text']),
+                                    "bytes": upload.size})
+    if not resume:
+        raise HTTPException(status_code=500, detail="Failed to store resume")
+    return {"resume_id": resume['id'], "duplicate": False, "pages": extracted['pages'],
+            "characters": len(extracted['text'])}
+
 @app.post("/createInterview/{username}")
-async def createInterview(username: str, interviewData: interviewFromData, token: str = Depends(oauth2_scheme)):
-    _, auth_username = get_authenticated_user(token)
-    if auth_username != username:
-        raise HTTPException(status_code=403, detail="Access denied")
+async def createInterview(username: str, interviewData: interviewFromData, principal: Principal = Depends(authorized_user)):
     try:
-        questions: Questions = await createQuestions(resumeText=interviewData.user_data, JobDescription=interviewData.job_description)
-        questionData = {"data": [{"question": q, "answer": None} for q in questions.questions]}
-        
-        data = {"user_data": interviewData.user_data, "job_description": interviewData.job_description, "creator": username, "job_name": interviewData.job_name, "questions": questionData}
-        logger.info(f"Creating interview for {username}")
-        response = DB.table('Interview').insert(data).execute()
-        
-        if hasattr(response, 'data') and response.data:
-            return {"message": "Interview created successfully", "interview_id": response.data[0].get('id')}
-        else:
+        if interviewData.resume_id is not None:
+            resume = await repo.getResume(interviewData.resume_id, 'creator', 'text')
+            if not resume or resume.get('creator') != username:
+                raise HTTPException(status_code=404, detail="Resume not found")
+            interviewData.user_data = resume['text']
+        row = {"user_data": interviewData.user_data, "job_description": interviewData.job_description, "creator": username, "job_name": interviewData.job_name}
+
+        # A cached question set is stored whole, in one write.
+        cached = await cachedQuestions(interviewData.user_data, interviewData.job_description)
+        if cached:
+            logger.info(f"Creating interview for {username} from cached questions")
+            interview = await repo.createInterview({**row, "questions": {"data": [{"question": q, "answer": None} for q in cached]},
+                                                    "question_count": len(cached), "next_index": 0, "next_question": cached[0], "generating": False})
+            if interview:
+                return {"message": "Interview created successfully", "interview_id": interview.get('id')}
             raise Exception("Unexpected database response format.")
+
+        # Otherwise the interview is stored with its first question; the rest
+        # are appended in the background, still under this deadline.
+        with deadline(DEADLINE_QUESTIONS):
+            questions = streamQuestions(resumeText=interviewData.user_data, JobDescription=interviewData.job_description)
+            first = await anext(questions, None)
+            if first is None:
+                raise Exception("No questions were generated.")
+            data = {**row, "questions": {"data": [{"question": first, "answer": None}]},
+                    "question_count": 1, "next_index": 0, "next_question": first, "generating": True}
+            logger.info(f"Creating interview for {username}")
+            try:
+                interview = await repo.createInterview(data)
+            except BaseException:
+                await questions.aclose()
+                raise
+
+            if interview:
+                questionJobs.append(interview.get('id'), questions)
+                return {"message": "Interview created successfully", "interview_id": interview.get('id')}
+            await questions.aclose()
+        raise Exception("Unexpected database response format.")
+    except HTTPException as he:
+        raise he
+    except (CircuitOpenError, DeadlineExceeded) as e:
+        logger.warning(f"Question generation unavailable: {str(e)}")
+        raise upstream_error(e)
     except Exception as e:
         logger.error(f"Error creating interview: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+async def bulk_progress(username: str, data: bulkInterviewData) -> AsyncIterator[str]:
+    """Generate and store one interview per resume, yielding an NDJSON line per step.
+
+    Generation runs at batch priority, at most ``BULK_CONCURRENCY`` resumes
+    at a time, so a large request holds only a few scheduler slots and
+    rate-limiter places ahead of interactive calls. Finished interviews are
+    inserted ``BULK_INSERT_BATCH`` at a time, or after ``BULK_FLUSH_INTERVAL``
+    seconds. A caller that disconnects cancels whatever is not generated yet.
+    """
+    loop = asyncio.get_running_loop()
+    line = lambda event: json.dumps(event) + "\n"
+
+    limit = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def generate(resume: str) -> Questions:
+        async with limit:
+            with deadline(DEADLINE_BULK):
+                return await createQuestions(resume, data.job_description, priority=Priority.BATCH)
+
+    tasks = {asyncio.create_task(generate(resume)): i for i, resume in enumerate(data.resumes)}
+    pending, batch, batchSince = set(tasks), [], 0.0
+    created = failed = 0
+    try:
+        while pending or batch:
+            done = set()
+            if pending:
+                timeout = max(0.0, batchSince + BULK_FLUSH_INTERVAL - loop.time()) if batch else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.get):
+                i = tasks[task]
+                try:
+                    questions = task.result()
+                except Exception as e:
+                    failed += 1
+                    yield line({"index": i, "status": "failed", "error": str(e)})
+                    continue
+                yield line({"index": i, "status": "generated", "questions": len(questions.questions)})
+                if not batch:
+                    batchSince = loop.time()
+                batch.append((i, {
+                    "user_data": data.resumes[i], "job_description": data.job_description, "creator": username,
+                    "job_name": data.job_name,
+                    "questions": {"data": [{"question": q, "answer": None} for q in questions.questions]},
+                    "question_count": len(questions.questions), "next_index": 0,
+                    "next_question": questions.questions[0] if questions.questions else None,
+                }))
+            if batch and (not pending or len(batch) >= BULK_INSERT_BATCH
+                          or loop.time() - batchSince >= BULK_FLUSH_INTERVAL):
+                try:
+                    rows = await repo.createInterviews([row for _, row in batch])
+                except Exception as e:
+                    logger.error(f"Bulk insert of {len(batch)} interviews failed: {str(e)}")
+                    rows = []
+                for n, (i, _) in enumerate(batch):
+                    if n < len(rows):
+                        created += 1
+                        yield line({"index": i, "status": "created", "interview_id": rows[n].get('id')})
+                    else:
+                        failed += 1
+                        yield line({"index": i, "status": "failed", "error": "Could not store interview"})
+                batch = []
+        yield line({"status": "done", "created": created, "failed": failed})
+    finally:
+        for task in pending:
+            task.cancel()
+
+@app.post("/createInterviews/{username}")
+async def createInterviews(username: str, bulkData: bulkInterviewData, principal: Principal = Depends(authorized_user)):
+    """Create one interview per resume against a single job description, streaming NDJSON progress."""
+    if not bulkData.resumes:
+        raise HTTPException(status_code=400, detail="No resumes given")
+    if len(bulkData.resumes) > BULK_MAX_RESUMES:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_RESUMES} resumes per request")
+    try:
+        router.breaker.failFast()
+    except CircuitOpenError as e:
+        raise upstream_error(e)
+    # Warm the shared JD cleaning once before the per-resume prompts use it.
+    await asyncio.to_thread(cleanJobDescription, bulkData.job_description)
+    logger.info(f"Creating {len(bulkData.resumes)} interviews for {username}")
+    return StreamingResponse(bulk_progress(username, bulkData), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get('/interviews/question/{username}/{id}')
 async def startInterview(
     username: str,
     id: str,
-    token: str = Depends(oauth2_scheme)
+    principal: Principal = Depends(authorized_user)
 ):
     try:
-        payload = auth.decodeToken(token)
-        _, payloadUsername = payload['sub'].split('+')
-        if payloadUsername != username:
-            raise HTTPException(status_code=403, detail="Access denied")
-        data = DB.table('Interview').select('creator', 'questions').eq('id', id).execute()
-        if not data.data:
-            raise HTTPException(status_code=404, detail="Interview not found")
-        interview = data.data[0]
-        creator = interview.get('creator')
-        questionData = interview.get('questions')
-        if creator != username:
-            raise HTTPException(status_code=403, detail="Access denied")
-        questionsArr = questionData.get('data', []) if questionData else []
-        if not questionsArr:
+        interview = await get_owned_interview(id, principal, 'question_count', 'next_index', 'next_question', 'generating')
+        # Answered everything generated so far: wait briefly for the next one.
+        waitUntil = asyncio.get_running_loop().time() + QUESTION_WAIT
+        while interview.get('generating') and interview.get('next_question') is None:
+            if asyncio.get_running_loop().time() >= waitUntil:
+                return JSONResponse(status_code=202, content={"status": "generating"}, headers={"Retry-After": "1"})
+            await asyncio.sleep(0.5)
+            interview = await repo.getInterview(id, 'question_count', 'next_index', 'next_question', 'generating')
+        if not interview.get('question_count'):
             raise HTTPException(status_code=404, detail="No questions available")
-        for qIdx, ques in enumerate(questionsArr):
-            if ques.get('answer') is None:
-                return {
-                    "question": ques.get('question'),
-                    "question_index": qIdx + 1
-                }
-        return {"message": "All questions have been answered"}
+        if interview.get('next_question') is None:
+            return {"message": "All questions have been answered"}
+        return {
+            "question": interview.get('next_question'),
+            "question_index": interview.get('next_index') + 1
+        }
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -147,99 +425,156 @@ async def startInterview(
 
 @app.get("/result/{username}/{id}")
 async def getResults(
+    request: Request,
     username: str,
     id: str,
-    token: str = Depends(oauth2_scheme)
+    principal: Principal = Depends(authorized_user)
 ):
     try:
-        payload = auth.decodeToken(token)
-        _, payloadUsername = payload['sub'].split('+')
-        if payloadUsername != username:
+        cached = await resultCache.get(result_key(id))
+        if cached is None:
+            interview = await get_owned_interview(id, principal, 'reviews', 'answered_count', 'question_count', 'generating')
+            reviews = interview.get('reviews')
+            if reviews is None:
+                answered, total = interview.get('answered_count') or 0, interview.get('question_count') or 0
+                if interview.get('generating') or answered < total:
+                    # Reviews start once the last answer is saved.
+                    return JSONResponse(status_code=202, content={"status": "partial", "answered": answered, "questions": total},
+                                        headers={"Retry-After": "2"})
+                status = reviewJobs.enqueue(id)
+                # 'retrying' means the model provider failed; try again once it may have recovered.
+                retryAfter = reviewJobs.retryAfter(id) if status == "retrying" else 2
+                return JSONResponse(status_code=202, content={"status": status, "retry_after": retryAfter},
+                                    headers={"Retry-After": str(retryAfter)})
+            body = json.dumps(reviews, separators=(",", ":"), default=str)
+            cached = {"creator": interview['creator'], "body": body, "etag": etag_of(body.encode())}
+            await resultCache.set(result_key(id), cached)
+        elif cached['creator'] != principal.username:
             raise HTTPException(status_code=403, detail="Access denied")
-        
-        interviewResponse = DB.table('Interview').select('questions', 'creator','reviews').eq('id', id).execute()
-        
-        if not interviewResponse.data:
-            raise HTTPException(status_code=404, detail="Interview not found")
-        
-        interview = interviewResponse.data[0]
-        creator = interview.get('creator')
-        if creator != username:
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        questions_data = interview.get('questions', {})
-        questions_arr = questions_data.get('data', [])
-        reviews = interview.get('reviews')
-        
-        if reviews is not None:
-            return reviews
-        
-        input_data = InterviewData(data=[interviewQuestions(**q) for q in questions_arr])
-        
-        review_results = await createReviews(input_data)
-        
-        reviews_list = [result.model_dump() for result in review_results]
-        
-        review_response = DB.table('Interview').update({"reviews": reviews_list}).eq('id', id).execute()
-        
-        return review_response.data[0].get('reviews')
+
+        response = etag_response(request, None, IMMUTABLE, body=cached['body'].encode(), etag=cached['etag'])
+        response.headers["X-Review-Status"] = "done"
+        return response
     
     except HTTPException as he:
         raise he
     except Exception as e:
-        logger.logger.error(f"Error processing answer: {str(e)}")
+        logger.error(f"Error processing answer: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
     
     
     
+def next_question_headers(result: dict) -> dict:
+    """Headers carrying the next question, saving the client a GET round trip."""
+    if result.get('next_question') is None:
+        # "pending": more questions are on the way, fetch the next one with GET.
+        return {"X-Next-Question-Index": "pending" if result.get('generating') else "done"}
+    return {
+        "X-Next-Question-Index": str(result['next_index'] + 1),
+        "X-Next-Question": quote(result['next_question']),
+    }
+
+ANSWER_ERRORS = {
+    'not_found': (404, "Interview not found"),
+    'forbidden': (403, "Access denied"),
+    'invalid_index': (400, "Invalid question index"),
+    'mismatch': (400, "Question text mismatch"),
+    'answered': (400, "Question already answered"),
+}
+
 @app.post('/interviews/answer/{username}/{id}')
 async def addAnswer(
+    request: Request,
     username: str,
     id: str,
     answer_data: Answer,
-    token: str = Depends(oauth2_scheme)
+    principal: Principal = Depends(authorized_user)
 ):
     try:
-        payload = auth.decodeToken(token)
-        _, payloadUsername = payload['sub'].split('+')
-        if payloadUsername != username:
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        interview_response = DB.table('Interview').select('creator,questions').eq('id', id).execute()
-        if not interview_response.data:
-            raise HTTPException(status_code=404, detail="Interview not found")
-        interview = interview_response.data[0]
-        creator = interview.get('creator')
-        if creator != username:
-            raise HTTPException(status_code=403, detail="Access denied")
-        
-        questions_data = interview.get('questions', {})
-        questions_arr = questions_data.get('data', [])
-        if answer_data.answerNum >= len(questions_arr) or answer_data.answerNum < 0:
-            raise HTTPException(status_code=400, detail="Invalid question index")
-        question_entry = questions_arr[answer_data.answerNum]
-        
-        if question_entry.get('answer') is not None:
-            raise HTTPException(status_code=400, detail="Question already answered")
+        scheduler.admit(Priority.INTERACTIVE)
+        router.breaker.failFast()
         
-        if question_entry.get('question') != answer_data.question:
-            raise HTTPException(status_code=400, detail="Question text mismatch")
-        
-        question_entry['answer'] = answer_data.answerData
-        questions_data['data'] = questions_arr
-        update_response = DB.table('Interview').update({'questions': questions_data}).eq('id', id).execute()
-        
-        if not update_response.data:
+        result = await repo.answerQuestion(
+            id, principal.username, answer_data.answerNum, answer_data.question, answer_data.answerData
+        )
+        status = (result or {}).get('status')
+        if status in ANSWER_ERRORS:
+            code, detail = ANSWER_ERRORS[status]
+            raise HTTPException(status_code=code, detail=detail)
+        if status != 'ok':
             raise HTTPException(status_code=500, detail="Failed to update answer")
         
+        if result.get('remaining') == 0 and not result.get('generating'):
+            reviewJobs.enqueue(id)
         
-        return StreamingResponse(
-            content=createResponse(answer=answer_data.answerData,
-                                    question=answer_data.question
-                                ))
+        # The pump task copies the context here, deadline included.
+        with deadline(DEADLINE_FEEDBACK):
+            stream = feedbackStreams.start(
+                id,
+                answer_data.answerNum,
+                createResponse(answer=answer_data.answerData, question=answer_data.question)
+            )
+        return FeedbackResponse(
+            feedbackStreams.subscribe(stream),
+            sse=wantsSse(request.headers.get('accept')),
+            headers=next_question_headers(result)
+        )
     except HTTPException as he:
         raise he
+    except CircuitOpenError as e:
+        raise upstream_error(e)
     except Exception as e:
-        logger.logger.error(f"Error processing answer: {str(e)}")
+        logger.error(f"Error processing answer: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
-    
+
+
+@app.websocket('/ws/interview/{username}/{id}')
+async def interviewSession(websocket: WebSocket, username: str, id: str):
+    """Whole-interview session: authenticate once, then answer, stream feedback and get the next question.
+
+    The first message must be ``{"type": "auth", "token": <access token>}``.
+    Failures close the socket with 4000 + the HTTP status (e.g. 4401, 4403).
+    """
+    await websocket.accept()
+    try:
+        message = await asyncio.wait_for(websocket.receive_json(), WS_AUTH_TIMEOUT)
+        if not isinstance(message, dict) or message.get('type') != 'auth':
+            raise HTTPException(status_code=401, detail="Expected an auth message")
+        principal = auth.getPrincipal(str(message.get('token') or ''))
+        if principal.username != username:
+            raise HTTPException(status_code=403, detail="Access denied")
+        interview = await get_owned_interview(id, principal, 'questions', 'generating')
+    except HTTPException as he:
+        await websocket.close(code=4000 + he.status_code, reason=str(he.detail))
+        return
+    except (asyncio.TimeoutError, ValueError):
+        await websocket.close(code=4401, reason="Expected an auth message")
+        return
+    except WebSocketDisconnect:
+        return
+    await InterviewSession(id, principal.username, interview).run(websocket)
+
+
+@app.get('/interviews/feedback/{username}/{id}/{answerNum}')
+async def resumeFeedback(
+    request: Request,
+    username: str,
+    id: str,
+    answerNum: int,
+    offset: int = 0,
+    principal: Principal = Depends(authorized_user)
+):
+    """Replay stored answer feedback from ``offset``, then follow it if still streaming.
+
+    SSE clients reconnecting with Last-Event-ID resume from that offset.
+    """
+    await get_owned_interview(id, principal)
+    sse = wantsSse(request.headers.get('accept'))
+    lastEventId = request.headers.get('last-event-id', '')
+    if sse and lastEventId.isdigit():
+        offset = int(lastEventId)
+    offset = max(offset, 0)
+    content = await feedbackStreams.replay(id, answerNum, offset)
+    if content is None:
+        raise HTTPException(status_code=404, detail="No feedback for this answer")
+    return FeedbackResponse(content, sse=sse, offset=offset)
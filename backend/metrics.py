@@ -0,0 +1,183 @@
+"""Minimal Prometheus text-format metrics.
+
+Everything is recorded from the event loop thread, so metrics are plain
+dicts and lists without locks; an observation is a dict lookup, a bisect
+and two additions.
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labelText(names: Sequence[str], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                     for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name}{_labelText(self.labels, k)} {v}" for k, v in self.values.items()]
+
+
+class Gauge(Metric):
+    """Gauge read from a callback at scrape time, so nothing is recorded on the hot path."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        super().__init__(name, help)
+        self.read = read
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {self.read()}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def time(self, *labels) -> "Timer":
+        return Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labelText(self.labels + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labelText(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_labelText(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "tili_http_request_seconds", "HTTP request latency until the last body byte", ("method", "route", "status")))
+DB_LATENCY = registry.register(Histogram(
+    "tili_db_call_seconds", "Supabase call latency", ("table", "operation")))
+RATE_LIMIT_WAIT = registry.register(Histogram(
+    "tili_rate_limit_wait_seconds", "Time spent waiting for a Together rate-limit token", ("endpoint",)))
+SCHEDULER_WAIT = registry.register(Histogram(
+    "tili_llm_queue_wait_seconds", "Time spent queued for an LLM scheduler slot", ("priority",)))
+LLM_TTFT = registry.register(Histogram(
+    "tili_llm_time_to_first_token_seconds", "Time to first streamed token", ("task", "model")))
+LLM_DURATION = registry.register(Histogram(
+    "tili_llm_call_seconds", "Total LLM call time", ("task", "model")))
+LLM_TOKENS = registry.register(Counter(
+    "tili_llm_tokens_total", "Tokens reported by the model", ("task", "model", "kind")))
+LLM_ERRORS = registry.register(Counter(
+    "tili_llm_errors_total", "Failed LLM calls", ("task", "model")))
+LLM_HEDGES = registry.register(Counter(
+    "tili_llm_hedged_requests_total", "Duplicate requests sent after a call outlived its p95", ("task", "model")))
+ANSWER_INDEX_LOOKUPS = registry.register(Counter(
+    "tili_answer_index_lookups_total", "Near-duplicate answer lookups; hits skip a model call", ("kind", "result")))
+FEEDBACK_ABANDONED = registry.register(Counter(
+    "tili_feedback_streams_abandoned_total", "Feedback generations cancelled after every client left"))
+FEEDBACK_SLOW_CONSUMERS = registry.register(Counter(
+    "tili_feedback_slow_consumers_total", "Feedback clients dropped for not reading"))
+
+
+def recordUsage(task: str, model: str, message) -> None:
+    """Count tokens from a LangChain message's ``usage_metadata``, if any."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        LLM_TOKENS.inc(task, model, "input", amount=usage.get("input_tokens", 0))
+        LLM_TOKENS.inc(task, model, "output", amount=usage.get("output_tokens", 0))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each request until its final body chunk."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = [500]
+
+        async def sendWrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                route = scope.get("route")
+                REQUEST_LATENCY.observe(
+                    time.perf_counter() - start, scope["method"], getattr(route, "path", "unmatched"), status[0]
+                )
+            await send(message)
+
+        await self.app(scope, receive, sendWrapper)
@@ -0,0 +1,11 @@
+-- Answer feedback streamed by addAnswer, persisted incrementally so
+-- reconnecting clients can replay it without another model call.
+create table if not exists "Feedback" (
+    id bigint generated by default as identity primary key,
+    interview_id bigint not null references "Interview" (id) on delete cascade,
+    question_num integer not null,
+    content text not null default '',
+    done boolean not null default false,
+    updated_at timestamptz not null default now(),
+    unique (interview_id, question_num)
+);
@@ -0,0 +1,51 @@
+-- Record one answer in place. The row lock makes the check-and-set atomic,
+-- so concurrent submissions can neither overwrite each other nor answer
+-- the same question twice, and only the answer text crosses the wire.
+create or replace function answer_question(
+    p_id bigint,
+    p_creator text,
+    p_index integer,
+    p_question text,
+    p_answer text
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_creator text;
+    v_entry jsonb;
+    v_remaining integer;
+begin
+    select creator, questions -> 'data' -> p_index
+      into v_creator, v_entry
+      from "Interview"
+     where id = p_id
+       for update;
+
+    if not found then
+        return jsonb_build_object('status', 'not_found');
+    end if;
+    if v_creator is distinct from p_creator then
+        return jsonb_build_object('status', 'forbidden');
+    end if;
+    if p_index < 0 or v_entry is null then
+        return jsonb_build_object('status', 'invalid_index');
+    end if;
+    if v_entry ->> 'question' is distinct from p_question then
+        return jsonb_build_object('status', 'mismatch');
+    end if;
+    if coalesce(v_entry -> 'answer', 'null'::jsonb) <> 'null'::jsonb then
+        return jsonb_build_object('status', 'answered');
+    end if;
+
+    update "Interview"
+       set questions = jsonb_set(questions, array['data', p_index::text, 'answer'], to_jsonb(p_answer))
+     where id = p_id
+    returning (
+        select count(*)
+          from jsonb_array_elements(questions -> 'data') q
+         where coalesce(q -> 'answer', 'null'::jsonb) = 'null'::jsonb
+    ) into v_remaining;
+
+    return jsonb_build_object('status', 'ok', 'remaining', v_remaining);
+end;
+$$;
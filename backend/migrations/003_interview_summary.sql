@@ -0,0 +1,64 @@
+-- Lightweight columns for the dashboard list so it never has to pull the
+-- resume, job description, questions or reviews of every interview.
+alter table "Interview"
+    add column if not exists answered_count integer not null default 0,
+    add column if not exists question_count integer not null default 0,
+    add column if not exists reviewed boolean generated always as (reviews is not null) stored;
+
+update "Interview"
+   set question_count = coalesce(jsonb_array_length(questions -> 'data'), 0),
+       answered_count = (
+           select count(*)
+             from jsonb_array_elements(questions -> 'data') q
+            where coalesce(q -> 'answer', 'null'::jsonb) <> 'null'::jsonb
+       );
+
+-- Keyset pagination: newest first within a creator.
+create index if not exists interview_creator_id on "Interview" (creator, id desc);
+
+-- Keep answered_count in step with answers recorded by answer_question.
+create or replace function answer_question(
+    p_id bigint,
+    p_creator text,
+    p_index integer,
+    p_question text,
+    p_answer text
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_creator text;
+    v_entry jsonb;
+    v_remaining integer;
+begin
+    select creator, questions -> 'data' -> p_index
+      into v_creator, v_entry
+      from "Interview"
+     where id = p_id
+       for update;
+
+    if not found then
+        return jsonb_build_object('status', 'not_found');
+    end if;
+    if v_creator is distinct from p_creator then
+        return jsonb_build_object('status', 'forbidden');
+    end if;
+    if p_index < 0 or v_entry is null then
+        return jsonb_build_object('status', 'invalid_index');
+    end if;
+    if v_entry ->> 'question' is distinct from p_question then
+        return jsonb_build_object('status', 'mismatch');
+    end if;
+    if coalesce(v_entry -> 'answer', 'null'::jsonb) <> 'null'::jsonb then
+        return jsonb_build_object('status', 'answered');
+    end if;
+
+    update "Interview"
+       set questions = jsonb_set(questions, array['data', p_index::text, 'answer'], to_jsonb(p_answer)),
+           answered_count = answered_count + 1
+     where id = p_id
+    returning question_count - answered_count into v_remaining;
+
+    return jsonb_build_object('status', 'ok', 'remaining', v_remaining);
+end;
+$$;
@@ -0,0 +1,77 @@
+-- Progress cursor so the next question is found without scanning the
+-- questions blob, and answer_question can hand it back directly.
+alter table "Interview"
+    add column if not exists next_index integer not null default 0,
+    add column if not exists next_question text;
+
+update "Interview" i
+   set next_index = coalesce((
+           select min(e.ord) - 1
+             from jsonb_array_elements(i.questions -> 'data') with ordinality e(q, ord)
+            where coalesce(e.q -> 'answer', 'null'::jsonb) = 'null'::jsonb
+       ), i.question_count);
+
+update "Interview"
+   set next_question = questions -> 'data' -> next_index ->> 'question';
+
+create or replace function answer_question(
+    p_id bigint,
+    p_creator text,
+    p_index integer,
+    p_question text,
+    p_answer text
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_creator text;
+    v_questions jsonb;
+    v_entry jsonb;
+    v_next integer;
+    v_remaining integer;
+begin
+    select creator, questions
+      into v_creator, v_questions
+      from "Interview"
+     where id = p_id
+       for update;
+
+    if not found then
+        return jsonb_build_object('status', 'not_found');
+    end if;
+    if v_creator is distinct from p_creator then
+        return jsonb_build_object('status', 'forbidden');
+    end if;
+    v_entry := v_questions -> 'data' -> p_index;
+    if p_index < 0 or v_entry is null then
+        return jsonb_build_object('status', 'invalid_index');
+    end if;
+    if v_entry ->> 'question' is distinct from p_question then
+        return jsonb_build_object('status', 'mismatch');
+    end if;
+    if coalesce(v_entry -> 'answer', 'null'::jsonb) <> 'null'::jsonb then
+        return jsonb_build_object('status', 'answered');
+    end if;
+
+    v_questions := jsonb_set(v_questions, array['data', p_index::text, 'answer'], to_jsonb(p_answer));
+    select coalesce(min(e.ord) - 1, jsonb_array_length(v_questions -> 'data'))::integer
+      into v_next
+      from jsonb_array_elements(v_questions -> 'data') with ordinality e(q, ord)
+     where coalesce(e.q -> 'answer', 'null'::jsonb) = 'null'::jsonb;
+
+    update "Interview"
+       set questions = v_questions,
+           answered_count = answered_count + 1,
+           next_index = v_next,
+           next_question = v_questions -> 'data' -> v_next ->> 'question'
+     where id = p_id
+    returning question_count - answered_count into v_remaining;
+
+    return jsonb_build_object(
+        'status', 'ok',
+        'remaining', v_remaining,
+        'next_index', v_next,
+        'next_question', v_questions -> 'data' -> v_next ->> 'question'
+    );
+end;
+$$;
@@ -0,0 +1,111 @@
+-- Interviews are created as soon as the first question is generated; the
+-- rest are appended while `generating` is true.
+alter table "Interview"
+    add column if not exists generating boolean not null default false;
+
+-- Append questions to a live interview. The cursor is filled in if the
+-- candidate had already answered everything generated so far.
+create or replace function append_questions(
+    p_id bigint,
+    p_questions jsonb,
+    p_done boolean
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_row "Interview"%rowtype;
+    v_questions jsonb;
+begin
+    select * into v_row from "Interview" where id = p_id for update;
+    if not found then
+        return jsonb_build_object('status', 'not_found');
+    end if;
+
+    select coalesce(v_row.questions -> 'data', '[]'::jsonb)
+           || coalesce(jsonb_agg(jsonb_build_object('question', q, 'answer', null)), '[]'::jsonb)
+      into v_questions
+      from jsonb_array_elements_text(p_questions) q;
+
+    update "Interview"
+       set questions = jsonb_build_object('data', v_questions),
+           question_count = jsonb_array_length(v_questions),
+           next_question = coalesce(next_question, v_questions -> next_index ->> 'question'),
+           generating = not p_done
+     where id = p_id
+    returning * into v_row;
+
+    return jsonb_build_object(
+        'status', 'ok',
+        'remaining', v_row.question_count - v_row.answered_count,
+        'generating', v_row.generating,
+        'next_index', v_row.next_index,
+        'next_question', v_row.next_question
+    );
+end;
+$$;
+
+-- Same as 004, plus `generating` so callers do not review a half-generated
+-- interview whose current questions happen to be all answered.
+create or replace function answer_question(
+    p_id bigint,
+    p_creator text,
+    p_index integer,
+    p_question text,
+    p_answer text
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_creator text;
+    v_questions jsonb;
+    v_entry jsonb;
+    v_next integer;
+    v_remaining integer;
+    v_generating boolean;
+begin
+    select creator, questions
+      into v_creator, v_questions
+      from "Interview"
+     where id = p_id
+       for update;
+
+    if not found then
+        return jsonb_build_object('status', 'not_found');
+    end if;
+    if v_creator is distinct from p_creator then
+        return jsonb_build_object('status', 'forbidden');
+    end if;
+    v_entry := v_questions -> 'data' -> p_index;
+    if p_index < 0 or v_entry is null then
+        return jsonb_build_object('status', 'invalid_index');
+    end if;
+    if v_entry ->> 'question' is distinct from p_question then
+        return jsonb_build_object('status', 'mismatch');
+    end if;
+    if coalesce(v_entry -> 'answer', 'null'::jsonb) <> 'null'::jsonb then
+        return jsonb_build_object('status', 'answered');
+    end if;
+
+    v_questions := jsonb_set(v_questions, array['data', p_index::text, 'answer'], to_jsonb(p_answer));
+    select coalesce(min(e.ord) - 1, jsonb_array_length(v_questions -> 'data'))::integer
+      into v_next
+      from jsonb_array_elements(v_questions -> 'data') with ordinality e(q, ord)
+     where coalesce(e.q -> 'answer', 'null'::jsonb) = 'null'::jsonb;
+
+    update "Interview"
+       set questions = v_questions,
+           answered_count = answered_count + 1,
+           next_index = v_next,
+           next_question = v_questions -> 'data' -> v_next ->> 'question'
+     where id = p_id
+    returning question_count - answered_count, generating into v_remaining, v_generating;
+
+    return jsonb_build_object(
+        'status', 'ok',
+        'remaining', v_remaining,
+        'generating', v_generating,
+        'next_index', v_next,
+        'next_question', v_questions -> 'data' -> v_next ->> 'question'
+    );
+end;
+$$;
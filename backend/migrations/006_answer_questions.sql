@@ -0,0 +1,72 @@
+-- Record several answers in one round trip, for WebSocket sessions that
+-- buffer answers in memory. Each item is checked like answer_question;
+-- the ones that do not apply are returned in `skipped`.
+create or replace function answer_questions(
+    p_id bigint,
+    p_creator text,
+    p_answers jsonb
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_creator text;
+    v_questions jsonb;
+    v_item jsonb;
+    v_index integer;
+    v_entry jsonb;
+    v_applied integer := 0;
+    v_skipped jsonb := '[]'::jsonb;
+    v_next integer;
+    v_remaining integer;
+    v_generating boolean;
+begin
+    select creator, questions
+      into v_creator, v_questions
+      from "Interview"
+     where id = p_id
+       for update;
+
+    if not found then
+        return jsonb_build_object('status', 'not_found');
+    end if;
+    if v_creator is distinct from p_creator then
+        return jsonb_build_object('status', 'forbidden');
+    end if;
+
+    for v_item in select value from jsonb_array_elements(p_answers) loop
+        v_index := (v_item ->> 'index')::integer;
+        v_entry := v_questions -> 'data' -> v_index;
+        if v_index < 0 or v_entry is null
+           or v_entry ->> 'question' is distinct from v_item ->> 'question'
+           or coalesce(v_entry -> 'answer', 'null'::jsonb) <> 'null'::jsonb then
+            v_skipped := v_skipped || to_jsonb(v_index);
+            continue;
+        end if;
+        v_questions := jsonb_set(v_questions, array['data', v_index::text, 'answer'], v_item -> 'answer');
+        v_applied := v_applied + 1;
+    end loop;
+
+    select coalesce(min(e.ord) - 1, jsonb_array_length(v_questions -> 'data'))::integer
+      into v_next
+      from jsonb_array_elements(v_questions -> 'data') with ordinality e(q, ord)
+     where coalesce(e.q -> 'answer', 'null'::jsonb) = 'null'::jsonb;
+
+    update "Interview"
+       set questions = v_questions,
+           answered_count = answered_count + v_applied,
+           next_index = v_next,
+           next_question = v_questions -> 'data' -> v_next ->> 'question'
+     where id = p_id
+    returning question_count - answered_count, generating into v_remaining, v_generating;
+
+    return jsonb_build_object(
+        'status', 'ok',
+        'applied', v_applied,
+        'skipped', v_skipped,
+        'remaining', v_remaining,
+        'generating', v_generating,
+        'next_index', v_next,
+        'next_question', v_questions -> 'data' -> v_next ->> 'question'
+    );
+end;
+$$;
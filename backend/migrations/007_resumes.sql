@@ -0,0 +1,13 @@
+-- Uploaded resumes, stored as normalised text once per owner and content
+-- hash so re-uploads and later interviews skip extraction.
+create table if not exists "Resume" (
+    id bigint generated by default as identity primary key,
+    creator text not null,
+    content_hash text not null,
+    text text not null,
+    pages integer,
+    characters integer not null,
+    bytes integer not null,
+    created_at timestamptz not null default now(),
+    unique (creator, content_hash)
+);
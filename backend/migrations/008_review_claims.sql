@@ -0,0 +1,21 @@
+-- Every app worker runs its own review queue, so a worker claims an
+-- interview before calling the model for its reviews. A claim older than
+-- p_lease seconds is treated as abandoned and can be taken over.
+alter table "Interview"
+    add column if not exists review_started_at timestamptz;
+
+create or replace function claim_review(
+    p_id bigint,
+    p_lease double precision
+) returns boolean
+language sql
+as $$
+    update "Interview"
+       set review_started_at = now()
+     where id = p_id
+       and reviews is null
+       and not generating
+       and (review_started_at is null
+            or review_started_at < now() - make_interval(secs => p_lease))
+    returning true;
+$$;
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from typing import List,Optional
 class UserInput(BaseModel):
     username: str
@@ -6,12 +6,30 @@ class UserInput(BaseModel):
     password: str
 
 
+class Principal(BaseModel):
+    email: str
+    username: str
+
+
 class interviewFromData(BaseModel):
-    user_data : str
+    user_data : str = ""
     job_description : str
     job_name : str
+    resume_id : Optional[int] = None
+
+    @model_validator(mode="after")
+    def requireResume(self):
+        if self.resume_id is None and not self.user_data.strip():
+            raise ValueError("Provide either resume_id or user_data")
+        return self
     
     
+class bulkInterviewData(BaseModel):
+    job_description : str
+    job_name : str
+    resumes : List[str]
+
+
 class Questions(BaseModel):
     questions : List[str]
 
@@ -39,8 +57,13 @@ class ReviewResult(BaseModel):
     answer: Optional[str]
     review: Optional[str]
     error: Optional[str]
-    attempts: int = 0 
-    
-    
-    
-    
\ No newline at end of file
+    attempts: int = 0
+
+
+class BatchReview(BaseModel):
+    index: int
+    review: str
+
+
+class BatchReviews(BaseModel):
+    reviews: List[BatchReview]
@@ -0,0 +1,56 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException
+
+
+class BoundedPool:
+    """Runs blocking or CPU-bound calls off the event loop on a bounded worker pool.
+
+    ``kind`` is "process" or "thread"; the executor is created on first use.
+    Processes are started by a fork server (spawned where there is none),
+    never forked from this multi-threaded process, and a pool broken by a
+    crashed worker is replaced for the next call. Calls beyond ``workers +
+    queueLimit`` are rejected with a 503 rather than queued without bound
+    behind a burst.
+    """
+
+    def __init__(self, workers: int, queueLimit: int, kind: str = "thread", name: str = "pool"):
+        self.workers = workers
+        self.queueLimit = queueLimit
+        self.kind = kind
+        self.name = name
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(method))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.pending >= self.workers + self.queueLimit:
+            raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+        self.pending += 1
+        executor = self.executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenExecutor:
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            self.pending -= 1
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
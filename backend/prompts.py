@@ -1,3 +1,6 @@
+# Bump whenever QUESTION_PROMPT changes so cached questions are not reused.
+QUESTION_PROMPT_VERSION = "1"
+
 QUESTION_PROMPT = """
     You are a highly intelligent and professional language model. Your task is to generate a JSON object containing five interview questions based on the following inputs:
 
@@ -94,4 +97,27 @@ REVIEW_PROMPT = """
   "question": "Explain dependency injection",
   "answer": "Passing dependencies to objects instead of hard-coding them",
   "review": "## 📝 Response Summary\nYour answer demonstrates solid understanding of dependency injection fundamentals... (full template continues)"
- """
\ No newline at end of file
+ """
+
+
+REVIEW_BATCH_PROMPT = """
+  # Interview Feedback Generation Guide (batch)
+**Review every item below. For each one, write supportive markdown feedback using this template:**
+
+## 📝 Response Summary *(50-70 words)*
+## 🏆 Strengths *(2-3 bullets)*
+## 🔍 Areas to Refine *(1-2 bullets)*
+## 🚀 Growth Suggestions *(1-2 actions)*
+## 🌟 Closing Note
+
+**Rules**
+1. When an item has no answer, show ONLY the "Response Summary" section: "Thank you for engaging with this question! While we didn't receive a response this time, consider focusing on **[key concept from question]** in future answers."
+2. Never include strengths/refinements without an answer
+3. Keep [key concept] specific to the question's technical domain
+4. Maintain warm, encouraging tone
+5. Return exactly one review per item, tagged with the item's index
+
+**Items**
+
+{items}
+ """
@@ -0,0 +1,152 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Protocol, Tuple
+
+from metrics import RATE_LIMIT_WAIT
+from config import RATE_LIMIT_BACKEND, RATE_LIMIT_SQLITE_PATH, REDIS_URL
+
+
+def refill(tokens: float, updated: float, now: float, capacity: float, rate: float, cost: float) -> Tuple[float, float]:
+    """Token-bucket step: returns the new token count and the seconds to wait.
+
+    A wait of 0 means ``cost`` tokens were taken; otherwise nothing is taken
+    and the caller should retry after the returned delay.
+    """
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+class BucketStore(Protocol):
+    async def take(self, key: str, cost: float, capacity: float, rate: float) -> float: ...
+
+
+class MemoryBucketStore:
+    """Per-process bucket; only correct with a single worker."""
+
+    def __init__(self):
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def take(self, key: str, cost: float, capacity: float, rate: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(key, (capacity, now))
+        tokens, wait = refill(tokens, updated, now, capacity, rate, cost)
+        self.buckets[key] = (tokens, now)
+        return wait
+
+
+class SqliteBucketStore:
+    """Bucket shared by every worker on one host through a SQLite file."""
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH):
+        self.path = path
+        self.local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+            self.local.conn = conn
+        return conn
+
+    def _take(self, key: str, cost: float, capacity: float, rate: float) -> float:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, wait = refill(tokens, updated, now, capacity, rate, cost)
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    async def take(self, key: str, cost: float, capacity: float, rate: float) -> float:
+        return await asyncio.to_thread(self._take, key, cost, capacity, rate)
+
+
+class RedisBucketStore:
+    """Bucket shared across hosts through any Redis-compatible server."""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= cost then tokens = tokens - cost else wait = (cost - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) * 2)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str = REDIS_URL):
+        try:
+            from redis.asyncio import Redis
+        except ImportError:
+            raise ImportError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        self.client = Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, cost: float, capacity: float, rate: float) -> float:
+        return float(await self.script(keys=[f"ratelimit:{key}"], args=[capacity, rate, cost]))
+
+
+def buildStore(backend: str = RATE_LIMIT_BACKEND) -> BucketStore:
+    if backend == "sqlite":
+        return SqliteBucketStore()
+    if backend == "redis":
+        return RedisBucketStore()
+    return MemoryBucketStore()
+
+
+class RateLimiter:
+    """Token bucket of ``maxRequests`` per ``interval`` seconds.
+
+    Waiters are served strictly FIFO (``asyncio.Lock`` hands over in arrival
+    order); only the head of the queue talks to the store, and it sleeps for
+    exactly the deficit instead of polling. Each endpoint may cost a
+    different number of tokens via ``weights``.
+    """
+
+    def __init__(self, maxRequests: int, interval: int, store: Optional[BucketStore] = None,
+                 weights: Optional[Dict[str, float]] = None, key: str = "together"):
+        self.maxRequests = maxRequests
+        self.interval = interval
+        self.rate = maxRequests / interval
+        self.store = store or MemoryBucketStore()
+        self.weights = weights or {}
+        self.key = key
+        self.lock = asyncio.Lock()
+
+    def cost(self, endpoint: Optional[str] = None) -> float:
+        return min(float(self.weights.get(endpoint, 1)), self.maxRequests)
+
+    async def tryAcquire(self, endpoint: Optional[str] = None) -> bool:
+        """Take a token only if one is free right now and nobody is queued for it."""
+        if self.lock.locked():
+            return False
+        return await self.store.take(self.key, self.cost(endpoint), self.maxRequests, self.rate) <= 0
+
+    async def acquire(self, endpoint: Optional[str] = None):
+        cost = self.cost(endpoint)
+        with RATE_LIMIT_WAIT.time(endpoint or "default"):
+            async with self.lock:
+                while True:
+                    waitTime = await self.store.take(self.key, cost, self.maxRequests, self.rate)
+                    if waitTime <= 0:
+                        return
+                    await asyncio.sleep(waitTime)
@@ -0,0 +1,213 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+import logging
+from config import SUPABASE_URL, SUPABASE_API_KEY, DB_POOL_SIZE, DB_TIMEOUT
+from metrics import DB_LATENCY
+
+logger = logging.getLogger(__name__)
+
+INTERVIEW_SUMMARY_COLUMNS = ("id", "job_name", "created_at", "result", "answered_count", "question_count", "reviewed")
+
+class Repository:
+    """Async data-access layer over the blocking Supabase client.
+
+    Every query is built and executed on a bounded thread pool so a slow
+    round trip never stalls the event loop (and the LLM streams on it).
+    """
+
+    def __init__(self, client=None, maxWorkers: int = DB_POOL_SIZE):
+        self.client = client
+        self.maxWorkers = maxWorkers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.http = None
+
+    def connect(self):
+        """Create the thread pool and, unless one was injected, the Supabase client.
+
+        Called from the app lifespan; ``run`` also connects on first use.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="db")
+        if self.client is None:
+            import httpx
+            from supabase import ClientOptions, create_client
+
+            # One keep-alive connection per worker thread, reused across requests.
+            self.http = httpx.Client(
+                limits=httpx.Limits(max_connections=self.maxWorkers, max_keepalive_connections=self.maxWorkers),
+                timeout=DB_TIMEOUT,
+            )
+            self.client = create_client(SUPABASE_URL, SUPABASE_API_KEY, options=ClientOptions(httpx_client=self.http))
+        return self.client
+
+    async def warmUp(self):
+        """Open a pooled connection with the cheapest query we have."""
+        await self.run(lambda db: db.table("User").select("id").limit(1), "User", "select")
+
+    async def run(self, query: Callable[[Any], Any], table: str = "", operation: str = ""):
+        """Run ``query(client)`` on the pool and return the executed response.
+
+        ``table`` and ``operation`` only label the latency histogram.
+        """
+        if self.executor is None or self.client is None:
+            self.connect()
+        loop = asyncio.get_running_loop()
+        with DB_LATENCY.time(table, operation):
+            return await loop.run_in_executor(self.executor, lambda: query(self.client).execute())
+
+    async def getUserByEmail(self, email: str) -> Optional[dict]:
+        response = await self.run(lambda db: db.table("User").select("*").eq("Email", email), "User", "select")
+        return response.data[0] if response.data else None
+
+    async def createUser(self, user: dict) -> Optional[dict]:
+        response = await self.run(lambda db: db.table("User").insert(user), "User", "insert")
+        return response.data[0] if response.data else None
+
+    async def listInterviews(self, creator: str) -> list:
+        response = await self.run(lambda db: db.table("Interview").select("*").eq("creator", creator), "Interview", "select")
+        return response.data or []
+
+    async def listInterviewSummaries(self, creator: str, limit: int, before: Optional[int] = None) -> list:
+        """One keyset page of a creator's interviews, newest first, summary columns only."""
+        def query(db):
+            q = db.table("Interview").select(*INTERVIEW_SUMMARY_COLUMNS).eq("creator", creator)
+            if before is not None:
+                q = q.lt("id", before)
+            return q.order("id", desc=True).limit(limit)
+        response = await self.run(query, "Interview", "select")
+        return response.data or []
+
+    async def createInterview(self, data: dict) -> Optional[dict]:
+        response = await self.run(lambda db: db.table("Interview").insert(data), "Interview", "insert")
+        return response.data[0] if response.data else None
+
+    async def createInterviews(self, rows: List[dict]) -> List[dict]:
+        """Insert many interviews in one request; rows come back in insert order."""
+        response = await self.run(lambda db: db.table("Interview").insert(rows), "Interview", "insert")
+        return response.data or []
+
+    async def getInterview(self, id: str, *columns: str) -> Optional[dict]:
+        response = await self.run(lambda db: db.table("Interview").select(*(columns or ("*",))).eq("id", id), "Interview", "select")
+        return response.data[0] if response.data else None
+
+    async def listUnreviewedInterviews(self) -> List[str]:
+        """Ids of fully answered interviews whose reviews were never saved."""
+        def query(db):
+            return db.table("Interview").select("id", "answered_count", "question_count", "generating").is_("reviews", "null")
+        response = await self.run(query, "Interview", "select")
+        return [str(row['id']) for row in response.data or []
+                if not row.get('generating') and row.get('question_count')
+                and (row.get('answered_count') or 0) >= row['question_count']]
+
+    async def finishStaleGenerating(self, olderThan: float) -> List[dict]:
+        """Clear ``generating`` on interviews created more than ``olderThan`` seconds ago."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=olderThan)).isoformat()
+        response = await self.run(
+            lambda db: db.table("Interview").update({"generating": False}).eq("generating", True).lt("created_at", cutoff),
+            "Interview", "update",
+        )
+        return response.data or []
+
+    async def updateInterview(self, id: str, values: dict) -> Optional[dict]:
+        response = await self.run(lambda db: db.table("Interview").update(values).eq("id", id), "Interview", "update")
+        return response.data[0] if response.data else None
+
+    async def answerQuestion(self, id: str, creator: str, index: int, question: str, answer: str) -> dict:
+        """Atomically record one answer (see migrations/002_answer_question.sql).
+
+        Returns ``{"status", "remaining", "generating", "next_index", "next_question"}`` where
+        status is one of ok, not_found, forbidden, invalid_index, mismatch,
+        answered; the other keys are only present when it is ok.
+        """
+        params = {"p_id": id, "p_creator": creator, "p_index": index, "p_question": question, "p_answer": answer}
+        response = await self.run(lambda db: db.rpc("answer_question", params), "answer_question", "rpc")
+        return response.data
+
+    async def answerQuestions(self, id: str, creator: str, answers: List[dict]) -> dict:
+        """Record several answers in one call (see migrations/006_answer_questions.sql).
+
+        ``answers`` holds ``{"index", "question", "answer"}`` items. Items that
+        do not match an unanswered question are listed in ``skipped``; the
+        other keys are the same as answerQuestion's.
+        """
+        params = {"p_id": id, "p_creator": creator, "p_answers": answers}
+        response = await self.run(lambda db: db.rpc("answer_questions", params), "answer_questions", "rpc")
+        return response.data
+
+    async def appendQuestions(self, id: str, questions: list, done: bool) -> dict:
+        """Append generated questions to an interview (see migrations/005_streamed_questions.sql).
+
+        ``done`` marks generation finished. Returns the same keys as
+        answerQuestion.
+        """
+        params = {"p_id": id, "p_questions": questions, "p_done": done}
+        response = await self.run(lambda db: db.rpc("append_questions", params), "append_questions", "rpc")
+        return response.data
+
+    async def claimReview(self, id: str, lease: float) -> bool:
+        """Take the right to generate ``id``'s reviews (see migrations/008_review_claims.sql).
+
+        False when the reviews exist, questions are still generating, or
+        another worker claimed it less than ``lease`` seconds ago.
+        """
+        params = {"p_id": id, "p_lease": lease}
+        response = await self.run(lambda db: db.rpc("claim_review", params), "claim_review", "rpc")
+        return bool(response.data)
+
+    async def releaseReview(self, id: str) -> None:
+        """Drop a review claim so the job can be retried before the lease runs out."""
+        await self.run(
+            lambda db: db.table("Interview").update({"review_started_at": None}).eq("id", id).is_("reviews", "null"),
+            "Interview", "update",
+        )
+
+    async def saveReviews(self, id: str, reviews: list) -> Optional[dict]:
+        """Store reviews unless another worker already did; reviews are write-once."""
+        response = await self.run(
+            lambda db: db.table("Interview").update({"reviews": reviews}).eq("id", id).is_("reviews", "null"),
+            "Interview", "update",
+        )
+        return response.data[0] if response.data else None
+
+    async def getResumeByHash(self, creator: str, contentHash: str) -> Optional[dict]:
+        response = await self.run(
+            lambda db: db.table("Resume").select("id", "pages", "characters").eq("creator", creator).eq("content_hash", contentHash),
+            "Resume", "select",
+        )
+        return response.data[0] if response.data else None
+
+    async def getResume(self, id: int, *columns: str) -> Optional[dict]:
+        response = await self.run(lambda db: db.table("Resume").select(*(columns or ("*",))).eq("id", id), "Resume", "select")
+        return response.data[0] if response.data else None
+
+    async def saveResume(self, resume: dict) -> Optional[dict]:
+        """Insert a resume, or return the one a concurrent identical upload stored first."""
+        response = await self.run(
+            lambda db: db.table("Resume").upsert(resume, on_conflict="creator,content_hash"), "Resume", "upsert"
+        )
+        return response.data[0] if response.data else None
+
+    async def saveFeedback(self, interviewId: str, questionNum: int, content: str, done: bool) -> None:
+        row = {"interview_id": interviewId, "question_num": questionNum, "content": content, "done": done}
+        await self.run(lambda db: db.table("Feedback").upsert(row, on_conflict="interview_id,question_num"), "Feedback", "upsert")
+
+    async def getFeedback(self, interviewId: str, questionNum: int) -> Optional[dict]:
+        response = await self.run(
+            lambda db: db.table("Feedback").select("content", "done").eq("interview_id", interviewId).eq("question_num", questionNum),
+            "Feedback", "select",
+        )
+        return response.data[0] if response.data else None
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        if self.http is not None:
+            self.http.close()
+            self.http = None
+            self.client = None
+
+
+repo = Repository()
@@ -0,0 +1,98 @@
+"""Resume uploads: streamed to disk, text extracted off the event loop, stored once per content.
+
+The request body is the raw file (``application/pdf`` or ``text/plain``).
+It is hashed while it is written, so a repeat upload is recognised before
+any parsing, and PDF parsing runs in a process pool because pypdf is pure
+Python and would otherwise hold the GIL for the whole document.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request
+
+from config import RESUME_MAX_BYTES, RESUME_WORKERS, RESUME_QUEUE_LIMIT, RESUME_UPLOAD_DIR
+from pools import BoundedPool
+from textprep import dropNoise, normalize
+
+CONTENT_TYPES = {"application/pdf": "pdf", "text/plain": "text"}
+WRITE_CHUNK = 1024 * 1024
+
+# Module-level so it can be pickled into a process pool.
+def extractText(path: str, kind: str) -> dict:
+    """Normalised text of the file at ``path``, with its page count for PDFs."""
+    pages = None
+    if kind == "pdf":
+        try:
+            from pypdf import PdfReader
+            from pypdf.errors import PdfReadError
+        except ImportError:
+            raise ImportError("PDF resumes require the 'pypdf' package")
+        try:
+            reader = PdfReader(path)
+            parts = [page.extract_text() or "" for page in reader.pages]
+        except PdfReadError as e:
+            raise ValueError(f"Unreadable PDF: {str(e)}")
+        except Exception as e:
+            # pypdf raises all sorts on malformed files; none of them are server faults.
+            raise ValueError(f"Unreadable PDF: {type(e).__name__}")
+        pages = len(parts)
+        text = "\n".join(parts)
+    else:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    return {"text": dropNoise(normalize(text)), "pages": pages}
+
+
+@dataclass
+class Upload:
+    path: str
+    kind: str
+    digest: str
+    size: int
+
+    async def discard(self):
+        await asyncio.to_thread(os.unlink, self.path)
+
+
+async def receiveUpload(request: Request, maxBytes: int = RESUME_MAX_BYTES) -> Upload:
+    """Stream the request body to a temporary file, hashing it and enforcing ``maxBytes``."""
+    kind = CONTENT_TYPES.get(request.headers.get("content-type", "").split(";")[0].strip().lower())
+    if kind is None:
+        raise HTTPException(status_code=415, detail="Upload a PDF or plain-text resume")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > maxBytes:
+        raise HTTPException(status_code=413, detail=f"Resumes are limited to {maxBytes} bytes")
+
+    fd, path = tempfile.mkstemp(prefix="resume-", dir=RESUME_UPLOAD_DIR)
+    f = os.fdopen(fd, "wb")
+    digest, size, buffer = hashlib.sha256(), 0, bytearray()
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > maxBytes:
+                raise HTTPException(status_code=413, detail=f"Resumes are limited to {maxBytes} bytes")
+            digest.update(chunk)
+            buffer += chunk
+            if len(buffer) >= WRITE_CHUNK:
+                await asyncio.to_thread(f.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await asyncio.to_thread(f.write, bytes(buffer))
+        await asyncio.to_thread(f.close)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty upload")
+        if kind == "pdf":
+            with open(path, "rb") as head:
+                if head.read(5) != b"%PDF-":
+                    raise HTTPException(status_code=415, detail="File is not a PDF")
+    except BaseException:
+        f.close()
+        await asyncio.to_thread(os.unlink, path)
+        raise
+    return Upload(path, kind, digest.hexdigest(), size)
+
+
+extractionPool = BoundedPool(RESUME_WORKERS, RESUME_QUEUE_LIMIT, kind="process", name="extract")
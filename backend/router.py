@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import LLM_TTFT, LLM_DURATION, LLM_ERRORS, LLM_HEDGES, recordUsage
+from deadlines import DeadlineExceeded, budget
+from config import ROUTER_WINDOW, ROUTER_HORIZON, ROUTER_MAX_TTFT, ROUTER_MAX_ERROR_RATE, FIRST_TOKEN_TIMEOUT
+from config import BREAKER_THRESHOLD, BREAKER_COOLDOWN, HEDGE_MIN_SAMPLES
+
+logger = logging.getLogger(__name__)
+
+class ModelStats:
+    """Rolling time-to-first-token, call duration and error rate over recent calls.
+
+    Only the last ``window`` calls younger than ``horizon`` seconds count, so
+    a demoted model is retried once its bad samples age out.
+    """
+
+    def __init__(self, window: int = ROUTER_WINDOW, horizon: float = ROUTER_HORIZON):
+        self.horizon = horizon
+        self.samples: deque = deque(maxlen=window)
+
+    def record(self, ttft: Optional[float] = None, error: bool = False, duration: Optional[float] = None):
+        self.samples.append((time.monotonic(), ttft, error, duration))
+
+    def recent(self) -> List[tuple]:
+        cutoff = time.monotonic() - self.horizon
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        return list(self.samples)
+
+    @property
+    def avgTtft(self) -> Optional[float]:
+        ttfts = [ttft for _, ttft, _, _ in self.recent() if ttft is not None]
+        return sum(ttfts) / len(ttfts) if ttfts else None
+
+    @property
+    def errorRate(self) -> float:
+        samples = self.recent()
+        return sum(error for _, _, error, _ in samples) / len(samples) if samples else 0.0
+
+    def durationPercentile(self, pct: float, minSamples: int = 1) -> Optional[float]:
+        """Percentile of successful call durations, or None with fewer than ``minSamples``."""
+        durations = sorted(d for _, _, error, d in self.recent() if d is not None and not error)
+        if not durations or len(durations) < minSamples:
+            return None
+        return durations[min(len(durations) - 1, int(pct / 100 * len(durations)))]
+
+    def asdict(self) -> dict:
+        return {"calls": len(self.recent()), "avg_ttft_s": self.avgTtft, "error_rate": self.errorRate,
+                "p95_s": self.durationPercentile(95)}
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retryAfter: float):
+        super().__init__(f"Model provider unavailable, retry in {retryAfter:.0f}s")
+        self.retryAfter = retryAfter
+
+
+class CircuitBreaker:
+    """Stops calling the provider after ``threshold`` consecutive failures.
+
+    While open every call fails at once with CircuitOpenError. After
+    ``cooldown`` seconds one probe call is let through: success closes the
+    breaker, failure opens it for another cooldown.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.openedAt: Optional[float] = None
+        self.probeAt: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.openedAt is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.openedAt >= self.cooldown else "open"
+
+    def check(self):
+        if self.openedAt is None:
+            return
+        now = time.monotonic()
+        # A probe that never reported back (e.g. cancelled) frees its turn after a cooldown.
+        if now - self.openedAt >= self.cooldown and (self.probeAt is None or now - self.probeAt >= self.cooldown):
+            self.probeAt = now
+            return
+        raise CircuitOpenError(max(1.0, self.cooldown - (now - self.openedAt)))
+
+    def failFast(self):
+        """Raise CircuitOpenError while open, without using up the probe."""
+        if self.state == "open":
+            raise CircuitOpenError(max(1.0, self.cooldown - (time.monotonic() - self.openedAt)))
+
+    def success(self):
+        self.failures = 0
+        self.openedAt = None
+        self.probeAt = None
+
+    def failure(self):
+        self.failures += 1
+        if self.probeAt is not None or self.failures >= self.threshold:
+            if self.openedAt is None:
+                logger.warning(f"Circuit opened after {self.failures} consecutive model failures")
+            self.openedAt = time.monotonic()
+            self.probeAt = None
+
+
+class ModelRouter:
+    """Maps each task to an ordered tier of models and fails over between them.
+
+    A model whose rolling TTFT or error rate crosses its threshold is tried
+    after the healthy ones until it recovers. Streams only fail over before
+    their first token, so the client never sees a restarted answer. Every
+    call is bounded by the request deadline, and a circuit breaker fails
+    calls fast while the provider keeps failing.
+    """
+
+    def __init__(self, tiers: Dict[str, List[str]], factory: Callable[[str], Any],
+                 maxTtft: float = ROUTER_MAX_TTFT, maxErrorRate: float = ROUTER_MAX_ERROR_RATE,
+                 firstTokenTimeout: float = FIRST_TOKEN_TIMEOUT, breaker: Optional[CircuitBreaker] = None):
+        self.tiers = tiers
+        self.factory = factory
+        self.maxTtft = maxTtft
+        self.maxErrorRate = maxErrorRate
+        self.firstTokenTimeout = firstTokenTimeout
+        self.breaker = breaker or CircuitBreaker()
+        self.models: Dict[str, Any] = {}
+        self.runnables: Dict[Tuple, Any] = {}
+        self.stats: Dict[str, ModelStats] = {}
+
+    def model(self, name: str):
+        if name not in self.models:
+            self.models[name] = self.factory(name)
+        return self.models[name]
+
+    def structured(self, name: str, schema, **kwargs):
+        """Structured-output runnable for ``name``, built once and reused."""
+        key = (name, schema, tuple(sorted(kwargs.items())))
+        if key not in self.runnables:
+            self.runnables[key] = self.model(name).with_structured_output(schema, **kwargs)
+        return self.runnables[key]
+
+    def primary(self, task: str) -> str:
+        return self.tiers[task][0]
+
+    def statsFor(self, name: str) -> ModelStats:
+        if name not in self.stats:
+            self.stats[name] = ModelStats()
+        return self.stats[name]
+
+    def healthy(self, name: str) -> bool:
+        stats = self.statsFor(name)
+        slow = stats.avgTtft is not None and stats.avgTtft > self.maxTtft
+        return not slow and stats.errorRate <= self.maxErrorRate
+
+    def candidates(self, task: str) -> List[str]:
+        tier = self.tiers[task]
+        return [m for m in tier if self.healthy(m)] + [m for m in tier if not self.healthy(m)]
+
+    def _failed(self, task: str, name: str, ttft: Optional[float] = None):
+        self.statsFor(name).record(ttft=ttft, error=True)
+        self.breaker.failure()
+        LLM_ERRORS.inc(task, name)
+
+    async def _call(self, task: str, name: str, prompt: str, schema, kwargs: dict):
+        runnable = self.structured(name, schema, **kwargs) if schema else self.model(name)
+        timeout = budget()
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(runnable.ainvoke(prompt), timeout)
+        except asyncio.TimeoutError:
+            # Only the request's deadline bounds this wait (the client enforces
+            # LLM_TIMEOUT itself), so running out of it says nothing about the
+            # provider and must not count towards the breaker.
+            raise DeadlineExceeded(f"{task} call to {name} ran out of time after {timeout:.1f}s")
+        except Exception:
+            self._failed(task, name)
+            raise
+        duration = time.monotonic() - start
+        self.statsFor(name).record(duration=duration)
+        self.breaker.success()
+        LLM_DURATION.observe(duration, task, name)
+        recordUsage(task, name, result.get("raw") if isinstance(result, dict) else result)
+        return result
+
+    async def _hedged(self, task: str, name: str, prompt: str, schema, kwargs: dict,
+                      allowHedge: Callable[[], Awaitable[bool]]):
+        """Send a second identical request if the first outlives the model's p95."""
+        delay = self.statsFor(name).durationPercentile(95, HEDGE_MIN_SAMPLES)
+        first = asyncio.ensure_future(self._call(task, name, prompt, schema, kwargs))
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done or not await allowHedge():
+            return await first
+        LLM_HEDGES.inc(task, name)
+        pending = {first, asyncio.ensure_future(self._call(task, name, prompt, schema, kwargs))}
+        lastError: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for call in done:
+                    if call.exception() is None:
+                        return call.result()
+                    lastError = call.exception()
+            raise lastError
+        finally:
+            for call in pending:
+                call.cancel()
+
+    async def invoke(self, task: str, prompt: str, schema=None,
+                     hedge: Optional[Callable[[], Awaitable[bool]]] = None,
+                     charge: Optional[Callable[[], Awaitable[Any]]] = None, **kwargs):
+        """Call the task's models in order until one answers.
+
+        ``charge`` is awaited before every attempt, failovers included, to
+        take the request from the rate budget. ``hedge`` is for idempotent
+        calls only: it is asked whether the rate budget allows a duplicate
+        request once a call outlives its p95.
+        """
+        lastError: Optional[Exception] = None
+        for name in self.candidates(task):
+            # Checked once per attempt: in half-open the check takes the probe.
+            self.breaker.check()
+            if charge is not None:
+                await charge()
+            try:
+                if hedge is not None:
+                    return await self._hedged(task, name, prompt, schema, kwargs, hedge)
+                return await self._call(task, name, prompt, schema, kwargs)
+            except (CircuitOpenError, DeadlineExceeded):
+                raise
+            except Exception as e:
+                logger.warning(f"{task} call to {name} failed, trying fallback: {type(e).__name__}: {str(e)}")
+                lastError = e
+        raise lastError
+
+    async def stream(self, task: str, prompt: str,
+                     charge: Optional[Callable[[], Awaitable[Any]]] = None) -> AsyncIterator[str]:
+        lastError: Optional[Exception] = None
+        for name in self.candidates(task):
+            self.breaker.check()
+            if charge is not None:
+                await charge()
+            timeout = budget(self.firstTokenTimeout)
+            upstream = self.model(name).astream(prompt).__aiter__()
+            start = time.monotonic()
+            try:
+                first = await asyncio.wait_for(upstream.__anext__(), timeout)
+            except StopAsyncIteration:
+                self.statsFor(name).record(ttft=time.monotonic() - start)
+                self.breaker.success()
+                return
+            except asyncio.TimeoutError as e:
+                await upstream.aclose()
+                if self.firstTokenTimeout is None or timeout < self.firstTokenTimeout:
+                    # The request's deadline was the binding limit, not the provider.
+                    raise DeadlineExceeded(f"{task} stream from {name} ran out of time before its first token")
+                self._failed(task, name, ttft=time.monotonic() - start)
+                logger.warning(f"{task} stream from {name} sent no token within {timeout:.1f}s")
+                lastError = e
+                continue
+            except Exception as e:
+                self._failed(task, name, ttft=time.monotonic() - start)
+                logger.warning(f"{task} stream from {name} failed before first token: {type(e).__name__}")
+                await upstream.aclose()
+                lastError = e
+                continue
+            self.statsFor(name).record(ttft=time.monotonic() - start)
+            self.breaker.success()
+            LLM_TTFT.observe(time.monotonic() - start, task, name)
+            recordUsage(task, name, first)
+            yield first.content
+            try:
+                while True:
+                    chunk = await asyncio.wait_for(upstream.__anext__(), budget())
+                    recordUsage(task, name, chunk)
+                    yield chunk.content
+            except StopAsyncIteration:
+                pass
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"{task} stream from {name} ran out of time")
+            finally:
+                await upstream.aclose()
+            LLM_DURATION.observe(time.monotonic() - start, task, name)
+            return
+        raise lastError
+
+    def snapshot(self) -> dict:
+        return {
+            "tiers": self.tiers,
+            "breaker": {"state": self.breaker.state, "consecutive_failures": self.breaker.failures},
+            "models": {name: dict(stats.asdict(), healthy=self.healthy(name)) for name, stats in self.stats.items()},
+        }
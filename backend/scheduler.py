@@ -0,0 +1,135 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Dict, List
+
+from fastapi import HTTPException
+
+from metrics import SCHEDULER_WAIT
+from config import LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_RETRY_AFTER
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # live answer feedback streams
+    STANDARD = 1     # question generation a user is waiting on
+    BATCH = 2        # background reviews
+
+
+class WaitStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, waited: float):
+        self.count += 1
+        self.total += waited
+        self.max = max(self.max, waited)
+
+    def asdict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_wait_s": self.total / self.count if self.count else 0.0,
+            "max_wait_s": self.max,
+        }
+
+
+class LLMScheduler:
+    """Process-wide gate in front of every Together call.
+
+    At most ``maxConcurrent`` calls run at once; the rest wait in a priority
+    queue (FIFO within a class). When ``maxQueue`` callers of the same or
+    higher priority are already waiting, new work is rejected straight away
+    with a 503; lower-priority waiters never count against it.
+    """
+
+    def __init__(self, maxConcurrent: int = LLM_MAX_CONCURRENCY, maxQueue: int = LLM_MAX_QUEUE,
+                 retryAfter: int = LLM_RETRY_AFTER):
+        self.maxConcurrent = maxConcurrent
+        self.maxQueue = maxQueue
+        self.retryAfter = retryAfter
+        self.active = 0
+        self.waiters: List[tuple] = []
+        self.seq = itertools.count()
+        self.waits: Dict[Priority, WaitStats] = {p: WaitStats() for p in Priority}
+        self.rejected = 0
+
+    @property
+    def queueDepth(self) -> int:
+        return len(self.waiters)
+
+    def waitingAhead(self, priority: Priority) -> int:
+        """Waiters that would be served before a new ``priority`` caller."""
+        return sum(1 for p, _, future in self.waiters if p <= priority and not future.done())
+
+    def admit(self, priority: Priority = Priority.INTERACTIVE):
+        """Fail fast when the queue is full, before any work is started."""
+        if self.active >= self.maxConcurrent and self.waitingAhead(priority) >= self.maxQueue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Model capacity exhausted, retry shortly",
+                headers={"Retry-After": str(self.retryAfter)},
+            )
+
+    def slot(self, priority: Priority, reject: bool = True) -> "Slot":
+        if reject:
+            self.admit(priority)
+        return Slot(self, priority)
+
+    async def _acquire(self, priority: Priority):
+        enqueued = time.monotonic()
+        if self.active < self.maxConcurrent and not self.waiters:
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            entry = (int(priority), next(self.seq), future)
+            heapq.heappush(self.waiters, entry)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release()
+                elif entry in self.waiters:
+                    # _release may already have popped this cancelled future.
+                    self.waiters.remove(entry)
+                    heapq.heapify(self.waiters)
+                raise
+        waited = time.monotonic() - enqueued
+        self.waits[priority].record(waited)
+        SCHEDULER_WAIT.observe(waited, priority.name.lower())
+
+    def _release(self):
+        while self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queue_depth": self.queueDepth,
+            "rejected": self.rejected,
+            "wait": {p.name.lower(): self.waits[p].asdict() for p in Priority},
+        }
+
+
+class Slot:
+    def __init__(self, scheduler: LLMScheduler, priority: Priority):
+        self.scheduler = scheduler
+        self.priority = priority
+
+    async def __aenter__(self):
+        await self.scheduler._acquire(self.priority)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.scheduler._release()
+        return False
+
+
+scheduler = LLMScheduler()
@@ -0,0 +1,181 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import List, Optional
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+
+from config import DEADLINE_FEEDBACK, QUESTION_WAIT, WS_FLUSH_ANSWERS, WS_FLUSH_INTERVAL
+from deadlines import deadline
+from jobs import reviewJobs
+from repository import repo
+from router import CircuitOpenError
+from scheduler import scheduler, Priority
+from streams import feedbackStreams, HEARTBEAT
+from together import createResponse, router
+
+logger = logging.getLogger(__name__)
+
+# answer_questions statuses that reject a whole flush, as HTTP statuses.
+REJECTED = {"not_found": 404, "forbidden": 403}
+
+
+class AnswersRejected(HTTPException):
+    """The database refused answers the client had already been told were accepted."""
+
+    def __init__(self, status: str, answers: List[int]):
+        super().__init__(status_code=REJECTED.get(status, 409), detail=f"Answers were not saved: {status}")
+        self.answers = answers
+
+
+class InterviewSession:
+    """One candidate's interview held in memory for the life of a WebSocket.
+
+    The row is read once when the session opens (and again only while
+    questions are still being generated). Answers are checked against the
+    in-memory copy and written back ``WS_FLUSH_ANSWERS`` at a time, after
+    ``WS_FLUSH_INTERVAL`` seconds, on the last answer, or on disconnect. If
+    the database rejects a write, the client gets an ``error`` listing the
+    lost answers and the socket is closed with 4000 + the HTTP status.
+
+    Messages are JSON. The client sends ``{"type": "answer", "answerNum",
+    "question", "answerData"}`` or ``{"type": "next"}``; the server sends
+    ``question``, ``feedback`` (one per chunk), ``feedback_end``,
+    ``generating``, ``done``, ``ping`` and ``error``.
+    """
+
+    def __init__(self, id: str, creator: str, interview: dict,
+                 flushAnswers: int = WS_FLUSH_ANSWERS, flushInterval: float = WS_FLUSH_INTERVAL):
+        self.id = str(id)
+        self.creator = creator
+        self.questions: List[dict] = (interview.get('questions') or {}).get('data', [])
+        self.generating = bool(interview.get('generating'))
+        self.flushAnswers = flushAnswers
+        self.flushInterval = flushInterval
+        self.pending: List[dict] = []
+        self.pendingSince = 0.0
+
+    def nextIndex(self) -> Optional[int]:
+        return next((i for i, q in enumerate(self.questions) if q.get('answer') is None), None)
+
+    async def refresh(self):
+        """Wait up to QUESTION_WAIT for questions that are still being generated."""
+        waitUntil = time.monotonic() + QUESTION_WAIT
+        while self.generating and self.nextIndex() is None and time.monotonic() < waitUntil:
+            await asyncio.sleep(0.5)
+            interview = await repo.getInterview(self.id, 'questions', 'generating') or {}
+            questions = (interview.get('questions') or {}).get('data', [])
+            for item in self.pending:
+                questions[item['index']]['answer'] = item['answer']
+            self.questions, self.generating = questions, bool(interview.get('generating'))
+
+    async def flush(self):
+        if not self.pending:
+            return
+        answers, self.pending = self.pending, []
+        try:
+            result = await repo.answerQuestions(self.id, self.creator, answers)
+        except Exception as e:
+            self.pending = answers + self.pending
+            logger.error(f"Failed to save {len(answers)} answers for interview {self.id}: {str(e)}")
+            return
+        status = (result or {}).get('status')
+        if status != 'ok':
+            logger.error(f"Saving answers for interview {self.id} returned {status}")
+            raise AnswersRejected(status, [item['index'] for item in answers])
+        if result.get('skipped'):
+            # Another client answered these first; its answers stand.
+            logger.warning(f"Answers {result['skipped']} for interview {self.id} were already recorded")
+        if result.get('remaining') == 0 and not result.get('generating'):
+            reviewJobs.enqueue(self.id)
+
+    async def sendQuestion(self, websocket: WebSocket):
+        if self.nextIndex() is None and self.generating:
+            await self.refresh()
+        index = self.nextIndex()
+        if index is not None:
+            await websocket.send_json({"type": "question", "question_index": index + 1,
+                                       "question": self.questions[index]['question']})
+        elif self.generating:
+            await websocket.send_json({"type": "generating", "retry_after": 1})
+        else:
+            await websocket.send_json({"type": "done"})
+
+    def record(self, message: dict) -> dict:
+        """Validate an answer against the in-memory interview and queue it for writing."""
+        index, question, answer = message.get('answerNum'), message.get('question'), message.get('answerData')
+        if not isinstance(index, int) or not isinstance(answer, str):
+            raise HTTPException(status_code=400, detail="answerNum and answerData are required")
+        if index < 0 or index >= len(self.questions):
+            raise HTTPException(status_code=400, detail="Invalid question index")
+        if self.questions[index]['question'] != question:
+            raise HTTPException(status_code=400, detail="Question text mismatch")
+        if self.questions[index].get('answer') is not None:
+            raise HTTPException(status_code=400, detail="Question already answered")
+        self.questions[index]['answer'] = answer
+        if not self.pending:
+            self.pendingSince = time.monotonic()
+        item = {"index": index, "question": question, "answer": answer}
+        self.pending.append(item)
+        return item
+
+    async def answer(self, websocket: WebSocket, message: dict):
+        scheduler.admit(Priority.INTERACTIVE)
+        router.breaker.failFast()
+        item = self.record(message)
+        if len(self.pending) >= self.flushAnswers or (self.nextIndex() is None and not self.generating):
+            await self.flush()
+
+        with deadline(DEADLINE_FEEDBACK):
+            stream = feedbackStreams.start(
+                self.id, item['index'], createResponse(answer=item['answer'], question=item['question'])
+            )
+        async with contextlib.aclosing(feedbackStreams.subscribe(stream)) as chunks:
+            async for chunk in chunks:
+                await websocket.send_json({"type": "ping"} if chunk == HEARTBEAT else {"type": "feedback", "data": chunk})
+        await websocket.send_json({"type": "feedback_end", "answerNum": item['index']})
+        await self.sendQuestion(websocket)
+
+    async def receive(self, websocket: WebSocket) -> dict:
+        """Next client message, flushing buffered answers once they are due."""
+        while True:
+            timeout = None
+            if self.pending:
+                timeout = max(0.0, self.pendingSince + self.flushInterval - time.monotonic())
+            try:
+                return await asyncio.wait_for(websocket.receive_json(), timeout)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    async def run(self, websocket: WebSocket):
+        try:
+            await self.sendQuestion(websocket)
+            while True:
+                try:
+                    message = await self.receive(websocket)
+                    if message.get('type') == 'answer':
+                        await self.answer(websocket, message)
+                    elif message.get('type') == 'next':
+                        await self.sendQuestion(websocket)
+                    else:
+                        raise HTTPException(status_code=400, detail="Unknown message type")
+                except AnswersRejected as e:
+                    await websocket.send_json({"type": "error", "status": e.status_code, "detail": e.detail,
+                                               "answerNums": e.answers})
+                    await websocket.close(code=4000 + e.status_code, reason=e.detail)
+                    return
+                except HTTPException as he:
+                    await websocket.send_json({"type": "error", "status": he.status_code, "detail": he.detail})
+                except CircuitOpenError as e:
+                    await websocket.send_json({"type": "error", "status": 503, "detail": str(e),
+                                               "retry_after": e.retryAfter})
+                except ValueError:
+                    await websocket.send_json({"type": "error", "status": 400, "detail": "Messages must be JSON"})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            try:
+                await self.flush()
+            except AnswersRejected:
+                pass  # Logged in flush; the client is already gone.
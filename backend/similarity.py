@@ -0,0 +1,146 @@
+"""Near-duplicate index of (question, answer) pairs for reusing model output.
+
+Answers are normalised, cut into word shingles and MinHashed; signatures
+are split into LSH bands so only answers sharing a band with the query
+are compared. Matches are restricted to the same normalised question, so
+feedback is never reused across questions.
+"""
+import hashlib
+import random
+import re
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from config import ANSWER_INDEX_THRESHOLD, ANSWER_INDEX_MAX_ENTRIES, ANSWER_INDEX_TTL
+from config import ANSWER_INDEX_PERMUTATIONS, ANSWER_INDEX_BANDS
+from metrics import ANSWER_INDEX_LOOKUPS
+
+PRIME = (1 << 61) - 1
+SHINGLE = 3
+
+
+def normalizeAnswer(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = re.sub(r"['’]", "", text)
+    return " ".join(re.findall(r"\w+", text))
+
+
+def shingles(text: str) -> Set[str]:
+    words = text.split()
+    if len(words) <= SHINGLE:
+        return {text}
+    return {" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+@dataclass
+class Entry:
+    bucketKeys: List[Hashable]
+    signature: Tuple[int, ...]
+    value: Any
+    expiresAt: float
+
+
+class AnswerIndex:
+    """MinHash/LSH index returning stored output for answers above ``threshold`` similarity.
+
+    Entries expire after ``ttl`` seconds and the least recently used are
+    evicted beyond ``maxEntries``; ``maxEntries=0`` disables the index.
+    Not thread-safe: it is only touched from the event loop.
+    """
+
+    def __init__(self, threshold: float = ANSWER_INDEX_THRESHOLD, maxEntries: int = ANSWER_INDEX_MAX_ENTRIES,
+                 ttl: float = ANSWER_INDEX_TTL, permutations: int = ANSWER_INDEX_PERMUTATIONS,
+                 bands: int = ANSWER_INDEX_BANDS, seed: int = 1):
+        if permutations % bands:
+            raise ValueError("permutations must be a multiple of bands")
+        self.threshold = threshold
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.bands = bands
+        self.rows = permutations // bands
+        rng = random.Random(seed)
+        self.coefficients = [(rng.randrange(1, PRIME), rng.randrange(PRIME)) for _ in range(permutations)]
+        self.entries: "OrderedDict[int, Entry]" = OrderedDict()
+        self.buckets: Dict[Hashable, Set[int]] = defaultdict(set)
+        self.nextId = 0
+        self.lookups: Dict[str, int] = defaultdict(int)
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxEntries > 0
+
+    def signature(self, answer: str) -> Tuple[int, ...]:
+        hashes = [_hash(s) for s in shingles(normalizeAnswer(answer))]
+        return tuple(min((a * h + b) % PRIME for h in hashes) for a, b in self.coefficients)
+
+    def _bucketKeys(self, kind: str, question: str, signature: Tuple[int, ...]) -> List[Hashable]:
+        scope = (kind, normalizeAnswer(question))
+        return [(scope, band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def _remove(self, id: int):
+        entry = self.entries.pop(id)
+        for key in entry.bucketKeys:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def lookup(self, kind: str, question: str, answer: str) -> Optional[Any]:
+        """Stored ``kind`` output for the most similar answer to ``question``, or None."""
+        if not self.enabled:
+            return None
+        self.lookups[kind] += 1
+        signature = self.signature(answer)
+        candidates: Set[int] = set()
+        for key in self._bucketKeys(kind, question, signature):
+            candidates |= self.buckets.get(key, set())
+        now = time.time()
+        best, bestScore = None, 0.0
+        for id in candidates:
+            entry = self.entries[id]
+            if entry.expiresAt <= now:
+                self._remove(id)
+                continue
+            score = sum(x == y for x, y in zip(signature, entry.signature)) / len(signature)
+            if score > bestScore:
+                best, bestScore = id, score
+        if best is None or bestScore < self.threshold:
+            ANSWER_INDEX_LOOKUPS.inc(kind, "miss")
+            return None
+        self.entries.move_to_end(best)
+        self.hits[kind] += 1
+        ANSWER_INDEX_LOOKUPS.inc(kind, "hit")
+        return self.entries[best].value
+
+    def add(self, kind: str, question: str, answer: str, value: Any):
+        if not self.enabled:
+            return
+        signature = self.signature(answer)
+        keys = self._bucketKeys(kind, question, signature)
+        id, self.nextId = self.nextId, self.nextId + 1
+        self.entries[id] = Entry(keys, signature, value, time.time() + self.ttl)
+        for key in keys:
+            self.buckets[key].add(id)
+        while len(self.entries) > self.maxEntries:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        kinds = {}
+        for kind, lookups in self.lookups.items():
+            kinds[kind] = {"lookups": lookups, "hits": self.hits[kind], "hit_rate": self.hits[kind] / lookups,
+                           "model_calls_saved": self.hits[kind]}
+        return {"entries": len(self.entries), "evictions": self.evictions, "threshold": self.threshold, **kinds}
+
+
+answerIndex = AnswerIndex()
@@ -0,0 +1,343 @@
+"""Local stand-ins for the external services, used by benchmarks and the load test.
+
+Nothing in here is imported by the app itself.
+"""
+import asyncio
+import copy
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from models import Questions
+
+
+class FakeResponse:
+    def __init__(self, data: List[dict]):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, db: "InMemorySupabase", table: str):
+        self.db = db
+        self.table = table
+        self.columns: Optional[List[str]] = None
+        self.filters = []
+        self.action = "select"
+        self.payload: Any = None
+        self.orderBy = None
+        self.limitTo: Optional[int] = None
+
+    def select(self, *columns: str):
+        cols = [c.strip() for col in columns for c in col.split(",")]
+        self.columns = None if cols in ([], ["*"]) else cols
+        return self
+
+    def insert(self, rows):
+        self.action = "insert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id"):
+        self.action = "upsert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        self.conflictKeys = [c.strip() for c in on_conflict.split(",")]
+        return self
+
+    def update(self, values: dict):
+        self.action = "update"
+        self.payload = values
+        return self
+
+    def eq(self, column: str, value):
+        self.filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def lt(self, column: str, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def is_(self, column: str, value):
+        expected = None if value in (None, "null") else value
+        self.filters.append(lambda row: row.get(column) is expected)
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self.orderBy = (column, desc)
+        return self
+
+    def limit(self, count: int):
+        self.limitTo = count
+        return self
+
+    def _project(self, row: dict) -> dict:
+        if self.columns is None:
+            return copy.deepcopy(row)
+        return {c: copy.deepcopy(row.get(c)) for c in self.columns}
+
+    def execute(self) -> FakeResponse:
+        self.db.calls += 1
+        self.db.operations[f"{self.table}.{self.action}"] += 1
+        if self.db.latency:
+            time.sleep(self.db.latency)
+        with self.db.lock:
+            rows = self.db.tables.setdefault(self.table, [])
+            if self.action == "insert":
+                created = []
+                for row in self.payload:
+                    row = copy.deepcopy(row)
+                    row.setdefault("id", next(self.db.ids))
+                    row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+                    if self.table == "Interview":
+                        data = (row.get("questions") or {}).get("data", [])
+                        row.setdefault("question_count", len(data))
+                        row.setdefault("answered_count", sum(q.get("answer") is not None for q in data))
+                        row.setdefault("reviewed", row.get("reviews") is not None)
+                        unanswered = [i for i, q in enumerate(data) if q.get("answer") is None]
+                        row.setdefault("next_index", unanswered[0] if unanswered else len(data))
+                        row.setdefault("next_question", data[unanswered[0]]["question"] if unanswered else None)
+                        row.setdefault("generating", False)
+                    rows.append(row)
+                    created.append(copy.deepcopy(row))
+                return FakeResponse(created)
+            if self.action == "upsert":
+                saved = []
+                for row in self.payload:
+                    key = [str(row.get(c)) for c in self.conflictKeys]
+                    existing = next((r for r in rows if [str(r.get(c)) for c in self.conflictKeys] == key), None)
+                    if existing is None:
+                        existing = {"id": next(self.db.ids)}
+                        rows.append(existing)
+                    existing.update(copy.deepcopy(row))
+                    saved.append(copy.deepcopy(existing))
+                return FakeResponse(saved)
+            matched = [row for row in rows if all(f(row) for f in self.filters)]
+            if self.action == "update":
+                for row in matched:
+                    row.update(copy.deepcopy(self.payload))
+                    if "reviews" in row:
+                        row["reviewed"] = row["reviews"] is not None
+                return FakeResponse([copy.deepcopy(row) for row in matched])
+            if self.orderBy:
+                column, desc = self.orderBy
+                matched.sort(key=lambda row: row.get(column), reverse=desc)
+            if self.limitTo is not None:
+                matched = matched[:self.limitTo]
+            return FakeResponse([self._project(row) for row in matched])
+
+
+class FakeRpc:
+    def __init__(self, db: "InMemorySupabase", name: str, params: dict):
+        self.db = db
+        self.fn = getattr(db, f"rpc_{name}")
+        self.name = name
+        self.params = params
+
+    def execute(self) -> FakeResponse:
+        self.db.calls += 1
+        self.db.operations[f"rpc.{self.name}"] += 1
+        if self.db.latency:
+            time.sleep(self.db.latency)
+        with self.db.lock:
+            return FakeResponse(self.fn(**self.params))
+
+
+class InMemorySupabase:
+    """Thread-safe, blocking, in-memory imitation of the supabase client.
+
+    ``latency`` is slept inside ``execute`` to mimic a network round trip,
+    blocking the calling thread exactly like the real client does.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.calls = 0
+        self.operations: Dict[str, int] = defaultdict(int)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: dict) -> FakeRpc:
+        return FakeRpc(self, name, params)
+
+    # Python mirrors of the SQL functions in migrations/, run under the lock.
+    # They reproduce the functions' results, not their locking, so nothing
+    # run against them says whether the SQL itself is free of races.
+
+    def rpc_answer_question(self, p_id, p_creator, p_index, p_question, p_answer) -> dict:
+        row = next((r for r in self.tables.get("Interview", []) if str(r.get("id")) == str(p_id)), None)
+        if row is None:
+            return {"status": "not_found"}
+        if row.get("creator") != p_creator:
+            return {"status": "forbidden"}
+        questions = (row.get("questions") or {}).get("data", [])
+        if p_index < 0 or p_index >= len(questions):
+            return {"status": "invalid_index"}
+        entry = questions[p_index]
+        if entry.get("question") != p_question:
+            return {"status": "mismatch"}
+        if entry.get("answer") is not None:
+            return {"status": "answered"}
+        entry["answer"] = p_answer
+        unanswered = [i for i, q in enumerate(questions) if q.get("answer") is None]
+        row["answered_count"] = row.get("answered_count", 0) + 1
+        row["next_index"] = unanswered[0] if unanswered else len(questions)
+        row["next_question"] = questions[unanswered[0]]["question"] if unanswered else None
+        return {
+            "status": "ok",
+            "remaining": row.get("question_count", len(questions)) - row["answered_count"],
+            "generating": row.get("generating", False),
+            "next_index": row["next_index"],
+            "next_question": row["next_question"],
+        }
+
+    def rpc_answer_questions(self, p_id, p_creator, p_answers) -> dict:
+        row = next((r for r in self.tables.get("Interview", []) if str(r.get("id")) == str(p_id)), None)
+        if row is None:
+            return {"status": "not_found"}
+        if row.get("creator") != p_creator:
+            return {"status": "forbidden"}
+        questions = (row.get("questions") or {}).get("data", [])
+        applied, skipped = 0, []
+        for item in p_answers:
+            index = item["index"]
+            if (index < 0 or index >= len(questions) or questions[index].get("question") != item["question"]
+                    or questions[index].get("answer") is not None):
+                skipped.append(index)
+                continue
+            questions[index]["answer"] = item["answer"]
+            applied += 1
+        unanswered = [i for i, q in enumerate(questions) if q.get("answer") is None]
+        row["answered_count"] = row.get("answered_count", 0) + applied
+        row["next_index"] = unanswered[0] if unanswered else len(questions)
+        row["next_question"] = questions[unanswered[0]]["question"] if unanswered else None
+        return {
+            "status": "ok",
+            "applied": applied,
+            "skipped": skipped,
+            "remaining": row.get("question_count", len(questions)) - row["answered_count"],
+            "generating": row.get("generating", False),
+            "next_index": row["next_index"],
+            "next_question": row["next_question"],
+        }
+
+    def rpc_append_questions(self, p_id, p_questions, p_done) -> dict:
+        row = next((r for r in self.tables.get("Interview", []) if str(r.get("id")) == str(p_id)), None)
+        if row is None:
+            return {"status": "not_found"}
+        data = (row.get("questions") or {}).get("data", [])
+        data = data + [{"question": q, "answer": None} for q in p_questions]
+        row["questions"] = {"data": data}
+        row["question_count"] = len(data)
+        if row.get("next_question") is None and row["next_index"] < len(data):
+            row["next_question"] = data[row["next_index"]]["question"]
+        row["generating"] = not p_done
+        return {
+            "status": "ok",
+            "remaining": row["question_count"] - row["answered_count"],
+            "generating": row["generating"],
+            "next_index": row["next_index"],
+            "next_question": row["next_question"],
+        }
+
+    def rpc_claim_review(self, p_id, p_lease) -> Optional[bool]:
+        row = next((r for r in self.tables.get("Interview", []) if str(r.get("id")) == str(p_id)), None)
+        now = time.time()
+        if row is None or row.get("reviews") is not None or row.get("generating"):
+            return None
+        if row.get("review_started_at") is not None and row["review_started_at"] >= now - p_lease:
+            return None
+        row["review_started_at"] = now
+        return True
+
+
+class FakeStructured:
+    def __init__(self, model: "FakeChatModel", schema, includeRaw: bool):
+        self.model = model
+        self.schema = schema
+        self.includeRaw = includeRaw
+
+    async def ainvoke(self, prompt: str):
+        raw = await self.model.ainvoke(prompt)
+        parsed = self.model.fill(self.schema, prompt)
+        return {"raw": raw, "parsed": parsed, "parsing_error": None} if self.includeRaw else parsed
+
+
+class FakeChatModel:
+    """Imitation of ChatTogether with a controllable latency profile.
+
+    ``latency`` is the time to first token, after which tokens arrive at
+    ``tokensPerSecond``; ``errorRate`` of calls fail before the first token
+    with a ConnectionError, the way a dropped upstream would, and
+    ``slowRate`` of them wait ``slowLatency`` instead, for a latency tail.
+    """
+
+    def __init__(self, name: str = "fake", latency: float = 0.3, tokensPerSecond: float = 80.0,
+                 errorRate: float = 0.0, outputTokens: int = 60, questions: int = 5, seed: Optional[int] = None,
+                 slowRate: float = 0.0, slowLatency: float = 5.0):
+        self.name = name
+        self.latency = latency
+        self.slowRate = slowRate
+        self.slowLatency = slowLatency
+        self.tokensPerSecond = tokensPerSecond
+        self.errorRate = errorRate
+        self.outputTokens = outputTokens
+        self.questions = questions
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    def _usage(self, prompt: str, output: int) -> dict:
+        inputTokens = len(prompt.split())
+        return {"input_tokens": inputTokens, "output_tokens": output, "total_tokens": inputTokens + output}
+
+    async def _start(self):
+        self.calls += 1
+        await asyncio.sleep(self.slowLatency if self.random.random() < self.slowRate else self.latency)
+        if self.random.random() < self.errorRate:
+            self.errors += 1
+            raise ConnectionError(f"{self.name}: injected upstream failure")
+
+    async def ainvoke(self, prompt: str) -> AIMessage:
+        await self._start()
+        await asyncio.sleep(self.outputTokens / self.tokensPerSecond)
+        text = " ".join(f"word{i}" for i in range(self.outputTokens))
+        return AIMessage(content=text, usage_metadata=self._usage(prompt, self.outputTokens))
+
+    def _tokens(self, prompt: str) -> List[str]:
+        if '"questions"' in prompt:
+            # Question prompts ask for JSON, so stream it a few characters at a time.
+            text = json.dumps({"questions": self.fill(Questions, prompt).questions})
+            return [text[i:i + 6] for i in range(0, len(text), 6)]
+        return [f"word{i} " for i in range(self.outputTokens)]
+
+    async def astream(self, prompt: str) -> AsyncIterator[AIMessageChunk]:
+        await self._start()
+        tokens = self._tokens(prompt)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(1 / self.tokensPerSecond)
+            yield AIMessageChunk(content=token)
+        yield AIMessageChunk(content="", usage_metadata=self._usage(prompt, len(tokens)))
+
+    def with_structured_output(self, schema, include_raw: bool = False, **kwargs) -> FakeStructured:
+        return FakeStructured(self, schema, include_raw)
+
+    def fill(self, schema, prompt: str):
+        """Build a plausible instance of one of the app's output schemas."""
+        if schema.__name__ == "Questions":
+            return schema(questions=[f"Question {i}: describe a project you led." for i in range(self.questions)])
+        if schema.__name__ == "BatchReviews":
+            items = [int(i) for i in re.findall(r"### Item (\d+)", prompt)]
+            return schema(reviews=[{"index": i, "review": f"Review of item {i}."} for i in items])
+        raise NotImplementedError(f"FakeChatModel cannot produce {schema.__name__}")
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Tuple
+
+from starlette.responses import StreamingResponse
+
+from config import FEEDBACK_FLUSH_CHARS, FEEDBACK_FLUSH_INTERVAL, FEEDBACK_STALE_AFTER
+from config import FEEDBACK_COALESCE_CHARS, FEEDBACK_COALESCE_INTERVAL, FEEDBACK_HEARTBEAT
+from config import FEEDBACK_ABANDON_GRACE, SLOW_CONSUMER_TIMEOUT
+from metrics import FEEDBACK_ABANDONED, FEEDBACK_SLOW_CONSUMERS
+from repository import repo
+
+logger = logging.getLogger(__name__)
+
+# Yielded by subscribers when nothing happened for a heartbeat interval.
+HEARTBEAT = ""
+
+class FeedbackStream:
+    """One answer's feedback as it is generated, shared by all subscribers."""
+
+    def __init__(self, interviewId: str, questionNum: int):
+        self.interviewId = interviewId
+        self.questionNum = questionNum
+        self.parts: List[str] = []
+        self.length = 0
+        self.done = False
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers = 0
+        self.abandon: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+class FeedbackStreams:
+    """Tees LLM feedback into storage while it streams, and replays it later.
+
+    The upstream generator is consumed by a background task, so the text is
+    persisted even if the client that asked for it goes away; reconnecting
+    clients replay from an offset and then follow the live stream. Once the
+    last subscriber has been gone for ``abandonGrace`` seconds the upstream
+    call is cancelled and whatever was generated is stored as final.
+    """
+
+    def __init__(self, flushChars: int = FEEDBACK_FLUSH_CHARS, flushInterval: float = FEEDBACK_FLUSH_INTERVAL,
+                 coalesceChars: int = FEEDBACK_COALESCE_CHARS, coalesceInterval: float = FEEDBACK_COALESCE_INTERVAL,
+                 heartbeat: float = FEEDBACK_HEARTBEAT, abandonGrace: float = FEEDBACK_ABANDON_GRACE):
+        self.flushChars = flushChars
+        self.flushInterval = flushInterval
+        self.coalesceChars = coalesceChars
+        self.coalesceInterval = coalesceInterval
+        self.heartbeat = heartbeat
+        self.abandonGrace = abandonGrace
+        self.live: Dict[Tuple[str, int], FeedbackStream] = {}
+
+    def start(self, interviewId: str, questionNum: int, source: AsyncIterator[str]) -> FeedbackStream:
+        stream = FeedbackStream(str(interviewId), questionNum)
+        self.live[(stream.interviewId, questionNum)] = stream
+        stream.task = asyncio.create_task(self._pump(stream, source))
+        return stream
+
+    async def _pump(self, stream: FeedbackStream, source: AsyncIterator[str]):
+        flushedLength, flushedAt = 0, time.monotonic()
+        try:
+            async for chunk in source:
+                if not chunk:
+                    continue
+                async with stream.changed:
+                    stream.parts.append(chunk)
+                    stream.length += len(chunk)
+                    stream.changed.notify_all()
+                if (stream.length - flushedLength >= self.flushChars
+                        or time.monotonic() - flushedAt >= self.flushInterval):
+                    await self._flush(stream, done=False)
+                    flushedLength, flushedAt = stream.length, time.monotonic()
+        except asyncio.CancelledError:
+            logger.info(f"Feedback stream {stream.interviewId}/{stream.questionNum} abandoned after {stream.length} chars")
+        except Exception as e:
+            logger.error(f"Feedback stream {stream.interviewId}/{stream.questionNum} failed: {str(e)}")
+        finally:
+            await self._flush(stream, done=True)
+            async with stream.changed:
+                stream.done = True
+                stream.changed.notify_all()
+            self.live.pop((stream.interviewId, stream.questionNum), None)
+
+    async def _flush(self, stream: FeedbackStream, done: bool):
+        try:
+            await repo.saveFeedback(stream.interviewId, stream.questionNum, stream.text, done)
+        except Exception as e:
+            logger.error(f"Failed to persist feedback {stream.interviewId}/{stream.questionNum}: {str(e)}")
+
+    def _attach(self, stream: FeedbackStream):
+        stream.subscribers += 1
+        if stream.abandon is not None:
+            stream.abandon.cancel()
+            stream.abandon = None
+
+    def _detach(self, stream: FeedbackStream):
+        stream.subscribers -= 1
+        if stream.subscribers == 0 and not stream.done:
+            stream.abandon = asyncio.get_running_loop().call_later(self.abandonGrace, self._abandon, stream)
+
+    def _abandon(self, stream: FeedbackStream):
+        stream.abandon = None
+        if stream.subscribers == 0 and not stream.done and stream.task is not None:
+            FEEDBACK_ABANDONED.inc()
+            stream.task.cancel()
+
+    async def subscribe(self, stream: FeedbackStream, offset: int = 0) -> AsyncIterator[str]:
+        """Yield the stream's text from ``offset`` and follow it until done.
+
+        New text is held back until ``coalesceChars`` have built up or the
+        oldest of it is ``coalesceInterval`` old, so one write carries many
+        tokens. HEARTBEAT is yielded after ``heartbeat`` seconds of silence.
+        """
+        self._attach(stream)
+        try:
+            idx, consumed = 0, 0
+            pending, pendingSince = "", 0.0
+            while True:
+                if pending:
+                    timeout = max(0.0, pendingSince + self.coalesceInterval - time.monotonic())
+                else:
+                    timeout = self.heartbeat
+                async with stream.changed:
+                    try:
+                        await asyncio.wait_for(
+                            stream.changed.wait_for(lambda: len(stream.parts) > idx or stream.done), timeout
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    parts, done = stream.parts[idx:], stream.done
+                idx += len(parts)
+                chunk = "".join(parts)
+                start, consumed = consumed, consumed + len(chunk)
+                if consumed > offset:
+                    if not pending:
+                        pendingSince = time.monotonic()
+                    pending += chunk[max(0, offset - start):]
+                    offset = consumed
+                if pending and (done or len(pending) >= self.coalesceChars
+                                or time.monotonic() - pendingSince >= self.coalesceInterval):
+                    yield pending
+                    pending = ""
+                elif not pending and not parts and not done:
+                    yield HEARTBEAT
+                if done:
+                    return
+        finally:
+            self._detach(stream)
+
+    async def replay(self, interviewId: str, questionNum: int, offset: int = 0) -> Optional[AsyncIterator[str]]:
+        """Return an iterator resuming feedback at ``offset``, or None if there is none."""
+        stream = self.live.get((str(interviewId), questionNum))
+        if stream is not None:
+            return self.subscribe(stream, offset)
+        stored = await repo.getFeedback(interviewId, questionNum)
+        if stored is None:
+            return None
+        return self._follow(interviewId, questionNum, stored, offset)
+
+    async def _follow(self, interviewId: str, questionNum: int, stored: dict, offset: int) -> AsyncIterator[str]:
+        # The stream may be live on another worker: poll storage until it
+        # finishes or stops making progress.
+        lastProgress = lastWrite = time.monotonic()
+        while True:
+            content = stored.get("content") or ""
+            if len(content) > offset:
+                yield content[offset:]
+                offset = len(content)
+                lastProgress = lastWrite = time.monotonic()
+            if stored.get("done") or time.monotonic() - lastProgress > FEEDBACK_STALE_AFTER:
+                return
+            if time.monotonic() - lastWrite >= self.heartbeat:
+                yield HEARTBEAT
+                lastWrite = time.monotonic()
+            await asyncio.sleep(self.flushInterval)
+            stored = await repo.getFeedback(interviewId, questionNum) or stored
+
+
+def sseEvent(data: str, id: Optional[int] = None, event: Optional[str] = None) -> str:
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    if id is not None:
+        lines.append(f"id: {id}")
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+class FeedbackResponse(StreamingResponse):
+    """Feedback as plain text or, with ``sse``, as Server-Sent Events.
+
+    Each SSE event's id is the text offset after it, so a client can resume
+    through the replay endpoint with Last-Event-ID. Heartbeats become SSE
+    comments and are dropped in plain mode. A client that does not take a
+    write within ``writeTimeout`` is disconnected, and the body iterator is
+    always closed so the stream learns its subscriber left.
+    """
+
+    def __init__(self, chunks: AsyncIterator[str], sse: bool = False, offset: int = 0,
+                 headers: Optional[Mapping[str, str]] = None, writeTimeout: float = SLOW_CONSUMER_TIMEOUT):
+        self.chunks = chunks
+        self.writeTimeout = writeTimeout
+        headers = dict(headers or {})
+        if sse:
+            headers.update({"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+            content = self._sse(chunks, offset)
+        else:
+            content = (chunk async for chunk in chunks if chunk)
+        super().__init__(content, headers=headers,
+                         media_type="text/event-stream" if sse else "text/plain; charset=utf-8")
+
+    @staticmethod
+    async def _sse(chunks: AsyncIterator[str], offset: int) -> AsyncIterator[str]:
+        async for chunk in chunks:
+            if chunk == HEARTBEAT:
+                yield ": ping\n\n"
+                continue
+            offset += len(chunk)
+            yield sseEvent(chunk, id=offset)
+        yield sseEvent("", id=offset, event="done")
+
+    async def stream_response(self, send) -> None:
+        async def timedSend(message):
+            await asyncio.wait_for(send(message), self.writeTimeout)
+
+        try:
+            await super().stream_response(timedSend)
+        except asyncio.TimeoutError:
+            FEEDBACK_SLOW_CONSUMERS.inc()
+            logger.warning(f"Dropped a feedback client that took no data for {self.writeTimeout}s")
+        finally:
+            await self.body_iterator.aclose()
+            await self.chunks.aclose()
+
+
+def wantsSse(accept: str) -> bool:
+    return "text/event-stream" in (accept or "")
+
+
+feedbackStreams = FeedbackStreams()
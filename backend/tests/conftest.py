@@ -0,0 +1,19 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py refuses to import without these; tests never reach the real services.
+for var, placeholder in {
+    "SUPABASE_URL": "http://localhost:54321",
+    "SUPABASE_API_KEY": "test.test.test",
+    "TOGETHER_API_KEY": "test",
+    "JWT_SECRET_KEY": "test-secret",
+    "JWT_ALGO": "HS256",
+    "JWT_ACCESS_TOKEN_EXPIRE": "30",
+    "JWT_REFRESH_TOKEN_EXPIRE": "7",
+    "JWT_REFRESH_SECRET": "test-refresh-secret",
+    "QUESTION_CACHE_PATH": "",
+    "RESULT_CACHE_PATH": "",
+}.items():
+    os.environ.setdefault(var, placeholder)
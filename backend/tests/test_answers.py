@@ -0,0 +1,57 @@
+"""Concurrent answers through answer_question must all be stored.
+
+Runs against the in-memory stand-in by default. Set TEST_SUPABASE_URL and
+TEST_SUPABASE_API_KEY to a database with migrations/ applied to check the
+SQL function itself; the test creates and deletes its own interview.
+"""
+import asyncio
+import os
+
+import pytest
+
+from repository import Repository
+from standins import InMemorySupabase
+
+ANSWERS = 32
+
+
+def client():
+    url, key = os.getenv("TEST_SUPABASE_URL"), os.getenv("TEST_SUPABASE_API_KEY")
+    if url and key:
+        from supabase import create_client
+        return create_client(url, key)
+    return InMemorySupabase(latency=0.005)
+
+
+@pytest.mark.parametrize("batch", [False, True], ids=["answer_question", "answer_questions"])
+def test_concurrent_answers_are_not_lost(batch):
+    db = client()
+    repo = Repository(db, maxWorkers=16)
+    questions = [f"Question {i}" for i in range(ANSWERS)]
+    row = db.table("Interview").insert({
+        "creator": "test", "job_name": "test", "job_description": "test", "user_data": "test",
+        "questions": {"data": [{"question": q, "answer": None} for q in questions]},
+        "question_count": len(questions),
+    }).execute().data[0]
+
+    async def submit(idx: int) -> dict:
+        answer = {"index": idx, "question": questions[idx], "answer": f"answer {idx}"}
+        if batch:
+            return await repo.answerQuestions(row["id"], "test", [answer])
+        return await repo.answerQuestion(row["id"], "test", idx, questions[idx], answer["answer"])
+
+    async def run():
+        return await asyncio.gather(*(submit(idx) for idx in range(ANSWERS)))
+
+    try:
+        results = asyncio.run(run())
+        stored = db.table("Interview").select("questions", "answered_count").eq("id", row["id"]).execute().data[0]
+    finally:
+        if not isinstance(db, InMemorySupabase):
+            db.table("Interview").delete().eq("id", row["id"]).execute()
+        repo.close()
+
+    assert all(result["status"] == "ok" for result in results)
+    assert [q["answer"] for q in stored["questions"]["data"]] == [f"answer {i}" for i in range(ANSWERS)]
+    assert stored["answered_count"] == ANSWERS
+    assert sorted(result["remaining"] for result in results) == list(range(ANSWERS))
@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import together
+from jobs import QuestionJobs, ReviewJobs, reviewJobs
+from repository import repo
+from router import CircuitBreaker
+from standins import FakeChatModel, InMemorySupabase
+
+
+def test_reviews_are_retried_after_an_outage_instead_of_stored(monkeypatch):
+    db = InMemorySupabase()
+    monkeypatch.setattr(repo, "client", db)
+    monkeypatch.setattr(together.router, "factory", lambda name: FakeChatModel(latency=0.01))
+    monkeypatch.setattr(together.router, "models", {})
+    breaker = CircuitBreaker(threshold=1, cooldown=0.5)
+    monkeypatch.setattr(together.router, "breaker", breaker)
+    monkeypatch.setattr(together.answerIndex, "maxEntries", 0)
+    db.tables["Interview"] = [{
+        "id": 1, "creator": "test", "questions": {"data": [{"question": "Why Python?", "answer": "Readable."}]},
+        "question_count": 1, "answered_count": 1, "reviews": None, "generating": False,
+    }]
+    jobs = ReviewJobs(workers=1)
+
+    async def run():
+        breaker.failure()
+        jobs.start()
+        assert jobs.enqueue(1) == "pending"
+        await jobs.queue.join()
+        row = db.tables["Interview"][0]
+        assert row["reviews"] is None
+        assert row["review_started_at"] is None
+        assert jobs.enqueue(1) == "retrying"
+        assert jobs.retryAfter(1) >= 1
+        # The breaker cools down and the scheduled retry stores real reviews.
+        while jobs.status.get("1") is not None:
+            await asyncio.sleep(0.05)
+        await jobs.stop()
+
+    asyncio.run(run())
+    reviews = db.tables["Interview"][0]["reviews"]
+    assert [r["error"] for r in reviews] == [None]
+    assert reviews[0]["review"]
+    assert breaker.state == "closed"
+
+
+def test_startup_finishes_interviews_left_generating(monkeypatch):
+    db = InMemorySupabase()
+    monkeypatch.setattr(repo, "client", db)
+    old = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    new = datetime.now(timezone.utc).isoformat()
+    db.tables["Interview"] = [
+        {"id": 1, "created_at": old, "generating": True, "question_count": 2, "answered_count": 2, "reviews": None},
+        {"id": 2, "created_at": old, "generating": True, "question_count": 3, "answered_count": 1, "reviews": None},
+        {"id": 3, "created_at": new, "generating": True, "question_count": 1, "answered_count": 1, "reviews": None},
+    ]
+    queued = []
+    monkeypatch.setattr(reviewJobs, "enqueue", lambda id: queued.append(str(id)))
+    jobs = QuestionJobs()
+
+    async def run():
+        jobs.start()
+        await asyncio.gather(*jobs.tasks)
+
+    asyncio.run(run())
+    assert [row["generating"] for row in db.tables["Interview"]] == [False, False, True]
+    assert queued == ["1"]
+
+
+def test_final_question_write_is_retried(monkeypatch):
+    calls = []
+
+    async def noSleep(seconds):
+        return None
+
+    async def appendQuestions(id, questions, done):
+        calls.append(done)
+        if len(calls) == 1:
+            raise ConnectionError("database unavailable")
+        return {"status": "ok", "remaining": 1}
+
+    monkeypatch.setattr(repo, "appendQuestions", appendQuestions)
+    monkeypatch.setattr(asyncio, "sleep", noSleep)
+
+    async def empty():
+        return
+        yield
+
+    asyncio.run(QuestionJobs()._append("1", empty()))
+    assert calls == [True, True]
+
+
+def test_reviews_are_only_reused_for_identical_answers(monkeypatch):
+    from models import InterviewData, interviewQuestions
+    from similarity import AnswerIndex
+
+    monkeypatch.setattr(together, "answerIndex", AnswerIndex(threshold=0.5, maxEntries=100))
+    monkeypatch.setattr(together.router, "factory", lambda name: FakeChatModel(latency=0.0))
+    monkeypatch.setattr(together.router, "models", {})
+    monkeypatch.setattr(together.router, "breaker", CircuitBreaker())
+    question = "How do you scale a FastAPI service?"
+    answer = "I run several uvicorn workers behind a load balancer and cache hot reads in Redis for my team at Acme"
+    calls = []
+
+    async def engine(data):
+        calls.append([d.answer for d in data.data])
+        return [together.ReviewResult(question=d.question, answer=d.answer, review=f"review of {d.answer}", error=None)
+                for d in data.data]
+
+    monkeypatch.setattr(together, "createReviewsPerQuestion", engine)
+
+    async def review(text):
+        return await together.createReviews(InterviewData(data=[interviewQuestions(question=question, answer=text)]))
+
+    async def run():
+        await review(answer)
+        same = await review(answer.upper() + "!")
+        similar = await review(answer.replace("Acme", "Globex"))
+        return same, similar
+
+    same, similar = asyncio.run(run())
+    assert same[0].review == f"review of {answer}"
+    assert similar[0].review == f"review of {answer.replace('Acme', 'Globex')}"
+    assert len(calls) == 2
@@ -0,0 +1,29 @@
+import asyncio
+import os
+
+import pytest
+from concurrent.futures import BrokenExecutor
+
+from pools import BoundedPool
+
+
+def crash():
+    os._exit(1)
+
+
+def square(x):
+    return x * x
+
+
+def test_crashed_worker_does_not_break_later_calls():
+    pool = BoundedPool(1, 1, kind="process", name="test")
+
+    async def run():
+        with pytest.raises(BrokenExecutor):
+            await pool.run(crash)
+        return await pool.run(square, 7)
+
+    try:
+        assert asyncio.run(run()) == 49
+    finally:
+        pool.close()
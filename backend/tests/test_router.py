@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from deadlines import DeadlineExceeded, deadline
+from router import CircuitBreaker, CircuitOpenError, ModelRouter
+
+
+class FlakyModel:
+    """Fails the first ``failures`` calls, then answers "ok"."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    async def ainvoke(self, prompt: str) -> str:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("provider down")
+        return "ok"
+
+
+def test_half_open_probe_through_invoke_closes_the_breaker():
+    model = FlakyModel(failures=1)
+    breaker = CircuitBreaker(threshold=1, cooldown=0.1)
+    router = ModelRouter({"review": ["m"]}, lambda name: model, breaker=breaker)
+    charges = []
+
+    async def charge():
+        charges.append(1)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await router.invoke("review", "prompt", charge=charge)
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            await router.invoke("review", "prompt", charge=charge)
+        await asyncio.sleep(0.15)
+        assert breaker.state == "half_open"
+        assert await router.invoke("review", "prompt", charge=charge) == "ok"
+
+    asyncio.run(run())
+    assert breaker.state == "closed"
+    assert model.calls == 2
+    # The call rejected while open was never charged.
+    assert len(charges) == 2
+
+
+class SlowModel:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def ainvoke(self, prompt: str) -> str:
+        await asyncio.sleep(self.delay)
+        return "ok"
+
+    async def astream(self, prompt: str):
+        await asyncio.sleep(self.delay)
+        yield "ok"
+
+
+def test_request_deadline_expiry_does_not_open_the_breaker():
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    router = ModelRouter({"review": ["m"], "feedback": ["m"]}, lambda name: SlowModel(0.2),
+                         firstTokenTimeout=5, breaker=breaker)
+
+    async def run():
+        for _ in range(3):
+            with deadline(0.05):
+                with pytest.raises(DeadlineExceeded):
+                    await router.invoke("review", "prompt")
+                with pytest.raises(DeadlineExceeded):
+                    async for _ in router.stream("feedback", "prompt"):
+                        pass
+
+    asyncio.run(run())
+    assert breaker.state == "closed"
+
+
+def test_first_token_timeout_counts_as_a_provider_failure():
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    router = ModelRouter({"feedback": ["m"]}, lambda name: SlowModel(0.2), firstTokenTimeout=0.05, breaker=breaker)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            async for _ in router.stream("feedback", "prompt"):
+                pass
+
+    asyncio.run(run())
+    assert breaker.state == "open"
@@ -0,0 +1,48 @@
+import asyncio
+
+from fastapi import WebSocketDisconnect
+
+from repository import repo
+from sessions import InterviewSession
+from standins import InMemorySupabase
+
+
+class FakeSocket:
+    def __init__(self, messages):
+        self.incoming = list(messages)
+        self.sent = []
+        self.closed = None
+
+    async def receive_json(self):
+        if not self.incoming:
+            # An idle client, long enough for buffered answers to come due.
+            await asyncio.sleep(0.1)
+            raise WebSocketDisconnect()
+        return self.incoming.pop(0)
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed = code
+
+
+def test_rejected_answers_are_reported_and_close_the_socket(monkeypatch):
+    db = InMemorySupabase()
+    monkeypatch.setattr(repo, "client", db)
+    questions = [{"question": f"Q{i}", "answer": None} for i in range(3)]
+    # The row belongs to someone else by the time the answers are written.
+    db.tables["Interview"] = [{"id": 1, "creator": "other", "questions": {"data": questions},
+                               "question_count": 3, "answered_count": 0, "next_index": 0}]
+    session = InterviewSession("1", "test", {"questions": {"data": [dict(q) for q in questions]}},
+                               flushAnswers=10, flushInterval=0.01)
+    socket = FakeSocket([{"type": "next"}])
+
+    async def run():
+        session.record({"answerNum": 0, "question": "Q0", "answerData": "A0"})
+        await session.run(socket)
+
+    asyncio.run(run())
+    errors = [m for m in socket.sent if m["type"] == "error"]
+    assert errors == [{"type": "error", "status": 403, "detail": "Answers were not saved: forbidden", "answerNums": [0]}]
+    assert socket.closed == 4403
@@ -0,0 +1,183 @@
+"""Shrinks resumes and job descriptions to a token budget before prompting.
+
+Text is normalised, repeated lines (page headers, footers) and common
+boilerplate are dropped, and if it is still over budget the sections that
+share the fewest terms with the other document are cut first.
+"""
+import math
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Set
+
+from config import PROMPT_RESUME_TOKEN_BUDGET, PROMPT_JD_TOKEN_BUDGET
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+BOILERPLATE = [re.compile(p, re.IGNORECASE) for p in (
+    r"^page \d+( of \d+)?$",
+    r"^\d+\s*/\s*\d+$",
+    r"^(curriculum vitae|resume|résumé|cv)$",
+    r"references (are )?available (up)?on request",
+    r"equal opportunity employer",
+    r"without regard to (race|color|religion)",
+    r"reasonable accommodations?",
+    r"^(apply now|share this job|save job|report this job)$",
+    r"all rights reserved",
+    r"^confidential$",
+)]
+
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+HEADING = re.compile(r"^([A-Z][A-Za-z &/]{1,40}:?|[A-Z0-9 &/]{3,40})$")
+WORD = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9+#]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the this to was we were will with you your"
+    .split()
+)
+
+
+def estimateTokens(text: str) -> int:
+    """Token count from tiktoken when installed, else a word/punctuation estimate."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return math.ceil(len(re.findall(r"\w+|[^\w\s]", text)) * 1.3)
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text)
+    lines = [re.sub(r"[ \t\f\v]+", " ", line).strip() for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def dropNoise(text: str) -> str:
+    """Remove boilerplate lines and every repeat of a non-blank line."""
+    seen: Set[str] = set()
+    kept = []
+    for line in text.split("\n"):
+        key = line.casefold()
+        if line and (key in seen or any(p.search(line) for p in BOILERPLATE)):
+            continue
+        if line:
+            seen.add(key)
+        kept.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def terms(text: str) -> Set[str]:
+    return {w for w in WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 1}
+
+
+def splitSections(text: str) -> List[str]:
+    sections, current = [], []
+    for line in text.split("\n"):
+        if current and (not line or HEADING.match(line)):
+            sections.append("\n".join(current).strip())
+            current = []
+        if line:
+            current.append(line)
+    if current:
+        sections.append("\n".join(current).strip())
+    return [s for s in sections if s]
+
+
+def truncateToBudget(text: str, budget: int) -> str:
+    """Longest prefix of ``text`` within ``budget`` tokens, cut after a sentence or else a word."""
+    sentences = SENTENCE_END.split(text)
+    kept, used = [], 0
+    for sentence in sentences:
+        cost = estimateTokens(sentence)
+        if used + cost > budget:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept)
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimateTokens(" ".join(words[:mid])) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return " ".join(words[:low])
+
+
+def fitToBudget(text: str, budget: int, reference: str) -> str:
+    """Keep the sections most relevant to ``reference`` within ``budget`` tokens.
+
+    A line that does not fit whole is cut at a sentence or word boundary,
+    so non-empty text never comes back empty.
+    """
+    if estimateTokens(text) <= budget:
+        return text
+    sections = splitSections(text)
+    if not sections:
+        return text
+    wanted = terms(reference)
+    scored = sorted(
+        range(len(sections)),
+        key=lambda i: len(terms(sections[i]) & wanted) / math.sqrt(len(terms(sections[i])) or 1),
+        reverse=True,
+    )
+    kept, used = {}, 0
+    for i in scored:
+        cost = estimateTokens(sections[i])
+        if used + cost <= budget:
+            kept[i] = sections[i]
+            used += cost
+            continue
+        # Partially keep the section if anything fits.
+        lines = []
+        for line in sections[i].split("\n"):
+            lineCost = estimateTokens(line)
+            if used + lineCost > budget:
+                # Cut the first line that does not fit at a sentence or word.
+                cut = truncateToBudget(line, budget - used)
+                if cut:
+                    lines.append(cut)
+                    used += estimateTokens(cut)
+                break
+            lines.append(line)
+            used += lineCost
+        if lines:
+            kept[i] = "\n".join(lines)
+    if not kept:
+        # Even one word is over budget; a slightly long prompt beats an empty one.
+        return sections[scored[0]].split()[0]
+    return "\n\n".join(kept[i] for i in sorted(kept))
+
+
+@lru_cache(maxsize=64)
+def cleanJobDescription(JobDescription: str) -> str:
+    """Normalised, de-noised job description; cached because one JD is often used for many resumes."""
+    return dropNoise(normalize(JobDescription))
+
+
+@dataclass
+class PreparedInputs:
+    resume: str
+    jobDescription: str
+    tokensBefore: int
+    tokensAfter: int
+
+    @property
+    def tokensSaved(self) -> int:
+        return self.tokensBefore - self.tokensAfter
+
+
+def prepareInputs(resumeText: str, JobDescription: str, resumeBudget: Optional[int] = None,
+                  jdBudget: Optional[int] = None) -> PreparedInputs:
+    before = estimateTokens(resumeText) + estimateTokens(JobDescription)
+    resume = dropNoise(normalize(resumeText))
+    jd = cleanJobDescription(JobDescription)
+    resume = fitToBudget(resume, resumeBudget or PROMPT_RESUME_TOKEN_BUDGET, jd)
+    jd = fitToBudget(jd, jdBudget or PROMPT_JD_TOKEN_BUDGET, resume)
+    return PreparedInputs(resume, jd, before, estimateTokens(resume) + estimateTokens(jd))
@@ -1,126 +1,337 @@
-from config import TOGETHER_API_KEY
-from langchain_together import ChatTogether
+from config import TOGETHER_API_KEY, TOGETHER_API_BASE, RATE_LIMIT_PER_MINUTE, RATE_LIMIT_WEIGHTS, LLM_MAX_CONCURRENCY
+from config import LLM_TIMEOUT, HEDGE_REQUESTS
+from config import QUESTION_CACHE_SIZE, QUESTION_CACHE_TTL, QUESTION_CACHE_PATH, QUESTION_CACHE_MAX_ENTRIES, REVIEW_MODE, MODEL_TIERS
 import os
-from prompts import QUESTION_PROMPT,RESPONSE_PROMPT,REVIEW_PROMPT
-from models import Questions,InterviewData,interviewQuestions,ReviewResult  
+from prompts import QUESTION_PROMPT,RESPONSE_PROMPT,REVIEW_PROMPT,REVIEW_BATCH_PROMPT,QUESTION_PROMPT_VERSION
+from models import Questions,InterviewData,interviewQuestions,ReviewResult,BatchReviews
 import asyncio
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 import logging
-from typing import List
-import time
+from typing import AsyncIterator, List, Optional
+import json
+import re
+from ratelimit import RateLimiter, buildStore
+from scheduler import scheduler, Priority
+from cache import LRUCache, SqliteCache, TieredCache
+from textprep import prepareInputs
+from similarity import answerIndex, normalizeAnswer
+from router import ModelRouter, CircuitOpenError
+from deadlines import remaining, DeadlineExceeded
+import hashlib
+import unicodedata
 
 if "TOGETHER_API_KEY" not in os.environ:    
     os.environ['TOGETHER_API_KEY'] = TOGETHER_API_KEY
 
-class RateLimiter:
-    def __init__(self,maxRequests : int,interval : int):
-        self.maxRequests = maxRequests
-        self.interval = interval
-        self.timestamps = []
-        self.lock = asyncio.Lock()
-        
-    async def acquire(self):
-        while True:
-            async with self.lock:
-                currentTime = time.time()
-                self.timestamps = [
-                    t for t in self.timestamps
-                    if currentTime - t < self.interval
-                ]
-                
-                if len(self.timestamps) < self.maxRequests:
-                    self.timestamps.append(currentTime)
-                    return
-                else:
-                    oldest = self.timestamps[0]
-                    waitTime = oldest + self.interval - currentTime
-                    waitTime = max(waitTime,0)
-                    
-            await asyncio.sleep(waitTime)
-
-llm = ChatTogether(
-    model= 'meta-llama/Llama-3.3-70B-Instruct-Turbo',
-    temperature=0.5,
-    max_tokens= None,
-    timeout= None,
-    max_retries=2,
-    api_key=TOGETHER_API_KEY
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Transient upstream failures, including the OpenAI-compatible client's own
+# error types, matched by name so the client is not imported eagerly.
+RETRYABLE = ("APIConnectionError", "APITimeoutError", "InternalServerError", "RateLimitError")
+
+def retryable(e: BaseException) -> bool:
+    return isinstance(e, (TimeoutError, ConnectionError)) or type(e).__name__ in RETRYABLE
+
+def transient(e: BaseException) -> bool:
+    """Failures that may pass on their own; reviews hit by one are retried, not stored."""
+    return isinstance(e, (CircuitOpenError, DeadlineExceeded)) or retryable(e)
+
+def deadlinePassed(retry_state) -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+RETRY_POLICY = retry(
+    reraise=True,
+    stop=stop_after_attempt(3) | deadlinePassed,
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception(retryable)
+)
+
+async def hedgeBudget(endpoint: str) -> bool:
+    """Whether a hedged duplicate of an ``endpoint`` call fits the rate limit right now."""
+    return HEDGE_REQUESTS and await rateLimiter.tryAcquire(endpoint)
+
+
+# Shared keep-alive pool behind every ChatTogether; opened by startClients().
+httpPool = None
+
+def buildModel(model : str):
+    # Imported here: langchain_together is the slowest import in the app.
+    from langchain_together import ChatTogether
+    return ChatTogether(
+        model= model,
+        temperature=0.5,
+        max_tokens= None,
+        timeout= LLM_TIMEOUT,
+        max_retries=2,
+        stream_usage=True,
+        api_key=TOGETHER_API_KEY,
+        base_url=TOGETHER_API_BASE,
+        http_async_client=httpPool
+    )
+
+router = ModelRouter(MODEL_TIERS, buildModel)
+
+def startClients():
+    """Open the shared HTTP pool; models are built on it from then on."""
+    global httpPool
+    import httpx
+    if httpPool is None:
+        httpPool = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=LLM_MAX_CONCURRENCY * 2, max_keepalive_connections=LLM_MAX_CONCURRENCY),
+            timeout=None,
+        )
+        router.models.clear()
+        router.runnables.clear()
+
+async def stopClients():
+    global httpPool
+    if httpPool is not None:
+        await httpPool.aclose()
+        httpPool = None
+
+async def warmUp():
+    """Build every tier's primary model and open a connection to Together.
+
+    Any HTTP answer, even an error status, proves the TLS connection is up;
+    no tokens are spent.
+    """
+    primaries = {router.primary(task) for task in router.tiers}
+    await asyncio.to_thread(lambda: [router.model(name) for name in primaries])
+    if httpPool is not None:
+        response = await httpPool.head(TOGETHER_API_BASE)
+        if response.status_code >= 500:
+            raise ConnectionError(f"Together API answered {response.status_code}")
+rateLimiter = RateLimiter(RATE_LIMIT_PER_MINUTE, 60, store=buildStore(), weights=RATE_LIMIT_WEIGHTS)
+questionCache = TieredCache(
+    LRUCache(QUESTION_CACHE_SIZE, ttl=QUESTION_CACHE_TTL),
+    SqliteCache(QUESTION_CACHE_PATH, QUESTION_CACHE_TTL, QUESTION_CACHE_MAX_ENTRIES) if QUESTION_CACHE_PATH else None
 )
-rateLimiter = RateLimiter(60,60)
 
-async def createQuestions(resumeText : str, JobDescription : str) -> Questions:
-    await rateLimiter.acquire()
-    questionPrompt = QUESTION_PROMPT.format(
-        resume_data = resumeText,
-        job_description = JobDescription
+def normalizeText(text : str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+def questionCacheKey(resumeText : str, JobDescription : str, model : str = None) -> str:
+    """Content address of a question set: same inputs, prompt and model give the same key."""
+    model = model or router.primary("questions")
+    digest = hashlib.sha256()
+    for part in (QUESTION_PROMPT_VERSION, model, normalizeText(resumeText), normalizeText(JobDescription)):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def buildQuestionPrompt(resumeText : str, JobDescription : str) -> str:
+    prepared = prepareInputs(resumeText, JobDescription)
+    logger.info(f"Question prompt inputs: {prepared.tokensBefore} -> {prepared.tokensAfter} tokens ({prepared.tokensSaved} saved)")
+    return QUESTION_PROMPT.format(
+        resume_data = prepared.resume,
+        job_description = prepared.jobDescription
     )
-    structuredLLM = llm.with_structured_output(Questions)
-    questions : Questions = await structuredLLM.ainvoke(questionPrompt)
+
+async def createQuestions(resumeText : str, JobDescription : str, priority : Priority = Priority.STANDARD) -> Questions:
+    cacheKey = questionCacheKey(resumeText, JobDescription)
+    cached = await questionCache.get(cacheKey)
+    if cached is not None:
+        logger.info(f"Question cache hit ({questionCache.stats()})")
+        return Questions(**cached)
+
+    questionPrompt = buildQuestionPrompt(resumeText, JobDescription)
+
+    @RETRY_POLICY
+    async def generate() -> Questions:
+        # Bulk work queues behind users instead of being rejected.
+        async with scheduler.slot(priority, reject=priority != Priority.BATCH):
+            return await router.invoke(
+                "questions", questionPrompt, schema=Questions, hedge=lambda: hedgeBudget("createQuestions"),
+                charge=lambda: rateLimiter.acquire("createQuestions")
+            )
+
+    questions = await generate()
+    await questionCache.set(cacheKey, questions.model_dump())
     return questions
 
 
+class QuestionParser:
+    """Pulls each string out of a streamed ``{"questions": [...]}`` as soon as it closes."""
+
+    START = re.compile(r'"questions"\s*:\s*\[')
+    SEPARATOR = re.compile(r'[\s,]*')
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos: Optional[int] = None
+        self.complete = False
+        self.decoder = json.JSONDecoder()
+
+    def feed(self, chunk : str) -> List[str]:
+        self.buffer += chunk
+        parsed = []
+        if self.pos is None:
+            match = self.START.search(self.buffer)
+            if not match:
+                return parsed
+            self.pos = match.end()
+        while not self.complete:
+            i = self.SEPARATOR.match(self.buffer, self.pos).end()
+            if i >= len(self.buffer):
+                break
+            if self.buffer[i] != '"':
+                # "]" ends the list; anything else is not the shape we asked for.
+                self.complete = True
+                break
+            try:
+                value, self.pos = self.decoder.raw_decode(self.buffer, i)
+            except json.JSONDecodeError:
+                break  # string still being written
+            if value.strip():
+                parsed.append(value.strip())
+        return parsed
+
+async def cachedQuestions(resumeText : str, JobDescription : str) -> Optional[List[str]]:
+    """The cached question set for these inputs, or None."""
+    cached = await questionCache.get(questionCacheKey(resumeText, JobDescription))
+    return None if cached is None else cached["questions"]
+
+async def streamQuestions(resumeText : str, JobDescription : str) -> AsyncIterator[str]:
+    """Yield interview questions one at a time as the model writes them.
+
+    Cached sets are replayed at once. If the stream yields nothing usable,
+    the structured (non-streaming) path is used instead; a stream that fails
+    part way ends with the questions generated so far.
+    """
+    cacheKey = questionCacheKey(resumeText, JobDescription)
+    cached = await questionCache.get(cacheKey)
+    if cached is not None:
+        for question in cached["questions"]:
+            yield question
+        return
+
+    questionPrompt = buildQuestionPrompt(resumeText, JobDescription)
+    parser = QuestionParser()
+    questions = []
+    try:
+        async with scheduler.slot(Priority.STANDARD):
+            async for chunk in router.stream("questions", questionPrompt,
+                                             charge=lambda: rateLimiter.acquire("createQuestions")):
+                for question in parser.feed(chunk):
+                    questions.append(question)
+                    yield question
+    except (CircuitOpenError, DeadlineExceeded):
+        if not questions:
+            raise
+        logger.warning(f"Question stream cut short after {len(questions)} questions")
+        return
+    except Exception as e:
+        logger.error(f"Question stream failed after {len(questions)} questions: {type(e).__name__}: {str(e)}")
+        if questions:
+            return
+
+    if not questions:
+        for question in (await createQuestions(resumeText, JobDescription)).questions:
+            yield question
+        return
+    if parser.complete:
+        await questionCache.set(cacheKey, {"questions": questions})
+
 async def createResponse(question : str, answer : str):
+    reused = answerIndex.lookup("feedback", question, answer)
+    if reused is not None:
+        yield reused
+        return
     try:
-        await rateLimiter.acquire()
         response_prompt = RESPONSE_PROMPT.format(
             question = question,
             answer = answer
         )
-        async for chunk in llm.astream(response_prompt):
-                yield chunk.content
-                
+        parts = []
+        async with scheduler.slot(Priority.INTERACTIVE, reject=False):
+            async for chunk in router.stream("feedback", response_prompt,
+                                             charge=lambda: rateLimiter.acquire("createResponse")):
+                parts.append(chunk)
+                yield chunk
+        # Only feedback that streamed to the end is worth reusing.
+        if parts:
+            answerIndex.add("feedback", question, answer, "".join(parts))
+
     except Exception as e:
         yield f"An error occurred while generating the response: {str(e)}"
 
 
 
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
 
-RETRY_POLICY = retry(
-    reraise=True,
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type((TimeoutError, ConnectionError))
-)
 
+async def createReviews(interview: InterviewData) -> List[ReviewResult]:
+    """Review every answer, reusing stored reviews of identical answers.
+
+    REVIEW_PROMPT has the model quote the answer it reviews, so a review is
+    only reused for the same normalised answer: a merely similar one would
+    show one candidate's words to another.
+    """
+    results: List[Optional[ReviewResult]] = []
+    missing = []
+    for idx, d in enumerate(interview.data):
+        reused = answerIndex.lookup("review", d.question, d.answer or "")
+        if reused is not None and reused["answer"] != normalizeAnswer(d.answer or ""):
+            reused = None
+        if reused is None:
+            missing.append(idx)
+        results.append(None if reused is None else ReviewResult(question=d.question, answer=d.answer, review=reused["review"], error=None))
+    if missing:
+        engine = createReviewsBatched if REVIEW_MODE == "batched" else createReviewsPerQuestion
+        generated = await engine(InterviewData(data=[interview.data[idx] for idx in missing]))
+        for idx, result in zip(missing, generated):
+            results[idx] = result
+            if result.review is not None:
+                answerIndex.add("review", result.question, result.answer or "",
+                                {"answer": normalizeAnswer(result.answer or ""), "review": result.review})
+    return results
 
 
-async def createReviews(interview: InterviewData) -> List[ReviewResult]:
+async def createReviewsPerQuestion(interview: InterviewData) -> List[ReviewResult]:
 
-    semaphore = asyncio.Semaphore(5)  
-    
     @RETRY_POLICY
+    async def review(prompt: str, result: ReviewResult) -> str:
+        # Retried outside the scheduler slot, so backoff does not hold it.
+        result.attempts += 1
+        async with scheduler.slot(Priority.BATCH, reject=False):
+            response = await router.invoke("review", prompt, hedge=lambda: hedgeBudget("createReviews"),
+                                           charge=lambda: rateLimiter.acquire("createReviews"))
+        return response.content
+
     async def process_question(d: interviewQuestions) -> ReviewResult:
-        async with semaphore:
-            result = ReviewResult(
+        result = ReviewResult(
+            question=d.question,
+            answer=d.answer,
+            review=None,
+            error=None,
+            attempts=0
+        )
+        
+        try:
+            review_prompt = REVIEW_PROMPT.format(
                 question=d.question,
-                answer=d.answer,
-                review=None,
-                error=None,
-                attempts=0
+                answer=d.answer or "[No answer provided]"
             )
+            result.review = await review(review_prompt, result)
+            return result
             
-            try:
-                review_prompt = REVIEW_PROMPT.format(
-                    question=d.question,
-                    answer=d.answer or "[No answer provided]"
-                )
-                await rateLimiter.acquire()
-                response = await llm.ainvoke(review_prompt)
-                result.review = response.content
-                return result
-                
-            except Exception as e:
-                result.error = f"{type(e).__name__}: {str(e)}"
-                logger.error(
-                    f"Failed processing question: {d.question[:50]}... - {result.error}"
-                )
-                return result
+        except Exception as e:
+            if transient(e):
+                raise
+            result.error = f"{type(e).__name__}: {str(e)}"
+            logger.error(
+                f"Failed processing question: {d.question[:50]}... - {result.error}"
+            )
+            return result
 
     tasks = [process_question(d) for d in interview.data]
     results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Reviews are write-once: an outage must not become the stored review.
+    failure = next((res for res in results if isinstance(res, Exception) and transient(res)), None)
+    if failure is not None:
+        raise failure
     
     final_results = []
     for idx, res in enumerate(results):
@@ -138,6 +349,44 @@ async def createReviews(interview: InterviewData) -> List[ReviewResult]:
     return final_results
 
 
+async def createReviewsBatched(interview: InterviewData) -> List[ReviewResult]:
+    """Review the whole interview in one structured call.
+
+    Items the model leaves out, or all of them if the output does not
+    parse, fall back to the per-question path.
+    """
+    results = [
+        ReviewResult(question=d.question, answer=d.answer, review=None, error=None, attempts=0)
+        for d in interview.data
+    ]
+    items = "\n\n".join(
+        f"### Item {idx}\n> **Question**: {d.question}\n> **Answer**: {d.answer or '[No answer provided]'}"
+        for idx, d in enumerate(interview.data)
+    )
+    try:
+        async with scheduler.slot(Priority.BATCH, reject=False):
+            output = await router.invoke(
+                "review", REVIEW_BATCH_PROMPT.format(items=items), schema=BatchReviews, include_raw=True,
+                hedge=lambda: hedgeBudget("createReviews"), charge=lambda: rateLimiter.acquire("createReviews")
+            )
+        parsed = output.get("parsed")
+        if parsed is None:
+            raise ValueError(f"Unparseable batch review output: {output.get('parsing_error')}")
+        for item in parsed.reviews:
+            if 0 <= item.index < len(results) and item.review:
+                results[item.index].review = item.review
+                results[item.index].attempts = 1
+    except Exception as e:
+        logger.error(f"Batched review failed, falling back per question: {type(e).__name__}: {str(e)}")
+
+    missing = [idx for idx, result in enumerate(results) if result.review is None]
+    if missing:
+        fallback = await createReviewsPerQuestion(InterviewData(data=[interview.data[idx] for idx in missing]))
+        for idx, result in zip(missing, fallback):
+            results[idx] = result
+    return results
+
+
 
 async def main():
     test_data = InterviewData(
@@ -19,7 +19,7 @@ import { toast } from "react-hot-toast";
 pdfjs.GlobalWorkerOptions.workerSrc = `https://cdnjs.cloudflare.com/ajax/libs/pdf.js/4.10.38/pdf.worker.min.mjs`;
 
 interface CreateInterviewDialogProps {
-  onCreate: (jobName: string, resume: string | null, jobDescriptionText: string) => Promise<void>;
+  onCreate: (jobName: string, resume: File, jobDescriptionText: string) => Promise<void>;
 }
 
 const CreateInterviewDialog: React.FC<CreateInterviewDialogProps> = ({ onCreate }) => {
@@ -50,12 +50,10 @@ const CreateInterviewDialog: React.FC<CreateInterviewDialogProps> = ({ onCreate
     setIsLoading(true);
 
     try {
-      const [resumeText, jdText] = await Promise.all([
-        readPDF(resume),
-        jobDescriptionFile ? readPDF(jobDescriptionFile) : "",
-      ]);
+      // The resume is uploaded as-is and its text extracted by the server.
+      const jdText = jobDescriptionFile ? await readPDF(jobDescriptionFile) : "";
 
-      await onCreate(jobName, resumeText, jobDescriptionText || jdText);
+      await onCreate(jobName, resume, jobDescriptionText || jdText);
       setOpen(false);
       resetForm();
       toast.success("Interview created successfully!");
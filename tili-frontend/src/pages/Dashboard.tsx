@@ -16,55 +16,75 @@ interface InterviewCard {
 const Dashboard: React.FC = () => {
   const [username] = useAtom(usernameAtom);
   const [interviews, setInterviews] = useState<InterviewCard[] | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [, setError] = useState<string | null>(null);
   const [, setIsLoggedIn] = useAtom(isLoggedInAtom);
   const [, setUsername] = useAtom(usernameAtom);
   const navigate = useNavigate();
 
-  useEffect(() => {
-    const fetchInterviews = async () => {
-      const token = localStorage.getItem("access_token");
-      if (!token) {
-        navigate("/login");
-        return;
-      }
-      if (!username) return;
-
-      try {
-        const response = await fetch(`${servAddr}/interviews/${username}`, {
-          method: "GET",
-          headers: {
-            Accept: "application/json",
-            Authorization: `Bearer ${token}`,
-          },
-        });
+  const fetchInterviews = async (cursor: string | null = null) => {
+    const token = localStorage.getItem("access_token");
+    if (!token) {
+      navigate("/login");
+      return;
+    }
+    if (!username) return;
 
-        if (response.ok) {
-          const data = await response.json();
-          setInterviews(data.interviews);
-        } else {
-          const errorData = await response.json();
-          setError(errorData.detail || "Failed to fetch interviews.");
-          if (response.status === 401) {
-            localStorage.clear();
-            setIsLoggedIn(false);
-            setUsername("");
-            navigate("/login");
-          }
+    try {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const response = await fetch(`${servAddr}/interviews/${username}${query}`, {
+        method: "GET",
+        headers: {
+          Accept: "application/json",
+          Authorization: `Bearer ${token}`,
+        },
+      });
+
+      if (response.ok) {
+        const data = await response.json();
+        setInterviews((prev) => (cursor && prev ? [...prev, ...data.interviews] : data.interviews));
+        setNextCursor(data.next_cursor ?? null);
+      } else {
+        const errorData = await response.json();
+        setError(errorData.detail || "Failed to fetch interviews.");
+        if (response.status === 401) {
+          localStorage.clear();
+          setIsLoggedIn(false);
+          setUsername("");
+          navigate("/login");
         }
-      } catch (err) {
-        setError("An error occurred while fetching interviews.");
       }
-    };
+    } catch (err) {
+      setError("An error occurred while fetching interviews.");
+    }
+  };
 
+  useEffect(() => {
     fetchInterviews();
   }, [username, navigate, setIsLoggedIn, setUsername]);
 
-  const handleCreateInterview = async (jobName: string, resume: string | null, jobDescription: string) => {
+  const handleCreateInterview = async (jobName: string, resume: File, jobDescription: string) => {
     const token = localStorage.getItem("access_token");
     if (!token) return;
 
     try {
+      const upload = await fetch(`${servAddr}/resumes/${username}`, {
+        method: "POST",
+        headers: {
+          "Content-Type": resume.type || "application/pdf",
+          Authorization: `Bearer ${token}`,
+        },
+        body: resume,
+      });
+      if (!upload.ok) {
+        const errorData = await upload.json();
+        toast.error("Failed to upload resume", {
+          description: errorData.detail || "An error occurred.",
+        });
+        return;
+      }
+      const { resume_id } = await upload.json();
+
       const response = await fetch(`${servAddr}/createInterview/${username}`, {
         method: "POST",
         headers: {
@@ -72,7 +92,7 @@ const Dashboard: React.FC = () => {
           Authorization: `Bearer ${token}`,
         },
         body: JSON.stringify({
-          user_data: resume || "",
+          resume_id,
           job_description: jobDescription,
           job_name: jobName,
         }),
@@ -152,6 +172,17 @@ const Dashboard: React.FC = () => {
           </motion.div>
         ))}
       </div>
+
+      {nextCursor && (
+        <div className="flex justify-center mt-8">
+          <button
+            onClick={() => fetchInterviews(nextCursor)}
+            className="px-6 py-2 rounded-lg bg-white/10 border border-white/20 text-white hover:bg-white/20 transition-colors"
+          >
+            Load more
+          </button>
+        </div>
+      )}
     </motion.div>
   );
 };
@@ -25,7 +25,9 @@ const ResultsPage = () => {
   const [score, setScore] = useState(0);
 
   useEffect(() => {
+    let pollTimer: ReturnType<typeof setTimeout> | undefined;
     const fetchResults = async () => {
+      let pending = false;
       try {
         const token = localStorage.getItem('access_token');
         const response = await fetch(`${servAddr}/result/${username}/${id}`, {
@@ -55,6 +57,14 @@ const ResultsPage = () => {
           }
         }
 
+        // Reviews are generated in the background; poll until they are ready
+        if (response.status === 202) {
+          pending = true;
+          const retryAfter = Number(response.headers.get("Retry-After")) || 2;
+          pollTimer = setTimeout(fetchResults, retryAfter * 1000);
+          return;
+        }
+
         if (!response.ok) {
           throw new Error("Failed to fetch results");
         }
@@ -66,11 +76,12 @@ const ResultsPage = () => {
       } catch (error) {
         console.error('Error fetching results:', error);
       } finally {
-        setLoading(false);
+        if (!pending) setLoading(false);
       }
     };
 
     fetchResults();
+    return () => clearTimeout(pollTimer);
   }, [id, username, navigate]);
 
   const getAnswerStatus = (answer: string | null) => {
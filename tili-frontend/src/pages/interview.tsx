@@ -31,6 +31,8 @@ const Interview: React.FC = () => {
   const [streamedText, setStreamedText] = useState("");
   const [isStreaming, setIsStreaming] = useState(false);
   const [isStreamComplete, setIsStreamComplete] = useState(false);
+  // Next question as returned alongside the feedback stream; "done" when none remain
+  const [nextQuestion, setNextQuestion] = useState<{ questionNumber: number; question: string } | "done" | null>(null);
 
   const formatTime = (seconds: number) => {
     const mins = Math.floor(seconds / 60);
@@ -38,6 +40,19 @@ const Interview: React.FC = () => {
     return `${mins}:${secs.toString().padStart(2, "0")}`;
   };
 
+  const showQuestion = (questionNumber: number, text: string) => {
+    setQuestionData({
+      questionNumber,
+      question: text,
+    });
+    setError(null);
+    setCurrentPhase("reading");
+    setTimer(10);
+    setAnswer("");
+    setStreamedText("");
+    setIsStreamComplete(false);
+  };
+
   const fetchQuestion = async (id: string) => {
     const token = localStorage.getItem("access_token");
     try {
@@ -63,6 +78,13 @@ const Interview: React.FC = () => {
         }
       }
 
+      if (response.status === 202) {
+        // The next question is still being generated.
+        const retryAfter = Number(response.headers.get("Retry-After") || 1);
+        setTimeout(() => fetchQuestion(id), retryAfter * 1000);
+        return;
+      }
+
       if (!response.ok) throw new Error("Failed to fetch question");
       const data = await response.json();
       
@@ -75,16 +97,7 @@ const Interview: React.FC = () => {
         setError(data.detail);
         setQuestionData(null);
       } else {
-        setQuestionData({
-          questionNumber: data.question_index,
-          question: data.question,
-        });
-        setError(null);
-        setCurrentPhase("reading");
-        setTimer(10);
-        setAnswer("");
-        setStreamedText("");
-        setIsStreamComplete(false);
+        showQuestion(data.question_index, data.question);
       }
     } catch (error) {
       console.error("Error fetching question:", error);
@@ -134,6 +147,16 @@ const Interview: React.FC = () => {
         throw new Error(errorData.detail || "Failed to submit answer");
       }
       if (!response.body) throw new Error("No response body");
+
+      const nextIndex = response.headers.get("X-Next-Question-Index");
+      const nextText = response.headers.get("X-Next-Question");
+      if (nextIndex === "done") {
+        setNextQuestion("done");
+      } else if (nextIndex && nextText) {
+        setNextQuestion({ questionNumber: Number(nextIndex), question: decodeURIComponent(nextText) });
+      } else {
+        setNextQuestion(null);
+      }
       
       const reader = response.body.getReader();
       const decoder = new TextDecoder();
@@ -156,8 +179,11 @@ const Interview: React.FC = () => {
   };
 
   const handleProceed = async () => {
-    if (question?.questionNumber === 5) {
+    if (nextQuestion === "done" || question?.questionNumber === 5) {
       navigate(`/results/${interviewId}`);
+    } else if (nextQuestion) {
+      setNextQuestion(null);
+      showQuestion(nextQuestion.questionNumber, nextQuestion.question);
     } else if (interviewId) {
       await fetchQuestion(interviewId);
     }